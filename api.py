@@ -1,23 +1,53 @@
+import hashlib
 import json
 import os
 import urllib.parse
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-import requests
+import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from loguru import logger
 
-PACKAGE_DIR = Path(__file__).parent
-token_file = PACKAGE_DIR / "strava_token.json"
+from stravatui import data_manager
+from stravatui.auth import save_token, token_path, validate_athlete
+
+ATHLETE_STATE_PREFIX = "athlete:"
+
+STRAVA_OAUTH_URL = "https://www.strava.com/oauth/token"
+STRAVA_API_URL = "https://www.strava.com/api/v3"
+
+# cached JSON files exposed read-only through the /data endpoints
+DATA_RESOURCES = {
+    "activities": ("activities.json",),
+    "rollups": ("all_time_run.json", "ytd_run.json"),
+    "best_efforts": ("best_efforts.json",),
+}
 
 load_dotenv()
 
-app = FastAPI(title="Strava OAuth", version="2.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one pooled client for the lifetime of the server so connections to
+    # Strava are reused instead of being opened per request
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(10.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+    yield
+    await app.state.http.aclose()
 
 
-def authorize_url():
+app = FastAPI(title="Strava OAuth", version="2.0", lifespan=lifespan)
+
+# (athlete, resource name) -> (file stamps, etag, body)
+_response_cache: dict[tuple[str | None, str], tuple[tuple, str, bytes]] = {}
+
+
+def authorize_url(athlete: str | None = None):
     client_id = os.getenv("STRAVA_CLIENT_ID")
     if not client_id:
         raise HTTPException(500, "STRAVA_CLIENT_ID not set")
@@ -27,12 +57,97 @@ def authorize_url():
         "response_type": "code",
         "redirect_uri": f"{app_url}:5042/authorization_successful",
         "scope": "read,profile:read_all,activity:read_all",
-        "state": "https://github.com/aymenhafeez/strava-oauth",
+        "state": f"{ATHLETE_STATE_PREFIX}{athlete}"
+        if athlete
+        else "https://github.com/aymenhafeez/strava-oauth",
         "approval_prompt": "force",
     }
     return "https://www.strava.com/oauth/authorize?" + urllib.parse.urlencode(params)
 
 
+def _athlete_token_file(athlete: str | None) -> Path:
+    """Return the token file for an athlete namespace (None for the default)."""
+    try:
+        return token_path(athlete)
+    except ValueError as e:
+        raise HTTPException(400, str(e)) from None
+
+
+def _athlete_data_dir(athlete: str | None) -> Path:
+    """
+    Return an athlete's cache directory. Unlike the TUI, a read never creates
+    it, an athlete that hasn't synced yet is a 404.
+    """
+    if athlete is None:
+        data_dir = data_manager.DATA_DIR
+    else:
+        try:
+            data_dir = data_manager.ATHLETES_DIR / validate_athlete(athlete)
+        except ValueError as e:
+            raise HTTPException(400, str(e)) from None
+
+    if not data_dir.is_dir():
+        raise HTTPException(404, f"No cached data for {athlete or 'default'!r}")
+    return data_dir
+
+
+def _file_stamps(paths: list[Path]) -> tuple:
+    """Return (name, mtime_ns, size) for each file, raising 404 if any is missing."""
+    stamps = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            raise HTTPException(404, f"{path.name} not cached yet") from None
+        stamps.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+
+def _build_body(paths: list[Path]) -> bytes:
+    """Read the cached files for a resource and serialise them as one JSON body."""
+    if len(paths) == 1:
+        with open(paths[0], "rb") as f:
+            return f.read()
+
+    combined = {}
+    for path in paths:
+        with open(path) as f:
+            combined[path.stem] = json.load(f)
+    return json.dumps(combined).encode()
+
+
+def _cached_resource(resource: str, athlete: str | None) -> tuple[str, bytes]:
+    """
+    Return (etag, body) for an athlete's data resource. The body is only
+    re-read from disk when the modification time or size of one of its files
+    changes.
+    """
+    data_dir = _athlete_data_dir(athlete)
+    paths = [data_dir / name for name in DATA_RESOURCES[resource]]
+    stamps = _file_stamps(paths)
+
+    cached = _response_cache.get((athlete, resource))
+    if cached is not None and cached[0] == stamps:
+        return cached[1], cached[2]
+
+    body = _build_body(paths)
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    _response_cache[(athlete, resource)] = (stamps, etag, body)
+
+    return etag, body
+
+
+def _data_response(request: Request, resource: str, athlete: str | None) -> Response:
+    etag, body = _cached_resource(resource, athlete)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home():
     return """
@@ -43,17 +158,26 @@ async def home():
 
 
 @app.get("/authorize")
-async def authorize():
-    return RedirectResponse(authorize_url())
+async def authorize(athlete: str | None = None):
+    # validate before sending the user off to Strava
+    _athlete_token_file(athlete)
+    return RedirectResponse(authorize_url(athlete))
 
 
 @app.get("/authorization_successful")
-async def exchange_token(code: str | None = None) -> HTMLResponse:
+async def exchange_token(
+    request: Request, code: str | None = None, state: str | None = None
+) -> HTMLResponse:
     if not code:
         raise HTTPException(400, "No code")
 
-    r = requests.post(
-        "https://www.strava.com/oauth/token",
+    athlete = None
+    if state and state.startswith(ATHLETE_STATE_PREFIX):
+        athlete = state.removeprefix(ATHLETE_STATE_PREFIX)
+    athlete_token_file = _athlete_token_file(athlete)
+
+    r = await request.app.state.http.post(
+        STRAVA_OAUTH_URL,
         data={
             "client_id": os.getenv("STRAVA_CLIENT_ID"),
             "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
@@ -65,27 +189,26 @@ async def exchange_token(code: str | None = None) -> HTMLResponse:
     data = r.json()
 
     # Save token
-    with open(token_file, "w") as f:
-        json.dump(data, f, indent=2)
+    save_token(data, athlete)
 
     return HTMLResponse(f"""
     <h2>Success!</h2>
     <pre>{json.dumps(data, indent=2)}</pre>
-    <p>Token saved to <code>strava_token.json</code></p>
+    <p>Token saved to <code>{athlete_token_file}</code></p>
     <a href="/">Back</a>
     """)
 
 
 @app.get("/my_activities")
-async def my_activities():
+async def my_activities(request: Request):
     try:
-        with open(token_file) as f:
+        with open(token_path()) as f:
             token = json.load(f)["access_token"]
     except:
         return HTMLResponse("No token. <a href='/authorize'>Login first</a>")
 
-    r = requests.get(
-        "https://www.strava.com/api/v3/athlete/activities",
+    r = await request.app.state.http.get(
+        f"{STRAVA_API_URL}/athlete/activities",
         headers={"Authorization": f"Bearer {token}"},
         params={"per_page": 5},
     )
@@ -102,3 +225,22 @@ async def my_activities():
     </ul>
     <a href="/">Back</a>
     """)
+
+
+# the /data handlers read files, so they're plain functions that FastAPI runs
+# in its thread pool rather than on the event loop
+
+
+@app.get("/data/activities")
+def data_activities(request: Request, athlete: str | None = None) -> Response:
+    return _data_response(request, "activities", athlete)
+
+
+@app.get("/data/rollups")
+def data_rollups(request: Request, athlete: str | None = None) -> Response:
+    return _data_response(request, "rollups", athlete)
+
+
+@app.get("/data/best_efforts")
+def data_best_efforts(request: Request, athlete: str | None = None) -> Response:
+    return _data_response(request, "best_efforts", athlete)
@@ -0,0 +1,92 @@
+# Benchmark of the per-activity metrics engine over a synthetic stream store:
+# a full compute in this process and across the pool, a rerun that finds
+# every activity unchanged, and a run after a few activities are added
+#
+#   python -m benchmarks.bench_analytics --activities 5000 --workers 4
+
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from stravatui import analytics, data_manager
+from stravatui.stream_store import save_track, streams_dir
+from stravatui.tracks import from_api_streams
+
+from .synthetic import activity_streams, generate_activities
+
+ATHLETE = "bench"
+
+
+def _fill_stream_store(activities: list[dict], interval: float) -> None:
+    directory = streams_dir(ATHLETE)
+    for activity in activities:
+        start = datetime.fromisoformat(activity["start_date"]).timestamp()
+        track = from_api_streams(activity_streams(activity, interval), start)
+        save_track(directory, activity["id"], track)
+
+
+def _timed_compute(**kwargs) -> dict:
+    start = time.perf_counter()
+    counts = analytics.compute_metrics(ATHLETE, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seconds": round(elapsed, 3),
+        "activities_per_second": round(counts["computed"] / elapsed, 1),
+        **counts,
+    }
+
+
+def run_benchmark(
+    activities: int, interval: float, workers: int | None
+) -> dict[str, dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager.ATHLETES_DIR = Path(tmp) / "athletes"
+        generated = generate_activities(activities + 10)
+
+        start = time.perf_counter()
+        _fill_stream_store(generated[:activities], interval)
+        print(f"stored {activities} tracks in {time.perf_counter() - start:.1f}s")
+
+        results = {
+            "in process": _timed_compute(workers=0, force=True),
+            "pool": _timed_compute(workers=workers, force=True),
+            "unchanged": _timed_compute(workers=workers),
+        }
+
+        _fill_stream_store(generated[activities:], interval)
+        results["10 new"] = _timed_compute(workers=workers)
+
+    return results
+
+
+def format_results(results: dict[str, dict]) -> str:
+    lines = [
+        f"{'phase':<12} {'time (s)':>9} {'act/s':>8} {'computed':>9} "
+        f"{'unchanged':>10}"
+    ]
+    for phase, result in results.items():
+        lines.append(
+            f"{phase:<12} {result['seconds']:>9.2f} "
+            f"{result['activities_per_second']:>8.0f} {result['computed']:>9} "
+            f"{result['unchanged']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-activity metrics benchmark")
+    parser.add_argument("--activities", type=int, default=2000)
+    parser.add_argument(
+        "--interval", type=float, default=5.0, help="seconds between track points"
+    )
+    parser.add_argument("--workers", type=int, help="default: every core")
+    args = parser.parse_args(argv)
+
+    print(format_results(run_benchmark(args.activities, args.interval, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Benchmark of the bulk-export importer on a synthetic archive: a full
+# import, an import interrupted partway and resumed, and a rerun that finds
+# everything already stored
+#
+#   python -m benchmarks.bench_import --activities 10000 --workers 4
+
+import argparse
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from stravatui import bulk_import, data_manager
+
+from .synthetic import generate_activities, write_export_archive
+
+ATHLETE = "bench"
+# batches the interrupted import gets through before it's stopped
+INTERRUPT_BATCHES = 2
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _timed_import(archive: Path, athlete: str, workers: int | None, **kwargs) -> dict:
+    start = time.perf_counter()
+    counts = bulk_import.import_archive(archive, athlete, workers, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seconds": round(elapsed, 3),
+        "activities_per_second": round(counts["rows"] / elapsed, 1),
+        **counts,
+    }
+
+
+def run_benchmark(
+    activities: int, interval: float, workers: int | None, batch_size: int
+) -> dict[str, dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        data_manager.ATHLETES_DIR = tmp_dir / "athletes"
+        archive = tmp_dir / "export.zip"
+
+        start = time.perf_counter()
+        write_export_archive(archive, generate_activities(activities), interval)
+        print(
+            f"wrote {activities} activities ({archive.stat().st_size / 1e6:.1f} MB) "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+        results = {
+            "full_import": _timed_import(
+                archive, f"{ATHLETE}-full", workers, batch_size=batch_size
+            )
+        }
+        results["rerun"] = _timed_import(archive, f"{ATHLETE}-full", workers)
+
+        # stop after INTERRUPT_BATCHES batches, each saved, then run again to
+        # finish. Batches are made small enough that the archive has more than
+        # that, so the first run really is cut short
+        resume_batch_size = max(
+            1, min(batch_size, activities // (INTERRUPT_BATCHES * 2))
+        )
+        batches = 0
+
+        def interrupt(counts: dict[str, int]) -> None:
+            nonlocal batches
+            batches += 1
+            if batches == INTERRUPT_BATCHES:
+                raise _Interrupted
+
+        try:
+            bulk_import.import_archive(
+                archive,
+                ATHLETE,
+                workers,
+                resume_batch_size,
+                progress=interrupt,
+                checkpoint_batches=1,
+            )
+        except _Interrupted:
+            pass
+        results["resumed"] = _timed_import(
+            archive, ATHLETE, workers, batch_size=resume_batch_size
+        )
+
+    return results
+
+
+def format_results(results: dict[str, dict]) -> str:
+    lines = [
+        f"{'phase':<14} {'time (s)':>9} {'act/s':>8} {'imported':>9} "
+        f"{'skipped':>8} {'tracks':>7}"
+    ]
+    for phase, result in results.items():
+        lines.append(
+            f"{phase:<14} {result['seconds']:>9.2f} "
+            f"{result['activities_per_second']:>8.0f} {result['imported']:>9} "
+            f"{result['duplicates']:>8} {result['tracks']:>7}"
+        )
+    lines.append(f"peak RSS {_peak_rss_mb():.0f} MB")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk-export import benchmark")
+    parser.add_argument("--activities", type=int, default=2000)
+    parser.add_argument(
+        "--interval", type=float, default=10.0, help="seconds between track points"
+    )
+    parser.add_argument("--workers", type=int, help="default: every core")
+    parser.add_argument("--batch-size", type=int, default=bulk_import.BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        args.activities, args.interval, args.workers, args.batch_size
+    )
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
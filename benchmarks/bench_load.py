@@ -0,0 +1,132 @@
+# End-to-end benchmark of the data loading path against the local stand-in
+#
+#   python -m benchmarks.bench_load --activities 1000 --latency 0.02
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from stravatui import auth, data_manager
+from stravatui.store import sync_history
+
+from .strava_stub import StravaStub
+from .synthetic import generate_activities, load_fixtures
+
+ATHLETE = "bench"
+
+
+def _write_token(token_dir: Path) -> None:
+    token_dir.mkdir(parents=True, exist_ok=True)
+    with open(token_dir / f"{ATHLETE}.json", "w") as f:
+        json.dump(
+            {
+                "access_token": "stub-access-token",
+                "refresh_token": "stub-refresh-token",
+                "expires_at": int(time.time()) + 6 * 3600,
+            },
+            f,
+        )
+
+
+def _age_cache(data_dir: Path, hours: float) -> None:
+    """Backdate the cache so the next load treats it as stale."""
+    stamp = time.time() - hours * 3600
+    for cache_file in data_dir.glob("*.json"):
+        os.utime(cache_file, (stamp, stamp))
+
+
+def _timed_load(stub: StravaStub, load=data_manager.load_all_data) -> dict:
+    stub.reset_calls()
+    start = time.perf_counter()
+    load(ATHLETE)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seconds": round(elapsed, 4),
+        "api_calls": stub.total_calls,
+        "calls_by_endpoint": dict(stub.calls),
+    }
+
+
+def run_benchmark(
+    activities: list[dict], latency: float, new_activities: int
+) -> dict[str, dict]:
+    """
+    Time a cold start (empty cache), a warm start (fresh cache) and an
+    incremental sync (stale cache after new uploads), counting API calls.
+    The full-history store is timed the same way, on its first and
+    incremental syncs.
+    """
+    stub = StravaStub(activities, latency=latency).start()
+    os.environ["STRAVA_BASE_URL"] = stub.url
+    os.environ.setdefault("SILENCE_TOKEN_WARNINGS", "true")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        auth.TOKEN_DIR = tmp_dir / "tokens"
+        data_manager.ATHLETES_DIR = tmp_dir / "athletes"
+        _write_token(auth.TOKEN_DIR)
+        athlete_dir = data_manager._data_dir(ATHLETE)
+
+        try:
+            results = {
+                "cold_start": _timed_load(stub),
+                "warm_start": _timed_load(stub),
+                "history_sync": _timed_load(stub, sync_history),
+            }
+
+            uploads = generate_activities(
+                new_activities, seed=99, end=datetime.now(timezone.utc)
+            )
+            for i, activity in enumerate(uploads):
+                activity["id"] = 90_000_000 + i
+            stub.add_activities(uploads)
+            _age_cache(athlete_dir, hours=25)
+
+            results["incremental_sync"] = _timed_load(stub)
+            results["history_incremental"] = _timed_load(stub, sync_history)
+        finally:
+            stub.stop()
+            del os.environ["STRAVA_BASE_URL"]
+
+    return results
+
+
+def format_results(results: dict[str, dict]) -> str:
+    lines = [f"{'phase':<20} {'time (s)':>9} {'api calls':>10}"]
+    for phase, result in results.items():
+        lines.append(f"{phase:<20} {result['seconds']:>9.3f} {result['api_calls']:>10}")
+        for endpoint, calls in sorted(result["calls_by_endpoint"].items()):
+            lines.append(f"    {endpoint:<40} {calls:>5}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="End-to-end data load benchmark")
+    parser.add_argument("--activities", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", type=Path, help="recorded activities JSON")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per call")
+    parser.add_argument("--new-activities", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        activities = load_fixtures(args.fixtures)
+    else:
+        activities = generate_activities(args.activities, seed=args.seed)
+
+    results = run_benchmark(activities, args.latency, args.new_activities)
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
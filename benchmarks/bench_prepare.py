@@ -0,0 +1,232 @@
+# Micro-benchmarks for the data preparation hot paths at increasing scale
+#
+#   python -m benchmarks.bench_prepare --save benchmarks/baseline.json
+#   python -m benchmarks.bench_prepare --compare benchmarks/baseline.json
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from stravatui.activity_utils import (
+    calculate_activity_totals,
+    filter_activities_with_heartrate,
+    filter_valid_activities,
+)
+from stravatui.data_manager import aggregate_best_efforts
+from stravatui.formatters import create_pace_list
+from stravatui.ui.plot_data import (
+    prepare_best_efforts_data,
+    prepare_comparison_data,
+    prepare_overview_data,
+    prepare_recent_totals,
+)
+
+from .synthetic import synthetic_best_efforts_data, synthetic_cache_data
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.25
+
+YTD_STATS = {
+    "ytd_distance": "1500000.0",
+    "ytd_elapsed_time": "540000",
+    "ytd_elevation_gain": "12000.0",
+}
+ALL_TIME_STATS = {
+    "all_time_distance": "9000000.0",
+    "all_time_elapsed_time": "3240000",
+    "all_time_elevation_gain": "80000.0",
+}
+
+
+def _cases(size: int) -> dict[str, Callable[[], object]]:
+    """Return zero-argument callables for each benchmarked function at a size."""
+    data = synthetic_cache_data(size)
+    names = data["names"]
+    distances = data["distances"]
+    times = data["times"]
+    heartrates = data["average_heartrate"]
+    elevations = data["total_elevation_gain"]
+    types = data["activity_type"]
+
+    paces = create_pace_list(times, distances)
+    run_indices = filter_valid_activities(types, distances, times, elevations)
+    recent_totals = prepare_recent_totals(types, distances, times, elevations)
+
+    # best efforts come from a handful of efforts per activity, so scale the
+    # number of activities down to keep the effort count comparable to `size`
+    best_efforts_data = synthetic_best_efforts_data(max(1, size // 8))
+    # the aggregated summary is capped at one row per distance, so feed every
+    # effort through prepare_best_efforts_data to see how it scales
+    all_efforts = [
+        effort for activity in best_efforts_data for effort in activity["best_efforts"]
+    ]
+
+    return {
+        "create_pace_list": lambda: create_pace_list(times, distances),
+        "filter_valid_activities": lambda: filter_valid_activities(
+            types, distances, times, elevations
+        ),
+        "filter_activities_with_heartrate": lambda: filter_activities_with_heartrate(
+            types, distances, times, elevations, heartrates, paces
+        ),
+        "calculate_activity_totals": lambda: calculate_activity_totals(
+            distances, times, elevations, run_indices
+        ),
+        "prepare_overview_data": lambda: prepare_overview_data(
+            names, distances, times, heartrates, elevations, types
+        ),
+        "prepare_recent_totals": lambda: prepare_recent_totals(
+            types, distances, times, elevations
+        ),
+        "prepare_comparison_data": lambda: prepare_comparison_data(
+            recent_totals, YTD_STATS, ALL_TIME_STATS
+        ),
+        "prepare_best_efforts_data": lambda: prepare_best_efforts_data(all_efforts),
+        "aggregate_best_efforts": lambda: aggregate_best_efforts(best_efforts_data),
+    }
+
+
+def _time_call(func: Callable[[], object], min_time: float) -> float:
+    """Return the best wall time of repeated calls, running for at least min_time."""
+    best = float("inf")
+    total = 0.0
+    runs = 0
+
+    # like timeit, keep the collector from firing part way through a run
+    gc.collect()
+    gc.disable()
+    try:
+        while total < min_time or runs < 3:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+
+            best = min(best, elapsed)
+            total += elapsed
+            runs += 1
+    finally:
+        gc.enable()
+
+    return best
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    """Return the peak bytes allocated during one call."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run_benchmarks(
+    sizes: list[int], only: list[str] | None = None, min_time: float = 0.2
+) -> dict[str, dict[str, dict]]:
+    """Return {function: {size: {"seconds", "peak_bytes"}}}."""
+    results: dict[str, dict[str, dict]] = {}
+
+    for size in sizes:
+        for name, func in _cases(size).items():
+            if only and name not in only:
+                continue
+
+            results.setdefault(name, {})[str(size)] = {
+                "seconds": _time_call(func, min_time),
+                "peak_bytes": _peak_memory(func),
+            }
+            print(f"  {name:<34} {size:>9}", file=sys.stderr)
+
+    return results
+
+
+def compare_results(
+    baseline: dict[str, dict[str, dict]],
+    current: dict[str, dict[str, dict]],
+    threshold: float,
+) -> list[str]:
+    """Return a line for every time or memory figure that grew by > threshold."""
+    regressions = []
+
+    for name, by_size in current.items():
+        for size, result in by_size.items():
+            base = baseline.get(name, {}).get(size)
+            if base is None:
+                continue
+
+            for metric in ("seconds", "peak_bytes"):
+                if base[metric] and result[metric] > base[metric] * (1 + threshold):
+                    change = result[metric] / base[metric] - 1
+                    regressions.append(
+                        f"{name} @ {size}: {metric} {base[metric]:.6g} -> "
+                        f"{result[metric]:.6g} (+{change:.0%})"
+                    )
+
+    return regressions
+
+
+def format_results(results: dict[str, dict[str, dict]]) -> str:
+    lines = [f"{'function':<34} {'size':>9} {'time (ms)':>11} {'peak (KiB)':>11}"]
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            lines.append(
+                f"{name:<34} {size:>9} {result['seconds'] * 1000:>11.3f} "
+                f"{result['peak_bytes'] / 1024:>11.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Data preparation micro-benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", nargs="+", help="only run these functions")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative growth that counts as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.only, args.min_time)
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
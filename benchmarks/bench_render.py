@@ -0,0 +1,209 @@
+# Headless render benchmark for the app's pages and plots, driven by the pilot
+#
+#   python -m benchmarks.bench_render --activities 100 10000 --sizes 120x40 200x60
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from stravatui import data_manager
+from stravatui.app import StravaTUIApp
+from stravatui.store import ActivityStore
+from stravatui.ui.cached_plot import CachedPlot
+from stravatui.ui.history_table import HistoryTable
+from stravatui.ui.pages import PAGES
+
+from .synthetic import (
+    synthetic_best_efforts_data,
+    synthetic_cache_data,
+    synthetic_store_records,
+)
+
+ATHLETE = "bench"
+DEFAULT_ACTIVITIES = (100, 1_000, 10_000)
+DEFAULT_TERMINAL_SIZES = ("100x30", "160x48", "240x72")
+POLL_INTERVAL = 0.005
+
+
+def _seed_cache(data_dir: Path, activities: int) -> None:
+    """Write a complete, fresh cache so the app loads without any API calls."""
+    recent_data = synthetic_cache_data(activities)
+    runs = [
+        i for i, t in enumerate(recent_data["activity_type"]) if "Run" in t
+    ]
+    distance = sum(float(recent_data["distances"][i]) for i in runs)
+    moving_time = sum(int(recent_data["times"][i]) for i in runs)
+
+    files = {
+        "activities.json": recent_data,
+        "ytd_run.json": {
+            "ytd_ach_count": "10",
+            "ytd_count": str(len(runs) // 3),
+            "ytd_distance": str(distance / 3),
+            "ytd_elapsed_time": str(moving_time // 3),
+            "ytd_elevation_gain": "4500.0",
+            "ytd_moving_time": str(moving_time // 3),
+        },
+        "all_time_run.json": {
+            "all_time_ach_count": "30",
+            "all_time_count": str(len(runs)),
+            "all_time_distance": str(distance),
+            "all_time_elapsed_time": str(moving_time),
+            "all_time_elevation_gain": "13500.0",
+            "all_time_moving_time": str(moving_time),
+        },
+        "best_efforts.json": synthetic_best_efforts_data(6),
+    }
+
+    for name, payload in files.items():
+        with open(data_dir / name, "w") as f:
+            json.dump(payload, f)
+
+    # full history, so the history page has the same number of activities
+    for store_file in (data_dir / "store").glob("*.json"):
+        store_file.unlink()
+    store = ActivityStore(ATHLETE)
+    store.add_activities(synthetic_store_records(activities))
+    store.save()
+
+
+def _time_plot_renders(app: StravaTUIApp, page: str) -> dict[str, dict[str, float]]:
+    """Time a full rebuild and a cached render of every plot on a (visible) page."""
+    timings = {}
+    for plot in app.query_one(f"#{page}").query(CachedPlot):
+        plot.clear_render_cache()
+        start = time.perf_counter()
+        plot.render()
+        rebuild = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plot.render()
+        timings[plot.id or "plot"] = {
+            "rebuild": rebuild,
+            "cached": time.perf_counter() - start,
+        }
+    return timings
+
+
+async def _time_history_paging(app: StravaTUIApp, pilot) -> dict[str, float]:
+    """Time a page down, a re-sort and a jump to the end of the history table."""
+    table = app.query_one(HistoryTable)
+    actions = (
+        ("page_down", table.action_page_down),
+        ("sort", lambda: table.action_sort("distance")),
+        ("last_page", table.action_last_page),
+    )
+    timings = {}
+
+    for name, action in actions:
+        start = time.perf_counter()
+        action()
+        timings[name] = time.perf_counter() - start
+        await pilot.pause()
+
+    return timings
+
+
+async def _bench_app(terminal_size: tuple[int, int]) -> dict:
+    """Run one headless session and collect its timings."""
+    app = StravaTUIApp(athlete=ATHLETE)
+    result: dict = {"page_switch": {}, "plot_render": {}, "history": {}}
+
+    start = time.perf_counter()
+    async with app.run_test(size=terminal_size) as pilot:
+        result["first_paint"] = time.perf_counter() - start
+
+        main_content = app.query_one("#main-content")
+        while not main_content.display:
+            await pilot.pause(POLL_INTERVAL)
+        await pilot.pause()
+        result["populate"] = time.perf_counter() - start
+
+        for page in PAGES:
+            switch_start = time.perf_counter()
+            await app.action_show_page(page)
+            await pilot.pause()
+            result["page_switch"][page] = time.perf_counter() - switch_start
+            result["plot_render"].update(_time_plot_renders(app, page))
+
+            if page == "history-page":
+                result["history"] = await _time_history_paging(app, pilot)
+
+    return result
+
+
+def run_benchmarks(
+    activity_counts: list[int], terminal_sizes: list[tuple[int, int]]
+) -> dict[str, dict[str, dict]]:
+    """Return {activities: {"WxH": timings}} for every combination."""
+    results: dict[str, dict[str, dict]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager.ATHLETES_DIR = Path(tmp)
+        data_dir = data_manager._data_dir(ATHLETE)
+
+        for activities in activity_counts:
+            _seed_cache(data_dir, activities)
+
+            for width, height in terminal_sizes:
+                results.setdefault(str(activities), {})[f"{width}x{height}"] = (
+                    asyncio.run(_bench_app((width, height)))
+                )
+
+    return results
+
+
+def format_results(results: dict[str, dict[str, dict]]) -> str:
+    lines = []
+    for activities, by_size in results.items():
+        for size, result in by_size.items():
+            lines.append(
+                f"{activities} activities @ {size}: first paint "
+                f"{result['first_paint'] * 1000:.1f} ms, populated "
+                f"{result['populate'] * 1000:.1f} ms"
+            )
+            for page, seconds in result["page_switch"].items():
+                lines.append(f"    switch to {page:<28} {seconds * 1000:>8.2f} ms")
+            for action, seconds in result["history"].items():
+                lines.append(f"    history {action:<30} {seconds * 1000:>8.2f} ms")
+            for plot, timing in result["plot_render"].items():
+                lines.append(
+                    f"    render {plot:<31} {timing['rebuild'] * 1000:>8.2f} ms "
+                    f"(cached {timing['cached'] * 1000:.3f} ms)"
+                )
+    return "\n".join(lines)
+
+
+def _parse_size(value: str) -> tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Headless page and plot benchmark")
+    parser.add_argument(
+        "--activities", type=int, nargs="+", default=list(DEFAULT_ACTIVITIES)
+    )
+    parser.add_argument(
+        "--sizes",
+        type=_parse_size,
+        nargs="+",
+        default=[_parse_size(s) for s in DEFAULT_TERMINAL_SIZES],
+        help="terminal sizes as WIDTHxHEIGHT",
+    )
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.activities, args.sizes)
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Startup import budget: how long `import stravatui.app` takes in a fresh
+# interpreter, and that the heavy dependencies are still loaded lazily
+#
+#   python -m benchmarks.bench_startup --budget 400
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+DEFAULT_RUNS = 5
+DEFAULT_BUDGET_MS = 400.0
+
+# only needed once there's data to fetch or plot, so the app shouldn't pull
+# them in just by being imported
+LAZY_MODULES = ("stravalib", "requests", "plotext", "textual_plotext")
+
+IMPORT_SCRIPT = f"""
+import sys
+import time
+
+start = time.perf_counter()
+import stravatui.app
+print((time.perf_counter() - start) * 1000)
+print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))
+"""
+
+
+def _time_import() -> tuple[float, list[str]]:
+    """Import the app in a fresh interpreter, return (ms, eagerly loaded modules)."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+
+    return float(output[0]), [m for m in output[1].split(",") if m]
+
+
+def _slowest_imports(count: int) -> list[tuple[float, str]]:
+    """Top-level packages with the largest cumulative time under -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import stravatui.app"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    times: dict[str, float] = {}
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+
+        # a package's own first import includes its submodules, so keep the
+        # largest cumulative time seen for each top-level name
+        package = parts[2].strip().partition(".")[0]
+        times[package] = max(times.get(package, 0.0), int(parts[1]) / 1000)
+
+    times.pop("stravatui", None)
+    return sorted(((ms, package) for package, ms in times.items()), reverse=True)[
+        :count
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Startup import time budget")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="median import time (ms) above which the run fails",
+    )
+    parser.add_argument("--top", type=int, default=10, help="slowest imports shown")
+    args = parser.parse_args(argv)
+
+    timings = []
+    eager: set[str] = set()
+    for _ in range(args.runs):
+        ms, loaded = _time_import()
+        timings.append(ms)
+        eager.update(loaded)
+
+    median = statistics.median(timings)
+    print(
+        f"import stravatui.app: median {median:.1f} ms "
+        f"(min {min(timings):.1f}, max {max(timings):.1f}, {args.runs} runs)"
+    )
+
+    print("\nslowest imports (cumulative ms)")
+    for ms, package in _slowest_imports(args.top):
+        print(f"    {package:<32} {ms:>8.1f}")
+
+    failed = False
+    if eager:
+        print(f"\nImported eagerly: {', '.join(sorted(eager))}")
+        failed = True
+    if median > args.budget:
+        print(f"\nOver budget: {median:.1f} ms > {args.budget:.1f} ms")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+    print("\nWithin budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Track parser throughput on large synthetic GPX, TCX and FIT files, in
+# points per second, plus the peak memory of one parse
+#
+#   python -m benchmarks.bench_tracks --points 200000
+
+import argparse
+import gzip
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from stravatui.stream_store import decode_track, encode_track
+from stravatui.tracks import read_track_file
+
+from .synthetic import generate_activities, track_file
+
+FORMATS = ("gpx", "gpx.gz", "tcx", "fit", "fit.gz")
+
+
+def _large_activity(points: int, interval: float) -> dict:
+    activity = generate_activities(1, seed=7)[0]
+    # keep the pace, stretch the duration to the requested number of points
+    pace = activity["moving_time"] / activity["distance"]
+    activity["moving_time"] = int(points * interval)
+    activity["distance"] = activity["moving_time"] / pace
+    activity["average_heartrate"] = 150.0
+    return activity
+
+
+def _best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmark(points: int, interval: float, repeat: int) -> dict[str, dict]:
+    activity = _large_activity(points, interval)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            path = Path(tmp) / f"track.{fmt}"
+            data = track_file(activity, path.name, interval)
+            path.write_bytes(gzip.compress(data) if fmt.endswith(".gz") else data)
+
+            track = read_track_file(path)
+            count = len(track["time"])
+            seconds = _best_time(lambda: read_track_file(path), repeat)
+
+            results[fmt] = {
+                "points": count,
+                "file_bytes": path.stat().st_size,
+                "seconds": round(seconds, 4),
+                "points_per_second": round(count / seconds),
+                "peak_bytes": _peak_memory(lambda: read_track_file(path)),
+            }
+
+        # the stream store's own encoding, which analytics read back
+        encoded = encode_track(track)
+        seconds = _best_time(lambda: decode_track(encoded), repeat)
+        results["stream store"] = {
+            "points": count,
+            "file_bytes": len(encoded),
+            "seconds": round(seconds, 4),
+            "points_per_second": round(count / seconds),
+            "peak_bytes": _peak_memory(lambda: decode_track(encoded)),
+        }
+
+    return results
+
+
+def format_results(results: dict[str, dict]) -> str:
+    lines = [
+        f"{'format':<14} {'points':>9} {'file MB':>8} {'time (s)':>9} "
+        f"{'points/s':>11} {'peak MB':>8}"
+    ]
+    for fmt, result in results.items():
+        lines.append(
+            f"{fmt:<14} {result['points']:>9} {result['file_bytes'] / 1e6:>8.1f} "
+            f"{result['seconds']:>9.3f} {result['points_per_second']:>11,} "
+            f"{result['peak_bytes'] / 1e6:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Track parser throughput")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between points"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(format_results(run_benchmark(args.points, args.interval, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# Local stand-in for the parts of the Strava API that stravaTUI uses
+#
+#   python -m benchmarks.strava_stub --activities 2000 --latency 0.05
+#   STRAVA_BASE_URL=http://127.0.0.1:8765 python main.py
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import (
+    ATHLETE_ID,
+    activity_streams,
+    athlete_stats,
+    detailed_activity,
+    generate_activities,
+    load_fixtures,
+)
+
+ROUTES = (
+    ("athlete", re.compile(r"^/api/v3/athlete$")),
+    ("athlete_stats", re.compile(r"^/api/v3/athletes/(\d+)/stats$")),
+    ("athlete_activities", re.compile(r"^/api/v3/athlete/activities$")),
+    ("activity_streams", re.compile(r"^/api/v3/activities/(\d+)/streams$")),
+    ("activity", re.compile(r"^/api/v3/activities/(\d+)$")),
+)
+
+
+class StravaStub:
+    """
+    In-memory Strava stand-in. Holds the athlete's activities (newest first),
+    counts calls per endpoint and simulates latency and rate limiting.
+    """
+
+    def __init__(
+        self,
+        activities: list[dict],
+        latency: float = 0.0,
+        rate_limit: tuple[int, int] = (200, 2000),
+        enforce_rate_limit: bool = False,
+    ):
+        self.activities = activities
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.enforce_rate_limit = enforce_rate_limit
+        self.calls: Counter[str] = Counter()
+        self._by_id = {a["id"]: a for a in activities}
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def add_activities(self, activities: list[dict]) -> None:
+        """Add new activities, as if the athlete had uploaded them."""
+        with self._lock:
+            self.activities = sorted(
+                activities + self.activities,
+                key=lambda a: a["start_date"],
+                reverse=True,
+            )
+            self._by_id.update({a["id"]: a for a in activities})
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "StravaStub":
+        """Serve in a background thread (port 0 picks a free port)."""
+        stub = self
+
+        class Handler(_StubHandler):
+            pass
+
+        Handler.stub = stub
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _record_call(self, endpoint: str) -> tuple[int, dict[str, str]]:
+        """Count a call and return (status, rate-limit headers) for it."""
+        with self._lock:
+            self.calls[endpoint] += 1
+            used = self.total_calls
+
+        short_limit, daily_limit = self.rate_limit
+        headers = {
+            "X-RateLimit-Limit": f"{short_limit},{daily_limit}",
+            "X-RateLimit-Usage": f"{used},{used}",
+            "X-ReadRateLimit-Limit": f"{short_limit // 2},{daily_limit // 2}",
+            "X-ReadRateLimit-Usage": f"{used},{used}",
+        }
+        if self.enforce_rate_limit and used > short_limit // 2:
+            return 429, headers
+
+        return 200, headers
+
+    def _list_activities(self, query: dict[str, list[str]]) -> list[dict]:
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["30"])[0])
+        before = query.get("before", [None])[0]
+        after = query.get("after", [None])[0]
+
+        with self._lock:
+            activities = self.activities
+
+        if before is not None:
+            cutoff = _epoch_to_iso(before)
+            activities = [a for a in activities if a["start_date"] < cutoff]
+        if after is not None:
+            cutoff = _epoch_to_iso(after)
+            # Strava returns oldest first when paging forward from `after`
+            activities = [a for a in reversed(activities) if a["start_date"] > cutoff]
+
+        start = (page - 1) * per_page
+        return activities[start : start + per_page]
+
+    def handle(self, path: str, query: dict[str, list[str]]) -> tuple[int, object]:
+        for endpoint, pattern in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            return 404, {"message": "Record Not Found", "errors": []}
+
+        if endpoint == "athlete":
+            return 200, {
+                "id": ATHLETE_ID,
+                "resource_state": 3,
+                "username": "synthetic",
+                "firstname": "Synthetic",
+                "lastname": "Athlete",
+            }
+        if endpoint == "athlete_stats":
+            with self._lock:
+                activities = self.activities
+            return 200, athlete_stats(activities)
+        if endpoint == "athlete_activities":
+            return 200, self._list_activities(query)
+
+        activity = self._by_id.get(int(match.group(1)))
+        if activity is None:
+            return 404, {"message": "Record Not Found", "errors": []}
+        if endpoint == "activity":
+            return 200, detailed_activity(activity)
+
+        keys = query.get("keys", [""])[0].split(",")
+        streams = activity_streams(activity)
+        return 200, {
+            key: {
+                "type": key,
+                "data": data,
+                "series_type": "distance",
+                "original_size": len(data),
+                "resolution": "high",
+            }
+            for key, data in streams.items()
+            if key in keys or keys == [""]
+        }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    stub: StravaStub
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: object, headers: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if self.stub.latency:
+            time.sleep(self.stub.latency)
+
+        status, headers = self.stub._record_call(parsed.path)
+        if status == 429:
+            self._send_json(429, {"message": "Rate Limit Exceeded"}, headers)
+            return
+
+        status, payload = self.stub.handle(parsed.path, parse_qs(parsed.query))
+        self._send_json(status, payload, headers)
+
+    def do_POST(self):
+        # token refreshes
+        if urlparse(self.path).path == "/oauth/token":
+            self._send_json(
+                200,
+                {
+                    "token_type": "Bearer",
+                    "access_token": "stub-access-token",
+                    "refresh_token": "stub-refresh-token",
+                    "expires_at": int(time.time()) + 6 * 3600,
+                    "expires_in": 6 * 3600,
+                },
+                {},
+            )
+        else:
+            self._send_json(404, {"message": "Record Not Found"}, {})
+
+
+def _epoch_to_iso(value: str) -> str:
+    dt = datetime.fromtimestamp(float(value), tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Local Strava API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--activities", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", type=Path, help="recorded activities JSON")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per call")
+    parser.add_argument("--rate-limit", default="200,2000", help="15min,daily")
+    parser.add_argument("--enforce-rate-limit", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        activities = load_fixtures(args.fixtures)
+    else:
+        activities = generate_activities(args.activities, seed=args.seed)
+
+    short_limit, daily_limit = (int(v) for v in args.rate_limit.split(","))
+    stub = StravaStub(
+        activities,
+        latency=args.latency,
+        rate_limit=(short_limit, daily_limit),
+        enforce_rate_limit=args.enforce_rate_limit,
+    ).start(args.host, args.port)
+    print(f"Serving {len(activities)} activities on {stub.url}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 
-from stravatui.app import StravaTUIApp
-from stravatui.terminal_background import is_dark, query_terminal_background
+import argparse
+from pathlib import Path
 
+from stravatui import memory_profile, startup, tracing
+from stravatui.stall_watchdog import (
+    DEFAULT_THRESHOLD,
+    STALL_LOG,
+    StallWatchdog,
+    format_report,
+)
+from stravatui.terminal_background import is_dark, start_terminal_background_query
 
-def pick_theme_name() -> str:
-    bg = query_terminal_background(timeout=0.25)
 
+def pick_theme_name(bg: tuple | None) -> str:
     if bg is None:
         return "darktheme"
 
@@ -14,5 +21,99 @@ def pick_theme_name() -> str:
 
 
 if __name__ == "__main__":
-    app = StravaTUIApp(theme_name=pick_theme_name())
+    parser = argparse.ArgumentParser(description="Strava run stats in the terminal")
+    parser.add_argument(
+        "--athlete", help="athlete namespace to use (default: strava_token.json)"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print an import and init timing breakdown on exit",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="FILE",
+        help="trace data loading and write a Chrome trace-event JSON to FILE "
+        "on exit (ctrl+t shows the last load's waterfall)",
+    )
+    parser.add_argument(
+        "--watch-stalls",
+        type=float,
+        nargs="?",
+        const=DEFAULT_THRESHOLD * 1000,
+        metavar="MS",
+        help="report event loop stalls longer than MS milliseconds (default "
+        f"{DEFAULT_THRESHOLD * 1000:.0f}) and show loop lag in an overlay",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="snapshot memory after each load stage and page, and print the "
+        "top allocators, retained dataset sizes and sync growth on exit",
+    )
+    parser.add_argument(
+        "--memory-snapshots",
+        type=Path,
+        metavar="DIR",
+        help="with --profile-memory, also dump each snapshot to DIR for "
+        "python -m stravatui.memory_profile diff",
+    )
+    parser.add_argument(
+        "--hr-zones",
+        metavar="BPM,...",
+        help="set the athlete's heart rate zones by the top bpm of every zone "
+        "but the last, e.g. 120,140,155,170 (kept for later runs)",
+    )
+    args = parser.parse_args()
+
+    if args.hr_zones:
+        from stravatui.hr_zones import parse_zones, save_zones
+
+        try:
+            save_zones(parse_zones(args.hr_zones), args.athlete)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.profile_startup:
+        startup.trace_imports()
+    if args.trace:
+        tracing.enable()
+    if args.profile_memory:
+        memory_profile.enable(args.memory_snapshots)
+
+    # ask the terminal for its background while the app is imported, the
+    # answer has to be in before the app takes over the terminal
+    background = start_terminal_background_query(timeout=0.25)
+
+    with startup.span("import stravatui.app"):
+        from stravatui.app import StravaTUIApp
+
+    with startup.span("terminal background"):
+        theme_name = pick_theme_name(background.result())
+
+    watchdog = None
+    if args.watch_stalls is not None:
+        watchdog = StallWatchdog(threshold=args.watch_stalls / 1000, log_path=STALL_LOG)
+
+    with startup.span("app init"):
+        app = StravaTUIApp(
+            theme_name=theme_name,
+            athlete=args.athlete,
+            stall_watchdog=watchdog,
+        )
+
     app.run()
+
+    if args.profile_startup:
+        print(startup.report())
+    if args.trace:
+        tracing.export_chrome_trace(args.trace)
+    if args.profile_memory:
+        print(memory_profile.report())
+    if watchdog is not None:
+        print(watchdog.summary())
+        for report in watchdog.reports:
+            print(format_report(report).partition("\n")[0])
+        if watchdog.reports:
+            print(f"stacks written to {watchdog.log_path}")
@@ -0,0 +1,366 @@
+# Batch engine for per-activity metrics derived from streams (see
+# stream_metrics.py). Activities are fanned out across a process pool whose
+# workers map the stream files straight into memory, and the results are kept
+# in the store next to each activity's stream fingerprint, so only new or
+# changed streams are computed again
+#
+#   python -m stravatui.analytics --athlete alice [--metric best_efforts] [--force]
+
+import argparse
+import multiprocessing
+import os
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from . import metrics, tracing
+from .data_manager import get_activity_streams
+from .store import _read_json, _store_dir, _write_json
+from .stream_metrics import METRICS
+from .stream_store import _stream_path, mapped_track, stored_tracks, streams_dir
+
+# results are saved after this many activities, so an interrupted run only
+# loses the work since the last save
+SAVE_EVERY = 1000
+
+# fewer activities than this are computed in this process, as starting the
+# pool would take longer than the work
+POOL_MIN_TASKS = 50
+# streams fetched from Strava per fetch_streams call, to stay well inside the
+# API rate limit
+FETCH_LIMIT = 20
+# requests left in Strava's rate-limit windows that fetch_streams won't touch,
+# kept for loading the app's own data
+FETCH_RESERVE = 20
+
+# what a metric can raise on a track with odd or missing values
+METRIC_ERRORS = (ValueError, ZeroDivisionError, IndexError, TypeError)
+
+# one lock per results file, as the app's splits and training load workers can
+# both save the same metric
+_results_locks: dict[Path, threading.Lock] = {}
+_results_locks_guard = threading.Lock()
+
+
+def _results_path(name: str, athlete: str | None) -> Path:
+    results_dir = _store_dir(athlete) / "analytics"
+    results_dir.mkdir(exist_ok=True)
+    return results_dir / f"{name}.json"
+
+
+def stream_fingerprint(path: Path) -> str:
+    # stream files are only ever replaced whole, so size and modification time
+    # change whenever the streams do
+    stat = path.stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _load_results(name: str, athlete: str | None) -> dict[str, Any]:
+    """A metric's stored results, empty if missing or from an older version."""
+    results = _read_json(_results_path(name, athlete))
+    if not results or results.get("version") != METRICS[name][0]:
+        return {"version": METRICS[name][0], "fingerprints": {}, "values": {}}
+    return results
+
+
+def _results_lock(path: Path) -> threading.Lock:
+    with _results_locks_guard:
+        return _results_locks.setdefault(path, threading.Lock())
+
+
+def _save_results(
+    name: str,
+    athlete: str | None,
+    updates: dict[str, tuple[str, Any]],
+    removed: Iterable[str] = (),
+) -> None:
+    """
+    Save activity id -> (fingerprint, value) updates to a metric's results,
+    and forget the `removed` activities, on top of what's stored now so
+    results saved meanwhile by another thread are kept.
+    """
+    path = _results_path(name, athlete)
+    with _results_lock(path):
+        results = _load_results(name, athlete)
+        for key in removed:
+            results["fingerprints"].pop(key, None)
+            results["values"].pop(key, None)
+        for key, (fingerprint, value) in updates.items():
+            results["fingerprints"][key] = fingerprint
+            results["values"][key] = value
+        _write_json(path, results)
+
+
+# (metric, athlete) -> (results file mtime, values) for metric_values
+_values_memo: dict[tuple[str, str | None], tuple[int, dict[int, Any]]] = {}
+
+
+def results_mtime(name: str, athlete: str | None = None) -> int:
+    """
+    When a metric's stored results last changed (0 if never computed), to key
+    anything derived from them on.
+    """
+    try:
+        return _results_path(name, athlete).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def metric_values(name: str, athlete: str | None = None) -> dict[int, Any]:
+    """
+    Activity id -> stored value of a metric, for every activity computed.
+    Kept in memory until the results file changes.
+    """
+    mtime = results_mtime(name, athlete)
+    if not mtime:
+        return {}
+
+    memo = _values_memo.get((name, athlete))
+    if memo is not None and memo[0] == mtime:
+        return memo[1]
+
+    values = {
+        int(activity_id): value
+        for activity_id, value in _load_results(name, athlete)["values"].items()
+    }
+    _values_memo[(name, athlete)] = (mtime, values)
+    return values
+
+
+def fetch_streams(
+    activities: Iterable[tuple[int, float]],
+    athlete: str | None = None,
+    limit: int = FETCH_LIMIT,
+) -> int:
+    """
+    Fetch streams from Strava for (activity id, start time) pairs that don't
+    have them stored yet, at most `limit` per call, and stopping while
+    FETCH_RESERVE requests are still left in Strava's rate-limit windows.
+    Activities already stored cost nothing. Returns how many were fetched.
+    """
+    directory = streams_dir(athlete)
+    fetched = 0
+
+    for activity_id, start in activities:
+        if fetched >= limit:
+            break
+        if _stream_path(directory, activity_id).exists():
+            continue
+
+        remaining = metrics.rate_limit_remaining()
+        if remaining is not None and remaining <= FETCH_RESERVE:
+            break
+        if get_activity_streams(activity_id, athlete, start) is None:
+            # no access token
+            break
+        fetched += 1
+
+    return fetched
+
+
+def _compute_activity(task: tuple[str, tuple[str, ...]]) -> dict[str, Any] | None:
+    """
+    Work out the named metrics for one stream file, or None if the file
+    can't be read. A metric that fails on the track's values comes back None.
+    """
+    path, names = task
+    values = {}
+
+    try:
+        with mapped_track(Path(path)) as track:
+            if track is None or "time" not in track:
+                return None
+
+            for name in names:
+                try:
+                    values[name] = METRICS[name][1](track)
+                except METRIC_ERRORS:
+                    values[name] = None
+    except (OSError, struct.error):
+        return None
+
+    return values
+
+
+@tracing.traced()
+def activity_metrics(
+    activity_id: int,
+    names: Iterable[str],
+    athlete: str | None = None,
+    start: float = 0.0,
+) -> dict[str, Any]:
+    """
+    Named metrics for one activity, read from the stored results when its
+    streams haven't changed and otherwise computed here and saved. Streams
+    not stored yet are fetched from Strava (`start` as for
+    get_activity_streams). Returns {} when the activity has no streams.
+    """
+    path = _stream_path(streams_dir(athlete), activity_id)
+    if not path.exists() and get_activity_streams(activity_id, athlete, start) is None:
+        return {}
+
+    key = str(activity_id)
+    fingerprint = stream_fingerprint(path)
+    results = {name: _load_results(name, athlete) for name in names}
+    stale = tuple(
+        name
+        for name, result in results.items()
+        if result["fingerprints"].get(key) != fingerprint
+    )
+
+    values = {name: result["values"].get(key) for name, result in results.items()}
+    if stale:
+        computed = _compute_activity((str(path), stale)) or {}
+        for name in stale:
+            values[name] = computed.get(name)
+            _save_results(name, athlete, {key: (fingerprint, values[name])})
+
+    return values
+
+
+@tracing.traced()
+def compute_metrics(
+    athlete: str | None = None,
+    names: Iterable[str] | None = None,
+    workers: int | None = None,
+    force: bool = False,
+    progress: Callable[[dict[str, int]], None] | None = None,
+) -> dict[str, int]:
+    """
+    Bring the stored metrics up to date with the stream store. Activities
+    whose streams haven't changed since they were last computed are skipped
+    unless `force`, and a metric whose version has changed is recomputed for
+    every activity. `workers` is the process pool size (default every core,
+    0 computes in this process, as do runs of fewer than POOL_MIN_TASKS
+    activities). Returns counts of what was computed.
+    """
+    names = tuple(names or METRICS)
+    unknown = set(names) - METRICS.keys()
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+    paths = stored_tracks(streams_dir(athlete))
+    results = {name: _load_results(name, athlete) for name in names}
+    counts = {"activities": len(paths), "computed": 0, "unchanged": 0, "failed": 0}
+
+    # forget activities whose streams are no longer stored
+    removed = {
+        name: result["fingerprints"].keys() - {str(i) for i in paths}
+        for name, result in results.items()
+    }
+    # metric -> activity id -> (fingerprint, value) computed since the last save
+    updates: dict[str, dict[str, tuple[str, Any]]] = {name: {} for name in names}
+
+    # (activity id, fingerprint) and the worker's task for each activity with
+    # at least one metric out of date
+    pending: list[tuple[int, str]] = []
+    tasks: list[tuple[str, tuple[str, ...]]] = []
+    for activity_id, path in paths.items():
+        key = str(activity_id)
+        fingerprint = stream_fingerprint(path)
+        stale = tuple(
+            name
+            for name in names
+            if force or results[name]["fingerprints"].get(key) != fingerprint
+        )
+        if stale:
+            pending.append((activity_id, fingerprint))
+            tasks.append((str(path), stale))
+        else:
+            counts["unchanged"] += 1
+
+    def save() -> None:
+        for name in names:
+            if updates[name] or removed[name]:
+                _save_results(name, athlete, updates[name], removed[name])
+                updates[name], removed[name] = {}, set()
+
+    if not tasks:
+        save()
+        return counts
+
+    executor = None
+    if workers == 0 or len(tasks) < POOL_MIN_TASKS:
+        compute: Callable = partial(map, _compute_activity)
+    else:
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        # spawned rather than forked, as the app computes from a worker thread
+        executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        # a few chunks per worker keeps them all busy without a round trip
+        # per activity
+        compute = partial(
+            executor.map,
+            _compute_activity,
+            chunksize=max(1, min(64, len(tasks) // (workers * 4))),
+        )
+
+    try:
+        with tracing.span("compute metrics", activities=len(tasks)):
+            for done, ((activity_id, fingerprint), (_, stale), values) in enumerate(
+                zip(pending, tasks, compute(tasks)), 1
+            ):
+                key = str(activity_id)
+                counts["computed" if values is not None else "failed"] += 1
+                for name in stale:
+                    updates[name][key] = (fingerprint, (values or {}).get(name))
+
+                if done % SAVE_EVERY == 0:
+                    save()
+                    if progress is not None:
+                        progress(counts)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        save()
+
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compute per-activity metrics from the stream store"
+    )
+    parser.add_argument(
+        "--athlete", help="athlete namespace to compute for (default: strava_token)"
+    )
+    parser.add_argument(
+        "--metric",
+        action="append",
+        choices=sorted(METRICS),
+        help="metric to compute, may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="processes (default: every core, 0 for none)"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="recompute even unchanged activities"
+    )
+    args = parser.parse_args(argv)
+
+    def report(counts: dict[str, int]) -> None:
+        print(
+            f"\r{counts['computed']} computed, {counts['unchanged']} unchanged",
+            end="",
+            flush=True,
+        )
+
+    start = time.perf_counter()
+    counts = compute_metrics(
+        args.athlete, args.metric, args.workers, args.force, progress=report
+    )
+    print(
+        f"\ncomputed {counts['computed']} of {counts['activities']} activities in "
+        f"{time.perf_counter() - start:.1f}s ({counts['unchanged']} unchanged, "
+        f"{counts['failed']} unreadable)"
+    )
+
+
+if __name__ == "__main__":
+    main()
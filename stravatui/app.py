@@ -1,11 +1,16 @@
-from pathlib import Path
+import asyncio
+from datetime import date, datetime
+from functools import partial
+from typing import Any
 
 from rich.text import Text
 from textual.app import App, ComposeResult
 from textual.binding import Binding
-from textual.containers import Center, Container, Horizontal, Vertical
+from textual.containers import Center, Container, Horizontal
+from textual.timer import Timer
 from textual.widgets import (
     Button,
+    Collapsible,
     ContentSwitcher,
     DataTable,
     Footer,
@@ -14,35 +19,55 @@ from textual.widgets import (
     LoadingIndicator,
     Select,
 )
-from textual_plotext import PlotextPlot
+from textual.worker import get_current_worker
 
+from . import memory_profile, startup, tracing
 from .config import darktheme, lighttheme
-from .data_manager import (
-    _check_cache_modified_date,
-    aggregate_best_efforts,
-    all_time_run_stats,
-    get_best_efforts,
-    get_last_five_activities,
-    get_recent_activities,
-    ytd_run_stats,
+from .activity_utils import VALID_RUN_TYPES
+from .daily_bins import update_daily_bins
+from .data_manager import get_recent_activities, load_all_data
+from .race_calculator import (
+    _format_race_time,
+    get_race_predictions_formatted,
+    predict_from_efforts,
+)
+from .search import SearchIndex, parse_query, search
+from .stall_watchdog import StallWatchdog
+from .store import ActivityStore, sync_history
+from .training_load import update_training_load
+from .ui.history_table import HistoryTable
+from .ui.pages import PAGES
+from .ui.stall_overlay import StallOverlay
+from .ui.plot_setup import (
+    setup_best_efforts_plot,
+    setup_calendar_heatmap,
+    setup_comparison_plots,
+    setup_overview_plots,
+    setup_progression_plot,
+    setup_recent_plots,
+    setup_training_load_plot,
+    setup_zones_plot,
 )
-from .race_calculator import get_race_predictions_formatted
-from .ui.plot_setup import setup_plots
 from .ui.tables import (
+    format_split_rows,
     populate_activities_table,
     populate_best_efforts_table,
     populate_comparison_table,
+    populate_splits_table,
+    populate_zones_table,
 )
-from .ui.text_labels import (
-    about_page_bottom_text,
-    about_page_text,
-    best_efforts_label,
-    create_overview_label,
-    last_five_label,
-)
+from .ui.trace_waterfall import TraceWaterfall
+from .ui.view_models import build_search_overview, build_view_models
 
-PACKAGE_DIR = Path(__file__).parent
-DATA_DIR = PACKAGE_DIR / "data"
+# pages built in the background once the overview is showing, most likely first
+PREFETCH_PAGES = ("last-five-page",)
+PREFETCH_DELAY = 0.5
+# wait for a pause in typing before searching
+SEARCH_DEBOUNCE = 0.2
+# seconds between background checks for new activities
+REFRESH_INTERVAL = 15 * 60
+# splits shown when a last five row is selected, by table unit
+SPLIT_METRICS = {"km": "splits_km", "mile": "splits_mile"}
 
 
 class StravaTUIApp(App[None]):
@@ -53,15 +78,52 @@ class StravaTUIApp(App[None]):
         Binding("2", "show_page('last-five-page')", "data tables", show=True),
         Binding("3", "show_page('plot-page')", "calculator", show=True),
         Binding("4", "show_page('about-page')", "about", show=True),
+        Binding("5", "show_page('history-page')", "history", show=True),
+        Binding("6", "show_page('zones-page')", "zones", show=True),
+        Binding("g", "toggle_grade_adjusted", "GAP", show=True),
+        Binding("left_square_bracket", "calendar_year(-1)", "prev year", show=False),
+        Binding("right_square_bracket", "calendar_year(1)", "next year", show=False),
+        Binding("t", "toggle_calendar_metric", "distance/time", show=False),
+        Binding("ctrl+t", "show_page('trace-page')", "trace", show=False),
+        Binding("ctrl+g", "show_page('debug-page')", "metrics", show=False),
         Binding("q", "quit", "quit", show=True),
     ]
 
-    def __init__(self, theme_name: str = "darktheme", **kwargs):
+    def __init__(
+        self,
+        theme_name: str = "darktheme",
+        athlete: str | None = None,
+        stall_watchdog: StallWatchdog | None = None,
+        **kwargs,
+    ):
         super().__init__(**kwargs)
+        self._stall_watchdog = stall_watchdog
         self._theme_name = theme_name
+        self._athlete = athlete
+        self._view_models: dict[str, Any] | None = None
+        # pages that have been mounted / filled with data so far
+        self._built_pages: set[str] = set()
+        self._populated_pages: set[str] = set()
+        self._build_lock = asyncio.Lock()
+        self._history_store: ActivityStore | None = None
+        self._search_index: SearchIndex | None = None
+        self._search_timer: Timer | None = None
+        # overview plot data for the current search, None when not searching
+        self._search_overview: dict[str, list] | None = None
+        # whether the overview plots grade-adjusted pace instead of actual pace
+        self._grade_adjusted = False
+        # activity whose splits are showing (or loading) in the detail view
+        self._splits_activity: str | None = None
+        # year and daily value ("distance" or "time") the calendar shows
+        self._calendar_year = date.today().year
+        self._calendar_metric = "distance"
 
     def compose(self) -> ComposeResult:
-        """Compose the app layout."""
+        """
+        Compose the app layout. No page is composed up front, the overview is
+        built once the data has loaded and the others the first time they're
+        shown (see _show_page), so the loading screen paints straight away.
+        """
         with Center(id="loading-container"):
             yield LoadingIndicator(id="loading")
 
@@ -69,73 +131,12 @@ class StravaTUIApp(App[None]):
             with Center(), Horizontal(id="buttons"):
                 yield Button("overview", id="overview-button", flat=True)
                 yield Button("recent", id="last-five-button", flat=True)
+                yield Button("history", id="history-button", flat=True)
                 yield Button("calculator", id="plot-button", flat=True)
+                yield Button("zones", id="zones-button", flat=True)
                 yield Button("about", id="about-button", flat=True)
 
-            with ContentSwitcher(initial="overview-page", id="content-switcher"):
-                with Container(id="overview-page"):
-                    with Vertical(id="overview-left"):
-                        # label with distance comparison text get's added in once API calls made in worker thread
-                        yield Label("", id="overview-label")
-                        with Center():
-                            yield DataTable(id="table-2")
-                        yield PlotextPlot(id="plot-3")
-                    with Vertical(id="overview-right"):
-                        yield PlotextPlot(id="plot-4")
-
-                with (
-                    Container(id="last-five-page"),
-                    Horizontal(id="last-five-horizontal"),
-                ):
-                    with Vertical(id="last-five-left"):
-                        yield Label(last_five_label, id="table-1-label")
-                        with Center():
-                            yield DataTable(id="table-1", cell_padding=3)
-                        yield PlotextPlot(id="last-five-subplot")
-                    with Vertical(id="last-five-right"):
-                        yield Label(
-                            best_efforts_label,
-                            id="efforts-plot-label",
-                        )
-                        with Center(id="label-with-efforts-table"):
-                            yield DataTable(id="best-efforts-table", cell_padding=1)
-                        yield PlotextPlot(id="effort-plot")
-                        yield PlotextPlot(id="progression-plot")
-
-                with Container(id="plot-page"), Vertical(id="calculator-container"):
-                    yield Label(
-                        "Race Time Calculator (Riegel's Formula)",
-                        id="calculator-title",
-                    )
-                    yield Label("Enter a recent race result:", id="calculator-subtitle")
-
-                    with Horizontal(id="calculator-inputs"):
-                        yield Select(
-                            [
-                                ("5K", "5k"),
-                                ("10K", "10k"),
-                                ("Half Marathon", "half"),
-                                ("Marathon", "marathon"),
-                            ],
-                            prompt="select distance",
-                            id="race-distance-select",
-                        )
-                        yield Input(
-                            placeholder="MM:SS or HH:MM:SS",
-                            id="race-time-input",
-                        )
-                        yield Button(
-                            "calculate",
-                            id="calculate-button",
-                            variant="primary",
-                        )
-
-                    with Center(classes="race-results-container"):
-                        yield DataTable(id="race-results-table", cell_padding=10)
-
-                with Container(id="about-page"):
-                    yield Label(about_page_text, id="about-label")
-                    yield Label(about_page_bottom_text, id="about-label-bottom")
+            yield ContentSwitcher(id="content-switcher")
 
             yield Footer(show_command_palette=False)
 
@@ -144,32 +145,197 @@ class StravaTUIApp(App[None]):
         self.register_theme(lighttheme)
 
         self.theme = self._theme_name
+        self.call_after_refresh(startup.mark, "first paint")
+
+        if self._stall_watchdog is not None:
+            self._stall_watchdog.start()
+            self.screen.mount(StallOverlay(self._stall_watchdog, id="stall-overlay"))
 
         self.run_worker(self._load_data, exclusive=True, thread=True)
 
-        # hide results table on mount
-        self.query_one("#race-results-table", DataTable).display = False
+    def on_unmount(self) -> None:
+        if self._stall_watchdog is not None:
+            self._stall_watchdog.stop()
 
-    def on_button_pressed(self, event: Button.Pressed) -> None:
+    async def on_button_pressed(self, event: Button.Pressed) -> None:
         """Mapp button presses to corresponding pages."""
         BUTTON_MAP = {
             "overview-button": "overview-page",
             "last-five-button": "last-five-page",
+            "history-button": "history-page",
             "plot-button": "plot-page",
+            "zones-button": "zones-page",
             "about-button": "about-page",
         }
         button_id = event.button.id
 
         if button_id == "calculate-button":
             self._calculate_race_times()
+        elif button_id == "race-from-runs-button":
+            self._fill_race_time_from_runs()
         elif button_id in BUTTON_MAP:
-            self.query_one(ContentSwitcher).current = BUTTON_MAP[button_id]
+            await self._show_page(BUTTON_MAP[button_id])
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Search the history once typing in the search box pauses."""
+        if event.input.id != "history-search":
+            return
+
+        if self._search_timer is not None:
+            self._search_timer.stop()
+        self._search_timer = self.set_timer(SEARCH_DEBOUNCE, self._start_search)
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if event.input.id == "history-search":
+            self.query_one(HistoryTable).focus()
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        """Show a last five run's splits, or hide them if it's selected again."""
+        if event.data_table.id != "table-1" or self._view_models is None:
+            return
+
+        detail = self.query_one("#splits-detail", Collapsible)
+        activity_id = event.row_key.value
+        if activity_id == self._splits_activity and not detail.collapsed:
+            detail.collapsed = True
+            return
+
+        ref = self._activity_ref(activity_id)
+        if ref is None:
+            # rows from a cache written before ids were kept
+            self.notify("Splits will be available after the next refresh")
+            return
+
+        self._splits_activity = activity_id
+        detail.title = f"splits: {ref['name']} (loading...)"
+        detail.collapsed = False
+
+        start = 0.0
+        if ref["start"]:
+            start = datetime.fromisoformat(ref["start"]).timestamp()
+        self.run_worker(
+            partial(self._load_splits, activity_id, start),
+            thread=True,
+            exclusive=True,
+            group="splits",
+        )
+
+    def _activity_ref(self, activity_id: str) -> dict[str, str] | None:
+        refs = self._view_models["activity_refs"] if self._view_models else []
+        return next((ref for ref in refs if ref["id"] == activity_id), None)
+
+    def _load_splits(self, activity_id: str, start: float) -> None:
+        """Get an activity's stored splits, or work them out, in background thread."""
+        # the metrics engine brings in multiprocessing, so import it when needed
+        from .analytics import activity_metrics
+
+        try:
+            splits = activity_metrics(
+                int(activity_id), SPLIT_METRICS.values(), self._athlete, start
+            )
+        except Exception as e:
+            self.call_from_thread(
+                self.notify, f"Couldn't load splits: {e}", severity="warning"
+            )
+            splits = {}
+
+        rows = {
+            unit: format_split_rows(splits.get(name), unit)
+            for unit, name in SPLIT_METRICS.items()
+        }
+        self.call_from_thread(self._show_splits, activity_id, rows)
+
+    def _show_splits(
+        self, activity_id: str, rows: dict[str, list[tuple[str, ...]]]
+    ) -> None:
+        """Fill the splits detail view (must run on main thread)."""
+        # another row has been selected since these were asked for
+        if activity_id != self._splits_activity:
+            return
+
+        ref = self._activity_ref(activity_id) or {"name": ""}
+        detail = self.query_one("#splits-detail", Collapsible)
+        detail.title = f"splits: {ref['name']}"
+        if not rows["km"]:
+            detail.title += " (no streams recorded)"
+
+        for unit, split_rows in rows.items():
+            table = self.query_one(f"#splits-{unit}-table", DataTable)
+            populate_splits_table(table, unit, split_rows)
+
+    def action_toggle_grade_adjusted(self) -> None:
+        """Switch the overview pace plots between actual and grade-adjusted pace."""
+        self._grade_adjusted = not self._grade_adjusted
+        if self._view_models is None:
+            return
 
-    def action_show_page(self, page: str) -> None:
+        overview_data = self._overview_data(self._view_models)
+        if self._grade_adjusted:
+            factors = overview_data.get("grade_factors", [])
+            count = sum(1 for factor in factors if factor)
+            self.notify(
+                f"Grade-adjusted pace for {count} of "
+                f"{len(overview_data['pace_mins'])} runs, the rest have no streams"
+            )
+        if "overview-page" in self._populated_pages:
+            setup_overview_plots(self, overview_data, self._grade_adjusted)
+
+    def action_calendar_year(self, step: int) -> None:
+        """Step the calendar through the years with runs, up to this one."""
+        if self._view_models is None:
+            return
+
+        years = [int(year) for year in self._view_models["calendar_data"]]
+        first = min(years, default=date.today().year)
+        self._calendar_year = max(
+            first, min(date.today().year, self._calendar_year + step)
+        )
+        self._show_calendar()
+
+    def action_toggle_calendar_metric(self) -> None:
+        self._calendar_metric = (
+            "time" if self._calendar_metric == "distance" else "distance"
+        )
+        self._show_calendar()
+
+    def _show_calendar(self) -> None:
+        if "overview-page" in self._populated_pages and self._view_models is not None:
+            setup_calendar_heatmap(
+                self,
+                self._view_models["calendar_data"],
+                self._calendar_year,
+                self._calendar_metric,
+            )
+
+    async def action_show_page(self, page: str) -> None:
         """Show the selected page and hide others."""
-        pages = ["overview-page", "last-five-page", "plot-page", "about-page"]
-        for p in pages:
-            self.query_one(f"#{p}").display = p == page
+        await self._show_page(page)
+
+    async def _build_page(self, page: str) -> None:
+        """Mount a page (hidden) the first time it's needed and fill it with data."""
+        # a page switch and the prefetch can ask for the same page at once, so
+        # only one mounts it and the other waits for that to finish
+        async with self._build_lock:
+            if page not in self._built_pages:
+                switcher = self.query_one(ContentSwitcher)
+                await switcher.add_content(PAGES[page](id=page))
+                self._built_pages.add(page)
+
+                if page == "history-page" and self._history_store is not None:
+                    self.query_one(HistoryTable).set_store(self._history_store)
+
+        self._populate_page(page)
+
+    async def _show_page(self, page: str) -> None:
+        await self._build_page(page)
+        if page == "trace-page":
+            self._show_trace()
+        self.query_one(ContentSwitcher).current = page
+
+    async def _prefetch_pages(self) -> None:
+        """Build the likely next pages while the app is otherwise idle."""
+        for page in PREFETCH_PAGES:
+            await self._build_page(page)
 
     def _calculate_race_times(self) -> None:
         """Calculate predicted race times using Riegel's formula."""
@@ -210,56 +376,318 @@ class StravaTUIApp(App[None]):
                 Text(formatted_time, justify="center"),
             )
 
-    def _load_data(self) -> None:
-        """Load and populate all data in background thread."""
-        _check_cache_modified_date()
-        recent_data = get_recent_activities()
-        all_time_data = all_time_run_stats()
-        ytd_run_data = ytd_run_stats()
-        best_efforts_data = get_best_efforts()
-        best_efforts_summary = aggregate_best_efforts(best_efforts_data)
-
-        self.call_from_thread(
-            self._populate_ui,
+    def _fill_race_time_from_runs(self) -> None:
+        """Fill the calculator with the best grade-adjusted recent prediction."""
+        distance_select = self.query_one("#race-distance-select", Select)
+        if distance_select.value == Select.BLANK:
+            self.notify("Select a distance to predict")
+            return
+
+        efforts = self._view_models["race_efforts"] if self._view_models else []
+        predicted = predict_from_efforts(efforts, str(distance_select.value))
+        if predicted is None:
+            self.notify("No recent runs with streams to predict from yet")
+            return
+
+        self.query_one("#race-time-input", Input).value = _format_race_time(predicted)
+        self._calculate_race_times()
+
+    def _build_view_models(self, refresh: bool = False) -> dict[str, Any]:
+        recent_data, all_time_data, ytd_run_data, best_efforts_summary = (
+            load_all_data(self._athlete, refresh=refresh)
+        )
+        memory_profile.checkpoint(
+            "load all data",
+            {
+                "recent activities": recent_data,
+                "all-time stats": all_time_data,
+                "year-to-date runs": ytd_run_data,
+                "best efforts": best_efforts_summary,
+            },
+        )
+
+        view_models = build_view_models(
             recent_data,
             all_time_data,
             ytd_run_data,
             best_efforts_summary,
+            self._athlete,
         )
-
-    def _populate_ui(
-        self,
-        recent_data: dict[str, list[str]],
-        all_time_data: dict[str, str],
-        ytd_run_data: dict[str, str],
-        aggregate_best_efforts: list[dict],
-    ) -> None:
-        """Populate all UI elements (must run on main thread)."""
-
-        # update distance comparison label
-        ytd_distance_km = float(ytd_run_data["ytd_distance"]) / 1000
-        overview_label_widget = self.query_one("#overview-label", Label)
-        overview_label_widget.update(
-            create_overview_label(ytd_distance_km, recent_data)
+        memory_profile.checkpoint(
+            "build view models",
+            {f"view model {name}": value for name, value in view_models.items()},
         )
+        return view_models
+
+    def _sync_history(self, label: str = "history sync") -> ActivityStore:
+        memory_profile.checkpoint(f"before {label}")
+        try:
+            store = sync_history(self._athlete)
+        except Exception as e:
+            self.call_from_thread(
+                self.notify, f"Activity history sync failed: {e}", severity="warning"
+            )
+            store = ActivityStore(self._athlete)
 
-        populate_activities_table(
-            self, get_last_five_activities(get_recent_activities())
+        memory_profile.checkpoint(
+            label,
+            {"history store columns": store.columns, "history indexes": store.indexes},
         )
-        setup_plots(
-            self,
-            recent_data,
-            ytd_run_data,
-            all_time_data,
-            aggregate_best_efforts,
+        return store
+
+    def _build_search_index(self, store: ActivityStore) -> SearchIndex:
+        index = SearchIndex(store)
+        memory_profile.checkpoint(
+            "search index",
+            {"search trigrams": index.trigrams, "search types": index.types},
         )
+        return index
 
-        populate_comparison_table(self, all_time_data, ytd_run_data, recent_data)
+    def _load_data(self) -> None:
+        """Load data and build view models in background thread."""
+        with tracing.span("load", kind="startup"):
+            self.call_from_thread(self._populate_ui, self._build_view_models())
+
+            # the full history is only needed by the history page and search, so
+            # sync it after everything else is showing
+            store = self._sync_history()
+            index = self._build_search_index(store)
+            self.call_from_thread(self._set_history_store, store, index)
+
+            self._update_derived_data(store)
+
+    def _update_derived_data(self, store: ActivityStore) -> None:
+        """
+        Bring the daily bins, the stored per-activity metrics and the training
+        load up to date with a synced history in background thread, then
+        refresh the view models built from them (calendar, grade-adjusted
+        pace, heart rate zones, training load) if anything changed.
+        """
+        changed = self._update_stream_metrics()
+        try:
+            changed = update_daily_bins(store, self._athlete) or changed
+            # after the metrics, so runs just given streams load by heart rate
+            changed = update_training_load(store, self._athlete) or changed
+        except Exception as e:
+            self.call_from_thread(
+                self.notify,
+                f"Calendar or training load update failed: {e}",
+                severity="warning",
+            )
 
-        populate_best_efforts_table(
-            self,
-            aggregate_best_efforts,
+        if changed:
+            self.call_from_thread(self._refresh_ui, self._build_view_models())
+
+    def _update_stream_metrics(self) -> bool:
+        """
+        Fetch streams for recent runs that don't have them yet and bring the
+        stored per-activity metrics up to date. Returns whether anything new
+        was computed.
+        """
+        # the metrics engine brings in multiprocessing, so import it when needed
+        from .analytics import compute_metrics, fetch_streams
+
+        recent_data = get_recent_activities(self._athlete)
+        runs = [
+            (int(activity_id), datetime.fromisoformat(start).timestamp())
+            for activity_id, start, activity_type in zip(
+                recent_data.get("ids", []),
+                recent_data.get("start_dates", []),
+                recent_data["activity_type"],
+            )
+            if activity_id and start and activity_type in VALID_RUN_TYPES
+        ]
+
+        with tracing.span("stream metrics"):
+            try:
+                fetch_streams(runs, self._athlete)
+                counts = compute_metrics(self._athlete)
+            except Exception as e:
+                self.call_from_thread(
+                    self.notify,
+                    f"Stream metrics update failed: {e}",
+                    severity="warning",
+                )
+                return False
+
+        return bool(counts["computed"])
+
+    def _refresh_data(self) -> None:
+        """
+        Check for new activities in background thread. The history sync only
+        asks Strava for activities newer than the latest stored, so when there
+        are none this costs one API call and leaves the UI alone.
+        """
+        known = len(self._history_store) if self._history_store is not None else 0
+
+        with tracing.span("load", kind="refresh") as span:
+            store = self._sync_history("refresh history sync")
+            span.set(new=len(store) - known)
+            if len(store) == known:
+                return
+
+            # the cached stats and recent activities are out of date too, fetch
+            # them again but keep showing the old ones if that fails
+            try:
+                view_models = self._build_view_models(refresh=True)
+            except Exception as e:
+                self.call_from_thread(
+                    self.notify, f"Data refresh failed: {e}", severity="warning"
+                )
+            else:
+                self.call_from_thread(self._refresh_ui, view_models)
+
+            index = self._build_search_index(store)
+            self.call_from_thread(self._set_history_store, store, index)
+
+            self._update_derived_data(store)
+
+    def _start_refresh(self) -> None:
+        self.run_worker(
+            self._refresh_data, thread=True, exclusive=True, group="refresh"
         )
 
+    async def _populate_ui(self, view_models: dict[str, Any]) -> None:
+        """
+        Build the overview and fill the pages built so far with prepared view
+        models (must run on main thread). Pages built later are filled as
+        they're mounted.
+        """
+        self._view_models = view_models
+
+        await self._build_page("overview-page")
+        for page in list(self._built_pages):
+            self._populate_page(page)
+
+        switcher = self.query_one(ContentSwitcher)
+        if switcher.current is None:
+            switcher.current = "overview-page"
+
         self.query_one("#loading-container").display = False
         self.query_one("#main-content").display = True
+
+        self.set_timer(PREFETCH_DELAY, self._prefetch_pages)
+        self.set_interval(REFRESH_INTERVAL, self._start_refresh)
+        startup.mark("data loaded")
+
+    def _refresh_ui(self, view_models: dict[str, Any]) -> None:
+        """
+        Update every populated page with refreshed view models in place (must
+        run on main thread). Tables and plots only redraw what changed.
+        """
+        self._view_models = view_models
+
+        refreshed = self._populated_pages.copy()
+        self._populated_pages.clear()
+        for page in refreshed:
+            self._populate_page(page)
+
+    def _set_history_store(self, store: ActivityStore, index: SearchIndex) -> None:
+        """Hand the synced history store to the history table (main thread)."""
+        self._history_store = store
+        self._search_index = index
+
+        # the page may still be mounting, in which case _build_page hands it over
+        for table in self.query(HistoryTable):
+            table.set_store(store)
+
+        # rerun any search typed while the history was syncing
+        self._start_search()
+
+    def _start_search(self) -> None:
+        search_inputs = self.query("#history-search").results(Input)
+        search_input = next(search_inputs, None)
+        if self._search_index is None or search_input is None:
+            return
+
+        self.run_worker(
+            partial(self._run_search, self._search_index, search_input.value),
+            thread=True,
+            exclusive=True,
+            group="search",
+        )
+
+    def _run_search(self, index: SearchIndex, text: str) -> None:
+        """Search the history and prepare overview plot data in background thread."""
+        matches = search(index, parse_query(text))
+        overview_data = (
+            build_search_overview(index.store, matches) if matches is not None else None
+        )
+
+        # a newer search has started, so these results are already stale
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self._show_search_results, matches, overview_data)
+
+    def _show_search_results(
+        self, matches: list[int] | None, overview_data: dict[str, list] | None
+    ) -> None:
+        """Show search results in the history table and overview plots."""
+        self._search_overview = overview_data
+
+        for table in self.query(HistoryTable):
+            table.set_matches(matches)
+
+        if "overview-page" in self._populated_pages and self._view_models is not None:
+            setup_overview_plots(
+                self, self._overview_data(self._view_models), self._grade_adjusted
+            )
+
+    def _show_trace(self) -> None:
+        """Show the last load's waterfall on the (hidden) trace page."""
+        waterfall = self.query_one(TraceWaterfall)
+        if not tracing.is_enabled():
+            waterfall.update("tracing is off, run with --trace FILE to record loads")
+        else:
+            waterfall.show(tracing.last_trace("load"))
+
+    def _overview_data(self, view_models: dict[str, Any]) -> dict[str, list]:
+        """Overview plot data for the current search, or the recent activities."""
+        if self._search_overview is not None:
+            return self._search_overview
+        return view_models["overview_data"]
+
+    def _populate_page(self, page: str) -> None:
+        """Hand view models to a page's widgets, once per page."""
+        if self._view_models is None or page in self._populated_pages:
+            return
+
+        self._populated_pages.add(page)
+        view_models = self._view_models
+
+        with tracing.span("populate page", page=page):
+            if page == "overview-page":
+                # update distance comparison label
+                self.query_one("#overview-label", Label).update(
+                    view_models["overview_label"]
+                )
+                populate_comparison_table(self, view_models["comparison_rows"])
+                setup_overview_plots(
+                    self, self._overview_data(view_models), self._grade_adjusted
+                )
+                setup_comparison_plots(self, view_models["comparison_data"])
+                setup_calendar_heatmap(
+                    self,
+                    view_models["calendar_data"],
+                    self._calendar_year,
+                    self._calendar_metric,
+                )
+                setup_training_load_plot(self, view_models["training_load_data"])
+
+            elif page == "last-five-page":
+                populate_activities_table(
+                    self,
+                    view_models["activity_rows"],
+                    [ref["id"] for ref in view_models["activity_refs"]],
+                )
+                populate_best_efforts_table(self, view_models["best_effort_rows"])
+                setup_recent_plots(self, view_models["overview_data"])
+                setup_best_efforts_plot(self, view_models["effort_data"])
+                setup_progression_plot(self, view_models["effort_data"])
+
+            elif page == "zones-page":
+                setup_zones_plot(self, view_models["zone_data"])
+                populate_zones_table(
+                    self, view_models["zone_data"]["zones"], view_models["zone_rows"]
+                )
+
+        memory_profile.checkpoint(f"populate {page}")
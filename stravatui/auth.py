@@ -1,19 +1,182 @@
 import json
 import os
+import re
+import threading
 import time
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import requests
 from dotenv import load_dotenv
-from stravalib.client import Client
+
+from . import metrics, tracing
+
+# requests and stravalib are slow to import, so they're only imported on first
+# use rather than when the app starts
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from stravalib.client import Client
+    from urllib3.util.retry import Retry
+
+STRAVA_URL = "https://www.strava.com"
+TOKEN_FILE = Path("strava_token.json")
+TOKEN_DIR = Path("tokens")
+ATHLETE_NAME_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+# times a read is tried again after a connection or server error
+API_RETRIES = 3
+
+# one lock per athlete namespace so concurrent syncs don't race on refreshing
+# and rewriting the same token file
+_token_locks: dict[str | None, threading.Lock] = {}
+_token_locks_guard = threading.Lock()
+
+# requests sessions registered per athlete, used by the team sync to route every
+# API call through a shared rate-limit budget
+_athlete_sessions: dict[str | None, "requests.Session"] = {}
+
+
+def validate_athlete(athlete: str) -> str:
+    """Return the athlete name if it's safe to use as a file name."""
+    if not ATHLETE_NAME_RE.match(athlete):
+        raise ValueError(f"Invalid athlete name: {athlete!r}")
+    return athlete
+
+
+def token_path(athlete: str | None = None) -> Path:
+    """
+    Return the token file for an athlete. The default (unnamed) athlete keeps
+    using strava_token.json so single-user setups are unchanged.
+    """
+    if athlete is None:
+        return TOKEN_FILE
+    return TOKEN_DIR / f"{validate_athlete(athlete)}.json"
+
+
+def list_athletes() -> list[str]:
+    """Return the names of all athletes with a stored token."""
+    if not TOKEN_DIR.exists():
+        return []
+    return sorted(path.stem for path in TOKEN_DIR.glob("*.json"))
+
+
+def save_token(user_data: dict, athlete: str | None = None) -> None:
+    """Write token data to an athlete's token file."""
+    path = token_path(athlete)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "w") as f:
+        json.dump(user_data, f, indent=2)
+
+
+def set_athlete_session(
+    athlete: str | None, session: "requests.Session | None"
+) -> None:
+    """Register (or with None, remove) the requests session used for an athlete."""
+    if session is None:
+        _athlete_sessions.pop(athlete, None)
+    else:
+        _athlete_sessions[athlete] = session
+
+
+@cache
+def _base_url_adapter_class() -> type["HTTPAdapter"]:
+    from requests.adapters import HTTPAdapter
+
+    class _BaseURLAdapter(HTTPAdapter):
+        """Send requests meant for www.strava.com to another base URL instead."""
+
+        def __init__(self, base_url: str, max_retries: "Retry | int" = 0):
+            super().__init__(max_retries=max_retries)
+            self.base_url = base_url.rstrip("/")
+
+        def send(self, request, **kwargs):
+            request.url = self.base_url + request.url[len(STRAVA_URL) :]
+            return super().send(request, **kwargs)
+
+    return _BaseURLAdapter
+
+
+@cache
+def _retry_policy() -> "Retry":
+    from urllib3.util.retry import Retry
+
+    # 429s aren't retried, another request would only use up more of the
+    # rate limit, and neither are token refreshes (POSTs)
+    return Retry(
+        total=API_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+
+
+def _record_response(response: "requests.Response", *args, **kwargs) -> None:
+    """Response hook recording each Strava call in the metrics and trace."""
+    path = response.request.path_url
+    seconds = response.elapsed.total_seconds()
+    size = len(response.content)
+    # the retry policy mounted by _strava_session, with one entry per retry
+    retries = getattr(response.raw, "retries", None)
+
+    metrics.record_api_response(
+        path,
+        response.status_code,
+        seconds,
+        size,
+        retries=len(retries.history) if retries is not None else 0,
+        headers=response.headers,
+    )
+
+    if tracing.is_enabled():
+        end = tracing.now()
+        tracing.record(
+            f"http {response.request.method} {path.partition('?')[0]}",
+            end - seconds,
+            end,
+            status=response.status_code,
+            bytes=size,
+        )
+
+
+def _strava_session(session: "requests.Session | None" = None) -> "requests.Session":
+    """
+    Return a session for talking to Strava, retrying reads that fail with a
+    connection or server error. If STRAVA_BASE_URL is set (e.g. to a local
+    stand-in server) requests are routed there instead.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = session or requests.Session()
+    base_url = os.getenv("STRAVA_BASE_URL")
+
+    # retries happen inside the adapter, so a BudgetedSession only charges the
+    # first try and picks up the rest from Strava's rate-limit headers
+    if base_url:
+        session.mount(STRAVA_URL, _base_url_adapter_class()(base_url, _retry_policy()))
+    else:
+        session.mount(STRAVA_URL, HTTPAdapter(max_retries=_retry_policy()))
+
+    # sessions can be passed in more than once (see team_sync), so only hook once
+    if _record_response not in session.hooks["response"]:
+        session.hooks["response"].append(_record_response)
+
+    return session
+
+
+def _token_lock(athlete: str | None) -> threading.Lock:
+    with _token_locks_guard:
+        return _token_locks.setdefault(athlete, threading.Lock())
 
 
 def _refresh_access_token(refresh_token: str) -> dict:
     """Check and refresh access_token if it's expired."""
     load_dotenv()
 
-    response = requests.post(
-        "https://www.strava.com/oauth/token",
+    response = _strava_session().post(
+        f"{STRAVA_URL}/oauth/token",
         data={
             "client_id": os.getenv("STRAVA_CLIENT_ID"),
             "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
@@ -31,28 +194,31 @@ def _refresh_access_token(refresh_token: str) -> dict:
     return response.json()
 
 
-def _initialise_strava_client() -> Client:
-    """Initialise a Strava client with the user's access token."""
-    token_file = Path("strava_token.json")
+@tracing.traced()
+def _initialise_strava_client(athlete: str | None = None) -> "Client":
+    """Initialise a Strava client with the athlete's access token."""
+    from stravalib.client import Client
 
-    if not token_file.exists():
-        raise FileNotFoundError(
-            "No token file found. Please run the authorisation script."
-        )
+    token_file = token_path(athlete)
 
-    with open(token_file) as f:
-        user_data = json.load(f)
+    with _token_lock(athlete):
+        if not token_file.exists():
+            raise FileNotFoundError(
+                f"No token file found at {token_file}. "
+                "Please run the authorisation script."
+            )
 
-    current_time = time.time()
-    expires_at = user_data.get("expires_at", 0)
+        with open(token_file) as f:
+            user_data = json.load(f)
 
-    if current_time > (expires_at - 60):
-        user_data = _refresh_access_token(user_data["refresh_token"])
+        current_time = time.time()
+        expires_at = user_data.get("expires_at", 0)
 
-        with open(token_file, "w") as f:
-            json.dump(user_data, f, indent=2)
+        if current_time > (expires_at - 60):
+            user_data = _refresh_access_token(user_data["refresh_token"])
+            save_token(user_data, athlete)
 
-    client = Client()
+    client = Client(requests_session=_strava_session(_athlete_sessions.get(athlete)))
     client.access_token = user_data.get("access_token")
 
     return client
@@ -0,0 +1,348 @@
+# Streaming importer for Strava bulk-export archives: reads activities.csv
+# straight out of the zip row by row, parses the track files into the stream
+# store across a process pool and appends the activities to the local history
+# store
+#
+#   python -m stravatui.bulk_import export_1234567.zip --athlete alice
+
+import argparse
+import csv
+import io
+import os
+import struct
+import time
+import zipfile
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import ParseError
+
+from . import tracing
+from .store import ActivityStore
+from .stream_store import save_track, streams_dir
+from .tracks import read_track, summarise_track, track_format
+
+ACTIVITIES_CSV = "activities.csv"
+# rows read and parsed at a time, which bounds memory
+BATCH_SIZE = 500
+# batches between saves of the history store, which bounds the work lost if an
+# import is interrupted without saving it every batch
+CHECKPOINT_BATCHES = 20
+
+# store column -> activities.csv header. The export repeats some headers,
+# first in the athlete's display units and then raw (metres, seconds), and
+# the raw one is read since it comes last
+CSV_COLUMNS = {
+    "ids": "Activity ID",
+    "start_dates": "Activity Date",
+    "names": "Activity Name",
+    "activity_type": "Activity Type",
+    "distances": "Distance",
+    "times": "Moving Time",
+    "elapsed_time": "Elapsed Time",
+    "total_elevation_gain": "Elevation Gain",
+    "average_heartrate": "Average Heart Rate",
+    "filename": "Filename",
+}
+# e.g. "Mar 14, 2021, 7:12:34 AM", always UTC
+CSV_DATE_FORMAT = "%b %d, %Y, %I:%M:%S %p"
+
+# what a corrupt or truncated track file can raise while it's read
+TRACK_ERRORS = (
+    KeyError,
+    IndexError,
+    OSError,
+    EOFError,
+    ParseError,
+    ValueError,
+    struct.error,
+)
+
+# the archive open in each pool worker and where it writes streams, so track
+# files are read from the zip and stored by the worker rather than pickled
+# across to it and back
+_archive: zipfile.ZipFile | None = None
+_streams_dir: Path | None = None
+
+
+def _open_archive(path: str, directory: Path) -> None:
+    global _archive, _streams_dir
+    _archive = zipfile.ZipFile(path)
+    _streams_dir = directory
+
+
+def _import_track(task: tuple[int, str]) -> dict[str, Any] | None:
+    """
+    Parse one track file in the archive into the stream store and return its
+    summary (None if it can't be read).
+    """
+    activity_id, member = task
+    if _archive is None or _streams_dir is None:
+        return None
+
+    try:
+        with _archive.open(member) as raw:
+            track = read_track(raw, member)
+    except TRACK_ERRORS:
+        return None
+
+    if not len(track["time"]):
+        return None
+
+    save_track(_streams_dir, activity_id, track)
+    return summarise_track(track)
+
+
+def _number(value: str) -> float | None:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _start_date(value: str) -> str:
+    try:
+        start = datetime.strptime(value, CSV_DATE_FORMAT)
+    except ValueError:
+        start = datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start.isoformat()
+
+
+def _row_record(
+    row: list[str], positions: dict[str, int], distance_scale: float
+) -> tuple[dict[str, Any], str]:
+    """
+    Turn an activities.csv row into a store record and its track file name.
+    Raises ValueError for rows without an id or date.
+    """
+
+    def value(column: str) -> str:
+        position = positions.get(CSV_COLUMNS[column])
+        return row[position].strip() if position is not None else ""
+
+    distance = _number(value("distances"))
+    moving_time = _number(value("times")) or _number(value("elapsed_time"))
+    elevation_gain = _number(value("total_elevation_gain"))
+    heartrate = _number(value("average_heartrate"))
+    activity_type = value("activity_type").replace(" ", "")
+
+    record = {
+        "ids": int(value("ids")),
+        "names": value("names"),
+        "start_dates": _start_date(value("start_dates")),
+        "activity_type": f"root='{activity_type}'",
+        "distances": (distance or 0.0) * distance_scale,
+        "times": int(moving_time) if moving_time is not None else None,
+        "total_elevation_gain": elevation_gain,
+        "average_heartrate": heartrate or None,
+    }
+    return record, value("filename")
+
+
+def _fill_from_track(record: dict[str, Any], summary: dict[str, Any] | None) -> None:
+    """Fill in what the CSV row left blank from its track, or with zeros."""
+    summary = summary or {}
+
+    if record["times"] is None:
+        record["times"] = summary.get("elapsed_time") or 0
+    if record["total_elevation_gain"] is None:
+        record["total_elevation_gain"] = summary.get("elevation_gain") or 0.0
+    if record["average_heartrate"] is None:
+        record["average_heartrate"] = summary.get("average_heartrate")
+
+
+def _read_rows(
+    archive: zipfile.ZipFile,
+) -> Iterator[tuple[dict[str, Any], str] | None]:
+    """
+    Stream activities.csv out of the archive, yielding each row as a store
+    record and its track file name (None for rows that can't be read).
+    """
+    with archive.open(ACTIVITIES_CSV) as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+        header = next(reader, [])
+        positions = {name: i for i, name in enumerate(header)}
+        # older exports only have the display-unit (km) distance
+        distance_scale = 1000.0 if header.count("Distance") == 1 else 1.0
+
+        for row in reader:
+            try:
+                yield _row_record(row, positions, distance_scale)
+            except (ValueError, IndexError):
+                yield None
+
+
+def _import_batch(
+    rows: list[tuple[dict[str, Any], str] | None],
+    members: set[str],
+    store: ActivityStore,
+    import_tracks: Callable[
+        [list[tuple[int, str]]], Iterable[dict[str, Any] | None]
+    ],
+    counts: dict[str, int],
+) -> None:
+    records: list[dict[str, Any]] = []
+    # (activity id, track file) to parse, by index into records
+    tracks: dict[int, tuple[int, str]] = {}
+    batch_ids: set[int] = set()
+
+    for row in rows:
+        counts["rows"] += 1
+        if row is None:
+            counts["invalid"] += 1
+            continue
+
+        record, filename = row
+        if record["ids"] in store or record["ids"] in batch_ids:
+            counts["duplicates"] += 1
+            continue
+
+        batch_ids.add(record["ids"])
+        if filename in members:
+            if track_format(filename) is not None:
+                tracks[len(records)] = (record["ids"], filename)
+            else:
+                counts["unsupported_tracks"] += 1
+        records.append(record)
+
+    summaries = dict(zip(tracks, import_tracks(list(tracks.values()))))
+    for i, record in enumerate(records):
+        summary = summaries.get(i)
+        if i in tracks:
+            counts["tracks" if summary is not None else "track_errors"] += 1
+        _fill_from_track(record, summary)
+
+    # indexed and saved by import_archive at each checkpoint
+    counts["imported"] += store.add_activities(records, index=False)
+
+
+@tracing.traced()
+def import_archive(
+    path: Path,
+    athlete: str | None = None,
+    workers: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Callable[[dict[str, int]], None] | None = None,
+    checkpoint_batches: int = CHECKPOINT_BATCHES,
+) -> dict[str, int]:
+    """
+    Import a bulk-export archive into the athlete's history and stream stores
+    without extracting it. Activities already in the store are skipped before
+    their tracks are parsed. The store is indexed and saved every
+    `checkpoint_batches` batches and at the end, so running an interrupted
+    import again picks up from the last checkpoint. `workers` is the process
+    pool size (default every core, 0 parses tracks in this process). Returns
+    counts of what was read, imported and skipped.
+    """
+    store = ActivityStore(athlete)
+    counts = {
+        "rows": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "tracks": 0,
+        "track_errors": 0,
+        "unsupported_tracks": 0,
+    }
+
+    directory = streams_dir(athlete)
+
+    executor = None
+    if workers == 0:
+        _open_archive(str(path), directory)
+        import_tracks = partial(map, _import_track)
+    else:
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(
+            workers, initializer=_open_archive, initargs=(str(path), directory)
+        )
+        # a few chunks per worker keeps them all busy without a round trip
+        # per file
+        import_tracks = partial(
+            executor.map,
+            _import_track,
+            chunksize=max(1, batch_size // (workers * 4)),
+        )
+
+    # activities imported when the store was last saved
+    saved = 0
+
+    def checkpoint() -> None:
+        nonlocal saved
+        with tracing.span("import checkpoint", activities=len(store)):
+            store.rebuild_indexes()
+            store.save()
+        saved = counts["imported"]
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = set(archive.namelist())
+            rows = _read_rows(archive)
+
+            batches = 0
+            while batch := list(islice(rows, batch_size)):
+                batches += 1
+                with tracing.span("import batch", rows=len(batch)):
+                    _import_batch(batch, members, store, import_tracks, counts)
+                if counts["imported"] > saved and batches % checkpoint_batches == 0:
+                    checkpoint()
+                if progress is not None:
+                    progress(counts)
+
+            if counts["imported"] > saved:
+                checkpoint()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        elif _archive is not None:
+            _archive.close()
+
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Import a Strava bulk-export archive into the history store"
+    )
+    parser.add_argument("archive", type=Path, help="export zip from strava.com")
+    parser.add_argument(
+        "--athlete", help="athlete namespace to import into (default: strava_token)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="track parsing processes (default: every core, 0 for none)",
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    def report(counts: dict[str, int]) -> None:
+        print(
+            f"\r{counts['rows']} rows, {counts['imported']} imported, "
+            f"{counts['duplicates']} already stored",
+            end="",
+            flush=True,
+        )
+
+    start = time.perf_counter()
+    counts = import_archive(
+        args.archive, args.athlete, args.workers, args.batch_size, progress=report
+    )
+    print(
+        f"\nimported {counts['imported']} of {counts['rows']} activities "
+        f"in {time.perf_counter() - start:.1f}s ({counts['duplicates']} already "
+        f"stored, {counts['invalid']} invalid rows, {counts['tracks']} tracks "
+        f"parsed, {counts['track_errors']} unreadable, "
+        f"{counts['unsupported_tracks']} in unsupported formats)"
+    )
+
+
+if __name__ == "__main__":
+    main()
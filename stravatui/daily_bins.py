@@ -0,0 +1,100 @@
+# Daily run distance and time for every calendar year, binned as activities
+# are synced, so the calendar heatmap reads a year straight out of the store
+# and never looks at the activities themselves
+
+import calendar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from . import tracing
+from .activity_utils import VALID_RUN_TYPES
+from .store import _read_json, _store_dir, _write_json
+from .training_load import _activity_day
+
+if TYPE_CHECKING:
+    from .store import ActivityStore
+
+# bump when the layout changes so the bins are rebuilt
+BINS_VERSION = 2
+
+# binned value -> unit it's kept in
+BIN_UNITS = {"distance": "km", "time": "min"}
+
+
+def _bins_path(athlete: str | None) -> Path:
+    return _store_dir(athlete) / "daily_bins.json"
+
+
+def _empty_bins() -> dict[str, Any]:
+    # "count" is the store positions binned so far, the store only appends, and
+    # "last_id" the id at the last one to tell a rebuilt store apart
+    return {"version": BINS_VERSION, "count": 0, "last_id": None, "years": {}}
+
+
+def _load_bins(athlete: str | None) -> dict[str, Any]:
+    bins = _read_json(_bins_path(athlete))
+    if not bins or bins.get("version") != BINS_VERSION:
+        return _empty_bins()
+    return bins
+
+
+@tracing.traced()
+def update_daily_bins(store: "ActivityStore", athlete: str | None = None) -> bool:
+    """
+    Add runs appended to the store since the last update to their day's
+    bins, or bin the whole store again if it isn't the one they were binned
+    over. Returns whether any bin changed.
+    """
+    columns = store.columns
+    bins = _load_bins(athlete)
+    count, ids = bins["count"], columns["ids"]
+    stale = count > len(ids) or bool(count and ids[count - 1] != bins["last_id"])
+    if stale:
+        bins = _empty_bins()
+    elif count == len(store):
+        return False
+
+    changed = stale
+    for i in range(bins["count"], len(store)):
+        start_date = columns["start_dates"][i]
+        if not start_date or columns["activity_type"][i] not in VALID_RUN_TYPES:
+            continue
+
+        day = _activity_day(start_date)
+        if str(day.year) not in bins["years"]:
+            days = 366 if calendar.isleap(day.year) else 365
+            bins["years"][str(day.year)] = {name: [0.0] * days for name in BIN_UNITS}
+        year = bins["years"][str(day.year)]
+        n = day.timetuple().tm_yday - 1
+        distance, time = year["distance"], year["time"]
+        distance[n] = round(distance[n] + (columns["distances"][i] or 0) / 1000, 3)
+        time[n] = round(time[n] + (columns["times"][i] or 0) / 60, 2)
+        changed = True
+
+    bins["count"] = len(store)
+    bins["last_id"] = ids[-1] if ids else None
+    _write_json(_bins_path(athlete), bins)
+    return changed
+
+
+# athlete -> (bins file mtime, years) for calendar_years
+_years_memo: dict[str | None, tuple[int, dict[str, dict[str, list[float]]]]] = {}
+
+
+def calendar_years(athlete: str | None = None) -> dict[str, dict[str, list[float]]]:
+    """
+    Year ("YYYY") -> binned value -> one value per day of the year, for every
+    year with a run. Kept in memory until the bins change.
+    """
+    try:
+        mtime = _bins_path(athlete).stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    memo = _years_memo.get(athlete)
+    if memo is not None and memo[0] == mtime:
+        return memo[1]
+
+    years = _load_bins(athlete)["years"]
+    _years_memo[athlete] = (mtime, years)
+    return years
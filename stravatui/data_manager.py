@@ -1,21 +1,84 @@
 import json
 import os
+import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-import stravalib.model as model
-
-from .auth import _initialise_strava_client
+from . import metrics, tracing
+from .auth import _initialise_strava_client, validate_athlete
 from .formatters import _format_pace
 
+# only used for annotations, stravalib is imported with the client on first use
+if TYPE_CHECKING:
+    import stravalib.model as model
+
+    from .tracks import Track
+
 NULL_VALUES = (None, "None", "0", "")
 PACKAGE_DIR = Path(__file__).parent
 DATA_DIR = PACKAGE_DIR / "data"
+ATHLETES_DIR = DATA_DIR / "athletes"
+
+
+def _data_dir(athlete: str | None = None) -> Path:
+    """
+    Return the cache directory for an athlete. The default (unnamed) athlete
+    uses DATA_DIR directly, named athletes get their own namespace under
+    DATA_DIR/athletes.
+    """
+    if athlete is None:
+        return DATA_DIR
+
+    athlete_dir = ATHLETES_DIR / validate_athlete(athlete)
+    athlete_dir.mkdir(parents=True, exist_ok=True)
+
+    return athlete_dir
+
+
+def clear_cache(athlete: str | None = None) -> None:
+    """Remove all cached files for an athlete."""
+    for cache_file in _data_dir(athlete).glob("*.json"):
+        cache_file.unlink()
+
+
+def _cache_hit(path: Path) -> bool:
+    """Whether a cache file exists, counted per resource in the metrics."""
+    hit = path.exists()
+    metrics.record_cache(path.stem, hit)
+    return hit
+
+
+def _read_cache_file(path: Path) -> Any:
+    with tracing.span("cache read", file=path.name) as span:
+        with open(path) as f:
+            data = json.load(f)
+            span.set(bytes=f.tell())
+
+    return data
+
+
+def _write_cache_file(path: Path, data: Any, indent: int | None = None) -> None:
+    # written to a temporary file first so a failed write, or a refresh that
+    # fails part way, leaves the last good cache in place
+    with tracing.span("cache write", file=path.name) as span:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp", delete=False
+        ) as f:
+            try:
+                json.dump(data, f, indent=indent)
+                span.set(bytes=f.tell())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
 
+        os.replace(f.name, path)
 
-def _check_cache_modified_date(max_age: int = 24):
+
+def _check_cache_modified_date(max_age: int = 24, athlete: str | None = None):
     """Remove cached files if they're older than max_age"""
-    file_path = DATA_DIR / "activities.json"
+    file_path = _data_dir(athlete) / "activities.json"
 
     if not file_path.exists():
         return
@@ -25,20 +88,22 @@ def _check_cache_modified_date(max_age: int = 24):
     age = datetime.now() - mod_date_dt
 
     if age > timedelta(hours=max_age):
-        for cache_file in DATA_DIR.glob("*.json"):
-            cache_file.unlink()
+        clear_cache(athlete)
 
 
-def all_time_run_stats() -> dict[str, str | int]:
+@tracing.traced()
+def all_time_run_stats(
+    athlete: str | None = None, refresh: bool = False
+) -> dict[str, str | int]:
     """
     Fetch and return a dictionary of all-time run stats. Data cached
-    in DATA_DIR/all_time_run.json to avoid excessive API calls.
+    in DATA_DIR/all_time_run.json to avoid excessive API calls, `refresh`
+    fetches it again regardless.
     """
-    all_time_run_cache = DATA_DIR / "all_time_run.json"
+    all_time_run_cache = _data_dir(athlete) / "all_time_run.json"
 
-    if all_time_run_cache.exists():
-        with open(all_time_run_cache) as f:
-            all_time_run_data = json.load(f)
+    if not refresh and _cache_hit(all_time_run_cache):
+        all_time_run_data = _read_cache_file(all_time_run_cache)
 
         all_time_ach_count = all_time_run_data["all_time_ach_count"]
         all_time_count = all_time_run_data["all_time_count"]
@@ -49,7 +114,7 @@ def all_time_run_stats() -> dict[str, str | int]:
 
         return all_time_run_data
     else:
-        client = _initialise_strava_client()
+        client = _initialise_strava_client(athlete)
 
         if not client.access_token:
             return {}
@@ -83,22 +148,24 @@ def all_time_run_stats() -> dict[str, str | int]:
             "all_time_moving_time": all_time_moving_time,
         }
 
-        with open(all_time_run_cache, "w") as f:
-            json.dump(all_time_run_data, f)
+        _write_cache_file(all_time_run_cache, all_time_run_data)
 
         return all_time_run_data
 
 
-def ytd_run_stats() -> dict[str, str | int]:
+@tracing.traced()
+def ytd_run_stats(
+    athlete: str | None = None, refresh: bool = False
+) -> dict[str, str | int]:
     """
     Fetch and return a dictionary of year-to-date run stas. Data cached
-    in DATA_DIR/ytd_run.json to avoid excessive API calls.
+    in DATA_DIR/ytd_run.json to avoid excessive API calls, `refresh` fetches
+    it again regardless.
     """
-    ytd_run_cache = DATA_DIR / "ytd_run.json"
+    ytd_run_cache = _data_dir(athlete) / "ytd_run.json"
 
-    if ytd_run_cache.exists():
-        with open(ytd_run_cache) as f:
-            ytd_run_data = json.load(f)
+    if not refresh and _cache_hit(ytd_run_cache):
+        ytd_run_data = _read_cache_file(ytd_run_cache)
 
         ytd_ach_count = ytd_run_data["ytd_ach_count"]
         ytd_count = ytd_run_data["ytd_count"]
@@ -109,7 +176,7 @@ def ytd_run_stats() -> dict[str, str | int]:
 
         return ytd_run_data
     else:
-        client = _initialise_strava_client()
+        client = _initialise_strava_client(athlete)
 
         if not client.access_token:
             return {}
@@ -143,22 +210,24 @@ def ytd_run_stats() -> dict[str, str | int]:
             "ytd_moving_time": ytd_moving_time,
         }
 
-        with open(ytd_run_cache, "w") as f:
-            json.dump(ytd_run_data, f)
+        _write_cache_file(ytd_run_cache, ytd_run_data)
 
         return ytd_run_data
 
 
-def get_recent_activities() -> dict[str, list[str]]:
+@tracing.traced()
+def get_recent_activities(
+    athlete: str | None = None, refresh: bool = False
+) -> dict[str, list[str]]:
     """
     Get detailed activity data for the last 60 days. Data cached
-    in DATA_DIR/activities.json to avoid excessive API calls.
+    in DATA_DIR/activities.json to avoid excessive API calls, `refresh`
+    fetches it again regardless.
     """
-    activities_cache = DATA_DIR / "activities.json"
+    activities_cache = _data_dir(athlete) / "activities.json"
 
-    if activities_cache.exists():
-        with open(activities_cache) as f:
-            activities_data = json.load(f)
+    if not refresh and _cache_hit(activities_cache):
+        activities_data = _read_cache_file(activities_cache)
 
         names = activities_data["names"]
         distances = activities_data["distances"]
@@ -171,10 +240,12 @@ def get_recent_activities() -> dict[str, list[str]]:
         return activities_data
 
     else:
-        client = _initialise_strava_client()
+        client = _initialise_strava_client(athlete)
 
         if not client.access_token:
             return {
+                "ids": [],
+                "start_dates": [],
                 "names": [],
                 "distances": [],
                 "times": [],
@@ -189,6 +260,10 @@ def get_recent_activities() -> dict[str, list[str]]:
         # to get newest first
         activities = list(reversed(list(client.get_activities(after=one_month_ago))))
 
+        ids = [str(act.id) for act in activities]
+        start_dates = [
+            act.start_date.isoformat() if act.start_date else "" for act in activities
+        ]
         names = [str(act.name) for act in activities]
         distances = [str(act.distance) for act in activities]
         times = [str(act.moving_time) for act in activities]
@@ -200,6 +275,8 @@ def get_recent_activities() -> dict[str, list[str]]:
         total_elevation_gain = [str(act.total_elevation_gain) for act in activities]
         activity_type = [str(act.type) for act in activities]
         activities_data = {
+            "ids": ids,
+            "start_dates": start_dates,
             "names": names,
             "distances": distances,
             "times": times,
@@ -209,16 +286,55 @@ def get_recent_activities() -> dict[str, list[str]]:
             "activity_type": activity_type,
         }
 
-        with open(activities_cache, "w") as f:
-            json.dump(activities_data, f)
+        _write_cache_file(activities_cache, activities_data)
 
         return activities_data
 
 
+# streams kept for each activity, see stravatui.tracks
+API_STREAM_TYPES = ["time", "latlng", "altitude", "distance", "heartrate", "cadence"]
+
+
+@tracing.traced()
+def get_activity_streams(
+    activity_id: int, athlete: str | None = None, start: float = 0.0
+) -> "Track | None":
+    """
+    Get an activity's streams as a columnar track. Streams are kept in the
+    stream store, which the bulk-export importer also fills, so each
+    activity's streams are only fetched from Strava once. `start` is the
+    activity's start time (unix seconds), which the API doesn't return.
+    """
+    from .stream_store import load_track, save_track, streams_dir
+    from .tracks import from_api_streams
+
+    track = load_track(activity_id, athlete)
+    metrics.record_cache("streams", track is not None)
+    if track is not None:
+        return track
+
+    client = _initialise_strava_client(athlete)
+    if not client.access_token:
+        return None
+
+    streams = client.get_activity_streams(activity_id, types=API_STREAM_TYPES)
+    track = from_api_streams(
+        {name: list(stream.data or []) for name, stream in streams.items()}, start
+    )
+    save_track(streams_dir(athlete), activity_id, track)
+
+    return track
+
+
 def get_last_five_activities(recent_data: dict[str, list[str]]) -> list[dict]:
     """Return the last five activities from the recent activity data."""
+    # caches written before ids and start dates were kept don't have them
+    ids = recent_data.get("ids") or [""] * len(recent_data["names"])
+    start_dates = recent_data.get("start_dates") or [""] * len(recent_data["names"])
     return [
         {
+            "ids": ids[i],
+            "start_dates": start_dates[i],
             "names": recent_data["names"][i],
             "distances": recent_data["distances"][i],
             "times": recent_data["times"][i],
@@ -231,18 +347,19 @@ def get_last_five_activities(recent_data: dict[str, list[str]]) -> list[dict]:
     ]
 
 
-def get_best_efforts() -> list[dict]:
+@tracing.traced()
+def get_best_efforts(athlete: str | None = None, refresh: bool = False) -> list[dict]:
     """
     Get best efforts data for the last five activities. Data cached
-    in DATA_DIR/best_efforts.json to avoid excessive API calls.
+    in DATA_DIR/best_efforts.json to avoid excessive API calls, `refresh`
+    fetches it again regardless.
     """
-    best_efforts_cache = DATA_DIR / "best_efforts.json"
+    best_efforts_cache = _data_dir(athlete) / "best_efforts.json"
 
-    if best_efforts_cache.exists():
-        with open(best_efforts_cache) as f:
-            return json.load(f)
+    if not refresh and _cache_hit(best_efforts_cache):
+        return _read_cache_file(best_efforts_cache)
 
-    client = _initialise_strava_client()
+    client = _initialise_strava_client(athlete)
     if not client.access_token:
         return []
 
@@ -296,12 +413,12 @@ def get_best_efforts() -> list[dict]:
                 })
             all_best_efforts.append(activity_entry)
 
-    with open(best_efforts_cache, "w") as f:
-        json.dump(all_best_efforts, f, indent=2)
+    _write_cache_file(best_efforts_cache, all_best_efforts, indent=2)
 
     return all_best_efforts
 
 
+@tracing.traced()
 def aggregate_best_efforts(best_efforts_data: list[dict]) -> list[dict]:
     """Sort and filter best efforts to get the fastest times for each distance."""
     best_by_distance: dict[str, dict] = {}
@@ -331,3 +448,24 @@ def aggregate_best_efforts(best_efforts_data: list[dict]) -> list[dict]:
     summary = sorted(best_by_distance.values(), key=lambda x: x["distance_m"])
 
     return summary
+
+
+@tracing.traced()
+def load_all_data(
+    athlete: str | None = None, refresh: bool = False
+) -> tuple[dict[str, list[str]], dict, dict, list[dict]]:
+    """
+    Fetch (or read from cache) everything the app displays: recent activities,
+    all-time and year-to-date run stats and the aggregated best efforts.
+    `refresh` fetches them all again, each cache only being replaced once its
+    new data is in.
+    """
+    if not refresh:
+        _check_cache_modified_date(athlete=athlete)
+    recent_data = get_recent_activities(athlete, refresh=refresh)
+    all_time_data = all_time_run_stats(athlete, refresh=refresh)
+    ytd_run_data = ytd_run_stats(athlete, refresh=refresh)
+    best_efforts_data = get_best_efforts(athlete, refresh=refresh)
+    best_efforts_summary = aggregate_best_efforts(best_efforts_data)
+
+    return recent_data, all_time_data, ytd_run_data, best_efforts_summary
@@ -0,0 +1,100 @@
+# Memoised derived data (view models) keyed by a fingerprint of their inputs
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from typing import Any
+
+from . import metrics, tracing
+from .data_manager import _data_dir
+
+# bump when the shape or meaning of any derived value changes so entries
+# written by older code are ignored
+CACHE_VERSION = 1
+
+# (athlete, name) -> (fingerprint, value) for entries already seen this session
+_memory: dict[tuple[str | None, str], tuple[str, Any]] = {}
+
+
+def fingerprint(*inputs: Any) -> str:
+    """Return a stable hash of JSON-serialisable inputs."""
+    payload = json.dumps(
+        [CACHE_VERSION, inputs], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _entry_path(name: str, athlete: str | None):
+    derived_dir = _data_dir(athlete) / "derived"
+    derived_dir.mkdir(exist_ok=True)
+    return derived_dir / f"{name}.json"
+
+
+def _read_entry(name: str, athlete: str | None) -> tuple[str, Any] | None:
+    with tracing.span("cache read", file=f"derived/{name}.json") as span:
+        try:
+            with open(_entry_path(name, athlete)) as f:
+                entry = json.load(f)
+                span.set(bytes=f.tell())
+            return entry["fingerprint"], entry["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def _write_entry(name: str, athlete: str | None, key: str, value: Any) -> None:
+    path = _entry_path(name, athlete)
+
+    # a temporary file of its own per write, so workers saving the same entry
+    # never write into each other's
+    with tracing.span("cache write", file=f"derived/{name}.json") as span:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp", delete=False
+        ) as f:
+            try:
+                json.dump({"fingerprint": key, "value": value}, f)
+                span.set(bytes=f.tell())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+
+        os.replace(f.name, path)
+
+
+def cached(
+    name: str,
+    inputs: tuple,
+    compute: Callable[[], Any],
+    athlete: str | None = None,
+) -> Any:
+    """
+    Return the derived value `name` for `inputs`, only calling `compute` when
+    neither memory nor the on-disk cache holds a value for the same inputs.
+    Values must be JSON-serialisable (tuples come back as lists).
+    """
+    with tracing.span(f"derived {name}") as span:
+        key = fingerprint(*inputs)
+        memo_key = (athlete, name)
+
+        memo = _memory.get(memo_key)
+        if memo is not None and memo[0] == key:
+            span.set(source="memory")
+            metrics.record_cache(f"derived/{name}", True)
+            return memo[1]
+
+        entry = _read_entry(name, athlete)
+        if entry is not None and entry[0] == key:
+            _memory[memo_key] = entry
+            span.set(source="disk")
+            metrics.record_cache(f"derived/{name}", True)
+            return entry[1]
+
+        value = compute()
+        _write_entry(name, athlete, key, value)
+        _memory[memo_key] = (key, value)
+        span.set(source="computed")
+        metrics.record_cache(f"derived/{name}", False)
+
+        return value
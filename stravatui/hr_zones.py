@@ -0,0 +1,107 @@
+# Heart rate zones: the athlete's zone boundaries and time spent in each zone,
+# summed from the per-bpm histograms the metrics engine stores for every
+# activity (the heartrate_histogram metric), so new boundaries take effect
+# without reading any streams again
+
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from .store import _read_json, _store_dir, _write_json
+
+# top bpm of every zone but the last, Z1 to Z4 (Z5 is anything above)
+DEFAULT_ZONES = (120, 140, 155, 170)
+
+
+def _zones_path(athlete: str | None) -> Path:
+    return _store_dir(athlete) / "hr_zones.json"
+
+
+def parse_zones(text: str) -> tuple[int, ...]:
+    """
+    Zone boundaries from a comma separated list of bpm such as
+    "120,140,155,170", the top of every zone but the last.
+    """
+    try:
+        boundaries = tuple(int(bpm) for bpm in text.split(","))
+    except ValueError:
+        raise ValueError(f"Zone boundaries must be whole bpm: {text!r}") from None
+
+    if boundaries[0] <= 0 or any(a >= b for a, b in zip(boundaries, boundaries[1:])):
+        raise ValueError(f"Zone boundaries must be positive and ascending: {text!r}")
+    return boundaries
+
+
+def load_zones(athlete: str | None = None) -> tuple[int, ...]:
+    """The athlete's zone boundaries, DEFAULT_ZONES if none have been set."""
+    saved = _read_json(_zones_path(athlete))
+    try:
+        return parse_zones(",".join(str(bpm) for bpm in saved["boundaries"]))
+    except (TypeError, KeyError, IndexError, ValueError):
+        return DEFAULT_ZONES
+
+
+def save_zones(boundaries: tuple[int, ...], athlete: str | None = None) -> None:
+    _write_json(_zones_path(athlete), {"boundaries": list(boundaries)})
+
+
+def zone_names(boundaries: tuple[int, ...]) -> list[str]:
+    """Name and bpm range of each zone, e.g. "Z2 121-140"."""
+    lows = [None, *(bpm + 1 for bpm in boundaries)]
+    highs = [*boundaries, None]
+
+    names = []
+    for zone, (low, high) in enumerate(zip(lows, highs), 1):
+        if low is None:
+            names.append(f"Z{zone} <{high + 1}")
+        elif high is None:
+            names.append(f"Z{zone} {low}+")
+        else:
+            names.append(f"Z{zone} {low}-{high}")
+    return names
+
+
+def zone_times(histogram: dict[str, Any], boundaries: tuple[int, ...]) -> list[float]:
+    """Seconds in each zone from a heartrate_histogram value."""
+    low = histogram["low"]
+    seconds = histogram["seconds"]
+
+    times = []
+    start = 0
+    for bpm in boundaries:
+        end = max(start, min(len(seconds), bpm + 1 - low))
+        times.append(sum(seconds[start:end]))
+        start = end
+    times.append(sum(seconds[start:]))
+
+    return times
+
+
+def week_start(day: date) -> str:
+    """The Monday of `day`'s week, which zone_totals keys weeks by."""
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def zone_totals(
+    histograms: Iterable[dict[str, Any]], boundaries: tuple[int, ...]
+) -> dict[str, list[tuple[str, list[float]]]]:
+    """
+    Seconds in each zone per week (by the Monday it starts on) and per month
+    ("YYYY-MM"), oldest first. Histograms without a start time are left out.
+    """
+    weeks: dict[str, list[float]] = {}
+    months: dict[str, list[float]] = {}
+    empty = [0.0] * (len(boundaries) + 1)
+
+    for histogram in histograms:
+        if not histogram or not histogram.get("start", 0) > 0:
+            continue
+
+        day = datetime.fromtimestamp(histogram["start"]).date()
+        times = zone_times(histogram, boundaries)
+
+        for totals, key in ((weeks, week_start(day)), (months, day.isoformat()[:7])):
+            totals[key] = [a + b for a, b in zip(totals.get(key, empty), times)]
+
+    return {"weeks": sorted(weeks.items()), "months": sorted(months.items())}
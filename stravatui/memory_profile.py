@@ -0,0 +1,262 @@
+# Memory profiling for large histories (`main.py --profile-memory`): tracemalloc
+# snapshots after each load stage and page population, attributed to the
+# app's modules, plus the retained size of each dataset the app keeps
+#
+#   python -m stravatui.memory_profile diff before.snapshot after.snapshot
+
+import argparse
+import importlib
+import sys
+import tracemalloc
+from functools import cache
+from pathlib import Path
+from types import FunctionType, MethodType, ModuleType
+from typing import Any
+
+# frames kept per allocation, enough to reach app code from inside json,
+# stravalib or textual
+TRACE_FRAMES = 25
+TOP_MODULES = 8
+TOP_LINES = 3
+PACKAGE = "stravatui"
+# imported before tracing starts: tracing an import is tens of times slower
+# (stravalib alone takes about a minute) and module code isn't what's profiled
+PRELOAD_MODULES = (
+    "stravatui.app",
+    "stravatui.ui.cached_plot",
+    "stravalib.client",
+    "requests",
+)
+
+_enabled = False
+# (label, snapshot, traced bytes, {dataset: retained bytes}) in the order
+# they were taken
+_checkpoints: list[tuple[str, tracemalloc.Snapshot, int, dict[str, int]]] = []
+_dump_dir: Path | None = None
+# objects reachable from data that aren't owned by it
+_SHARED = (type, ModuleType, FunctionType, MethodType)
+
+
+def enable(dump_dir: Path | None = None) -> None:
+    """Start tracing allocations, optionally dumping every snapshot to dump_dir."""
+    global _enabled, _dump_dir
+    _enabled = True
+    _dump_dir = dump_dir
+    if dump_dir is not None:
+        dump_dir.mkdir(parents=True, exist_ok=True)
+
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    tracemalloc.start(TRACE_FRAMES)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def deep_size(obj: Any, seen: set[int] | None = None) -> int:
+    """Bytes retained by an object and the containers and instances it holds."""
+    if seen is None:
+        seen = set()
+
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, _SHARED):
+            stack.append(vars(item))
+
+    return size
+
+
+def checkpoint(label: str, datasets: dict[str, Any] | None = None) -> None:
+    """
+    Take a snapshot after a load stage or page population. `datasets` maps
+    names to the data the app keeps from that stage, measured by deep size.
+    """
+    if not _enabled:
+        return
+
+    sizes = {name: deep_size(value) for name, value in (datasets or {}).items()}
+    # tracemalloc doesn't trace its own copies of the traces, so the snapshots
+    # kept here don't show up in later ones
+    snapshot = tracemalloc.take_snapshot()
+    traced, _ = tracemalloc.get_traced_memory()
+    _checkpoints.append((label, snapshot, traced, sizes))
+
+    if _dump_dir is not None:
+        name = f"{len(_checkpoints):02d}-{label.replace(' ', '_')}.snapshot"
+        snapshot.dump(str(_dump_dir / name))
+
+
+@cache
+def _module_of(filename: str) -> tuple[str, bool]:
+    """
+    Name the module a source file belongs to, dotted for app modules and the
+    package name for third-party ones, and whether it's part of the app.
+    """
+    if filename.startswith("<"):
+        return filename, False  # <frozen ...>, <string>
+
+    parts = Path(filename).with_suffix("").parts
+    if PACKAGE in parts:
+        start = len(parts) - parts[::-1].index(PACKAGE) - 1
+        return ".".join(parts[start:]), True
+    if "site-packages" in parts:
+        return parts[parts.index("site-packages") + 1], False
+    return (parts[-1] if parts else filename), False
+
+
+def _owner(traceback: tracemalloc.Traceback) -> tuple[str, str]:
+    """
+    The module and "file:line" an allocation is charged to: its innermost app
+    frame, so json.load called from data_manager counts as data_manager's,
+    or its innermost frame when no app code is on the stack.
+    """
+    # frames are ordered oldest first
+    for frame in reversed(traceback):
+        module, in_app = _module_of(frame.filename)
+        if in_app:
+            break
+    else:
+        frame = traceback[-1]
+        module, _ = _module_of(frame.filename)
+
+    return module, f"{Path(frame.filename).name}:{frame.lineno}"
+
+
+def by_module(snapshot: tracemalloc.Snapshot) -> dict[str, dict[str, int]]:
+    """{module: {"file:line": bytes}} with each allocation charged to its owner."""
+    modules: dict[str, dict[str, int]] = {}
+    # grouping identical tracebacks first is much faster than walking traces
+    for stat in snapshot.statistics("traceback"):
+        module, where = _owner(stat.traceback)
+        lines = modules.setdefault(module, {})
+        lines[where] = lines.get(where, 0) + stat.size
+    return modules
+
+
+def _kib(size: float) -> str:
+    return f"{size / 1024:>10.1f}"
+
+
+def _module_lines(
+    modules: dict[str, dict[str, int]], limit: int, app: bool
+) -> list[str]:
+    """The biggest app modules, or the biggest other packages, with top lines."""
+    totals = {
+        module: sum(lines.values())
+        for module, lines in modules.items()
+        if module.startswith(f"{PACKAGE}.") == app
+    }
+    lines = []
+    for module in sorted(totals, key=totals.__getitem__, reverse=True)[:limit]:
+        lines.append(f"    {module:<36} {_kib(totals[module])} KiB")
+        top = sorted(modules[module].items(), key=lambda i: i[1], reverse=True)
+        for where, size in top[:TOP_LINES]:
+            lines.append(f"        {where:<32} {_kib(size)} KiB")
+    return lines
+
+
+def diff_report(
+    old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, limit: int = TOP_MODULES
+) -> list[str]:
+    """Per-module and per-line growth from one snapshot to another."""
+    old_modules = by_module(old)
+    new_modules = by_module(new)
+
+    growth: dict[str, dict[str, int]] = {}
+    for module in old_modules.keys() | new_modules.keys():
+        old_lines = old_modules.get(module, {})
+        new_lines = new_modules.get(module, {})
+        growth[module] = {
+            where: new_lines.get(where, 0) - old_lines.get(where, 0)
+            for where in old_lines.keys() | new_lines.keys()
+        }
+
+    total = sum(sum(lines.values()) for lines in growth.values())
+    lines = [f"    total {'':<30} {_kib(total)} KiB"]
+    totals = {module: sum(changes.values()) for module, changes in growth.items()}
+    for module in sorted(totals, key=lambda m: abs(totals[m]), reverse=True)[:limit]:
+        if not totals[module]:
+            continue
+        lines.append(f"    {module:<36} {_kib(totals[module])} KiB")
+        top = sorted(growth[module].items(), key=lambda i: abs(i[1]), reverse=True)
+        for where, size in top[:TOP_LINES]:
+            if size:
+                lines.append(f"        {where:<32} {_kib(size)} KiB")
+
+    return lines
+
+
+def report() -> str:
+    """
+    Everything recorded so far: traced memory at each checkpoint, the top
+    allocators at the last one, retained size per dataset and the growth
+    across each "before X" / "X" pair of checkpoints, such as a history sync.
+    """
+    if not _checkpoints:
+        return "memory profile: no checkpoints recorded"
+
+    lines = ["memory profile (tracemalloc)", "  checkpoints"]
+    for i, (label, _, traced, _) in enumerate(_checkpoints, 1):
+        lines.append(f"    {i:>2} {label:<33} {_kib(traced)} KiB traced")
+    _, peak = tracemalloc.get_traced_memory()
+    lines.append(f"    peak {'':<31} {_kib(peak)} KiB")
+
+    label, last, _, _ = _checkpoints[-1]
+    modules = by_module(last)
+    lines.append(f"  top allocators by app module at '{label}'")
+    lines.extend(_module_lines(modules, len(modules), app=True))
+    lines.append(f"  top allocators by package at '{label}'")
+    lines.extend(_module_lines(modules, TOP_MODULES, app=False))
+
+    lines.append("  retained size per dataset (last measured)")
+    datasets: dict[str, int] = {}
+    for *_, sizes in _checkpoints:
+        datasets.update(sizes)
+    for name, size in datasets.items():
+        lines.append(f"    {name:<36} {_kib(size)} KiB")
+
+    for i, (before, old, _, _) in enumerate(_checkpoints):
+        if not before.startswith("before "):
+            continue
+        # checkpoints from the UI thread can land in between
+        after = next(
+            (c for c in _checkpoints[i + 1 :] if c[0] == before[len("before ") :]),
+            None,
+        )
+        if after is not None:
+            lines.append(f"  growth across {after[0]}")
+            lines.extend(diff_report(old, after[1]))
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two memory snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    diff = subparsers.add_parser("diff", help="growth from one snapshot to another")
+    diff.add_argument("before", type=Path)
+    diff.add_argument("after", type=Path)
+    diff.add_argument("--top", type=int, default=TOP_MODULES)
+    args = parser.parse_args(argv)
+
+    old = tracemalloc.Snapshot.load(str(args.before))
+    new = tracemalloc.Snapshot.load(str(args.after))
+    print(f"growth from {args.before.name} to {args.after.name}")
+    print("\n".join(diff_report(old, new, args.top)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# Process-wide counters, gauges and histograms for API usage, cache
+# efficiency and store query times, exportable as Prometheus text or JSON
+
+import json
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
+
+# latency buckets (seconds) for Strava calls, and finer ones for local queries
+API_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.5,
+)
+
+# numeric path segments (activity and athlete ids) are folded into one label
+ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+Labels = tuple[tuple[str, str], ...]
+
+_lock = threading.Lock()
+# metric name -> (kind, help text)
+_meta: dict[str, tuple[str, str]] = {}
+_counters: dict[str, dict[Labels, float]] = {}
+_gauges: dict[str, dict[Labels, float]] = {}
+# name -> labels -> [bucket counts..., +Inf count, sum]
+_histograms: dict[str, dict[Labels, list[float]]] = {}
+_buckets: dict[str, tuple[float, ...]] = {}
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def counter(name: str, help_text: str) -> None:
+    _meta[name] = ("counter", help_text)
+    _counters.setdefault(name, {})
+
+
+def gauge(name: str, help_text: str) -> None:
+    _meta[name] = ("gauge", help_text)
+    _gauges.setdefault(name, {})
+
+
+def histogram(name: str, help_text: str, buckets: tuple[float, ...]) -> None:
+    _meta[name] = ("histogram", help_text)
+    _histograms.setdefault(name, {})
+    _buckets[name] = buckets
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    key = _labels(labels)
+    with _lock:
+        series = _counters[name]
+        series[key] = series.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels: Any) -> None:
+    with _lock:
+        _gauges[name][_labels(labels)] = value
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    buckets = _buckets[name]
+    key = _labels(labels)
+    with _lock:
+        series = _histograms[name].get(key)
+        if series is None:
+            series = _histograms[name][key] = [0.0] * (len(buckets) + 2)
+        series[bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+
+def timed(name: str, **labels: Any) -> Callable:
+    """Decorator observing how long each call of a function takes."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start, **labels)
+
+        return wrapper
+
+    return decorator
+
+
+def reset() -> None:
+    """Zero every metric, e.g. between benchmark runs."""
+    with _lock:
+        for metrics in (_counters, _gauges, _histograms):
+            for series in metrics.values():
+                series.clear()
+
+
+def quantile(q: float, buckets: tuple[float, ...], counts: list[float]) -> float:
+    """
+    Estimate a quantile from bucket counts by interpolating within the bucket
+    it falls in, as Prometheus' histogram_quantile does.
+    """
+    total = sum(counts)
+    if not total:
+        return 0.0
+
+    rank = q * total
+    seen = 0.0
+    for i, count in enumerate(counts):
+        if seen + count >= rank and count:
+            lower = buckets[i - 1] if i else 0.0
+            # past the last bucket there's no upper bound to interpolate to
+            if i == len(buckets):
+                return lower
+            return lower + (buckets[i] - lower) * (rank - seen) / count
+        seen += count
+
+    return buckets[-1]
+
+
+# ----------------------------------------------------------------------------
+# metrics recorded by the app
+# ----------------------------------------------------------------------------
+
+counter("strava_api_requests_total", "Strava API requests by endpoint and status")
+counter("strava_api_response_bytes_total", "Bytes received from the Strava API")
+counter("strava_api_rate_limited_total", "Strava API responses with status 429")
+counter("strava_api_retries_total", "Strava API requests retried by the transport")
+histogram(
+    "strava_api_latency_seconds", "Strava API request latency", API_LATENCY_BUCKETS
+)
+gauge("strava_rate_limit_remaining", "Requests left in Strava's rate-limit windows")
+counter("cache_requests_total", "Cache lookups by resource and result (hit/miss)")
+histogram("store_query_seconds", "Local activity store query time", QUERY_BUCKETS)
+
+
+def endpoint(path: str) -> str:
+    """Normalise a request path into an endpoint label, e.g. /activities/{id}."""
+    return ID_SEGMENT_RE.sub("/{id}", path.partition("?")[0])
+
+
+def record_api_response(
+    path: str,
+    status: int,
+    seconds: float,
+    size: int,
+    retries: int = 0,
+    headers: Any = None,
+) -> None:
+    """Record one Strava API response."""
+    name = endpoint(path)
+    inc("strava_api_requests_total", endpoint=name, status=status)
+    inc("strava_api_response_bytes_total", size, endpoint=name)
+    observe("strava_api_latency_seconds", seconds, endpoint=name)
+    if status == 429:
+        inc("strava_api_rate_limited_total", endpoint=name)
+    if retries:
+        inc("strava_api_retries_total", retries, endpoint=name)
+    if headers is not None:
+        _record_rate_limit(headers)
+
+
+def _record_rate_limit(headers: Any) -> None:
+    # "X-RateLimit-Limit: 100,1000" and "X-RateLimit-Usage: 12,340" give the
+    # 15 minute and daily windows, the read limits are reported separately
+    for prefix, kind in (("X-RateLimit", "overall"), ("X-ReadRateLimit", "read")):
+        limit = headers.get(f"{prefix}-Limit")
+        usage = headers.get(f"{prefix}-Usage")
+        if not limit or not usage:
+            continue
+
+        try:
+            pairs = zip(limit.split(","), usage.split(","))
+            for window, (window_limit, window_usage) in zip(("15min", "daily"), pairs):
+                set_gauge(
+                    "strava_rate_limit_remaining",
+                    int(window_limit) - int(window_usage),
+                    kind=kind,
+                    window=window,
+                )
+        except ValueError:
+            continue
+
+
+def rate_limit_remaining() -> int | None:
+    """
+    Fewest requests left in any of Strava's rate-limit windows, as of the last
+    response, or None before any response has reported them.
+    """
+    with _lock:
+        remaining = _gauges.get("strava_rate_limit_remaining", {}).values()
+        return int(min(remaining)) if remaining else None
+
+
+def record_cache(resource: str, hit: bool) -> None:
+    inc("cache_requests_total", resource=resource, result="hit" if hit else "miss")
+
+
+# ----------------------------------------------------------------------------
+# export
+# ----------------------------------------------------------------------------
+
+
+def snapshot() -> dict[str, Any]:
+    """
+    Every metric as plain data: {name: {"type", "help", "series": [...]}},
+    each series holding its labels and value (or buckets, count and sum).
+    """
+    result: dict[str, Any] = {}
+
+    with _lock:
+        for name, (kind, help_text) in _meta.items():
+            series: list[dict[str, Any]] = []
+            if kind == "histogram":
+                buckets = _buckets[name]
+                bounds = [*map(str, buckets), "+Inf"]
+                for labels, counts in _histograms[name].items():
+                    bucket_counts = counts[:-1]
+                    series.append({
+                        "labels": dict(labels),
+                        "buckets": dict(zip(bounds, bucket_counts)),
+                        "count": sum(bucket_counts),
+                        "sum": counts[-1],
+                        "p50": quantile(0.5, buckets, bucket_counts),
+                        "p95": quantile(0.95, buckets, bucket_counts),
+                    })
+            else:
+                values = _counters[name] if kind == "counter" else _gauges[name]
+                series = [
+                    {"labels": dict(labels), "value": value}
+                    for labels, value in values.items()
+                ]
+
+            result[name] = {"type": kind, "help": help_text, "series": series}
+
+    return result
+
+
+def _format_labels(labels: dict[str, str], extra: dict[str, str] | None = None) -> str:
+    labels = {**labels, **(extra or {})}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+
+    for name, metric in snapshot().items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+
+        for series in metric["series"]:
+            labels = series["labels"]
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {series['value']:g}")
+                continue
+
+            # Prometheus buckets are cumulative
+            cumulative = 0.0
+            for bound, count in series["buckets"].items():
+                cumulative += count
+                bucket_labels = _format_labels(labels, {"le": bound})
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative:g}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {series['sum']:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {series['count']:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def json_text() -> str:
+    return json.dumps(snapshot(), indent=2)
@@ -7,6 +7,10 @@ RACE_DISTANCES = {
     "half": 21097.5,
     "marathon": 42195,
 }
+# Riegel's formula overstates long race times from short runs, so shorter runs
+# aren't used to predict from history
+MIN_EFFORT_DISTANCE = 3000
+RIEGEL_EXPONENT = 1.06
 
 
 def _parse_time_input(time_str: str) -> int | None:
@@ -69,13 +73,33 @@ def _predict_race_times(
 
     for distance_key, target_distance in RACE_DISTANCES.items():
         predicted_seconds = input_time_seconds * (
-            (target_distance / input_distance) ** 1.06
+            (target_distance / input_distance) ** RIEGEL_EXPONENT
         )
         predictions[distance_key] = predicted_seconds
 
     return predictions
 
 
+def predict_from_efforts(
+    efforts: list[tuple[float, float]], distance_key: str
+) -> float | None:
+    """
+    Best predicted time in seconds at a race distance from recent runs, given
+    as (distance in metres, grade-adjusted time in seconds), so hilly runs
+    count for what they'd be worth on a flat course.
+    """
+    if distance_key not in RACE_DISTANCES:
+        return None
+
+    target_distance = RACE_DISTANCES[distance_key]
+    predictions = [
+        time * (target_distance / distance) ** RIEGEL_EXPONENT
+        for distance, time in efforts
+        if distance >= MIN_EFFORT_DISTANCE and time > 0
+    ]
+    return min(predictions, default=None)
+
+
 def get_race_predictions_formatted(
     input_distance_key: str, input_time_str: str
 ) -> list[tuple[str, str]] | None:
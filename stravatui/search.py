@@ -0,0 +1,204 @@
+# Search over the local activity store: a persisted name trigram index,
+# sport type postings and range filters served from the store's sort indexes
+
+import re
+from typing import Any
+
+from . import metrics, tracing
+from .store import ActivityStore, _read_json, _store_dir, _write_json
+
+# bump when the index layout changes so it gets rebuilt
+SEARCH_INDEX_VERSION = 1
+
+DATE_PREFIX_RE = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+# sorts after any ISO date suffix, so a date prefix works as an inclusive bound
+DATE_PREFIX_END = "\uffff"
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _name_trigrams(name: str) -> set[str]:
+    # pad so names (and short queries) under three characters still index
+    return _trigrams(f" {name.lower()} ")
+
+
+class SearchIndex:
+    """
+    Name trigram and sport type postings for a store, saved next to it. The
+    store only ever appends, so updating indexes just the new positions.
+    """
+
+    def __init__(self, store: ActivityStore) -> None:
+        self.store = store
+        self.path = _store_dir(store.athlete) / "search_index.json"
+        self.trigrams: dict[str, list[int]] = {}
+        self.types: dict[str, list[int]] = {}
+        self.count = 0
+
+        self._load()
+        self.update()
+
+    def _load(self) -> None:
+        data = _read_json(self.path)
+        if not data or data.get("version") != SEARCH_INDEX_VERSION:
+            return
+
+        # only reuse it if it was built over the start of this same store
+        count = data["count"]
+        ids = self.store.columns["ids"]
+        if count > len(ids) or (count and ids[count - 1] != data["last_id"]):
+            return
+
+        self.trigrams = data["trigrams"]
+        self.types = data["types"]
+        self.count = count
+
+    def save(self) -> None:
+        ids = self.store.columns["ids"]
+        _write_json(
+            self.path,
+            {
+                "version": SEARCH_INDEX_VERSION,
+                "count": self.count,
+                "last_id": ids[self.count - 1] if self.count else None,
+                "trigrams": self.trigrams,
+                "types": self.types,
+            },
+        )
+
+    @tracing.traced()
+    def update(self) -> None:
+        """Index activities added to the store since the index was last saved."""
+        if self.count == len(self.store):
+            return
+
+        names = self.store.columns["names"]
+        activity_types = self.store.columns["activity_type"]
+
+        for i in range(self.count, len(self.store)):
+            for gram in _name_trigrams(names[i]):
+                self.trigrams.setdefault(gram, []).append(i)
+            self.types.setdefault(activity_types[i], []).append(i)
+
+        self.count = len(self.store)
+        self.save()
+
+    def name_positions(self, text: str) -> list[int]:
+        """Positions of activities whose name contains `text` (case-insensitive)."""
+        text = text.lower()
+
+        if len(text) >= 3:
+            postings = sorted(
+                (self.trigrams.get(gram, []) for gram in _trigrams(text)), key=len
+            )
+            candidates = set(postings[0])
+            for positions in postings[1:]:
+                candidates.intersection_update(positions)
+        else:
+            # too short for a trigram, so take every trigram containing it
+            candidates = set()
+            for gram, positions in self.trigrams.items():
+                if text in gram:
+                    candidates.update(positions)
+
+        # trigrams can match out of order, so confirm the candidates
+        names = self.store.columns["names"]
+        return [i for i in candidates if text in names[i].lower()]
+
+    def sport_positions(self, sport: str) -> list[int]:
+        """Positions of activities whose sport type contains `sport`."""
+        sport = sport.lower()
+        positions = []
+        for activity_type, type_positions in self.types.items():
+            if sport in activity_type.removeprefix("root=").lower():
+                positions.extend(type_positions)
+        return positions
+
+
+def _parse_distance_range(value: str) -> tuple[float | None, float | None] | None:
+    """Parse "5-10", "21-", "-5" or "10" (at least 10) km into metres."""
+    low, sep, high = value.partition("-")
+    try:
+        low_m = float(low) * 1000 if low else None
+        high_m = float(high) * 1000 if high else None
+    except ValueError:
+        return None
+
+    if low_m is None and high_m is None:
+        return None
+    return low_m, high_m
+
+
+def _parse_date_range(value: str) -> tuple[str | None, str | None] | None:
+    """Parse "2024", "2024-03..2024-06", "2024-03-01.." etc. into ISO bounds."""
+    start, sep, end = value.partition("..")
+    if not sep:
+        end = start
+
+    for prefix in (start, end):
+        if prefix and not DATE_PREFIX_RE.match(prefix):
+            return None
+
+    if not start and not end:
+        return None
+    return start or None, end + DATE_PREFIX_END if end else None
+
+
+def parse_query(text: str) -> dict[str, Any]:
+    """
+    Split a search box query into filters. Plain words match activity names,
+    `type:run` matches sport types, `km:5-10` is a distance range and
+    `date:2024-01..2024-06` a date range. Either end of a range can be left
+    open, and unparseable filters are ignored.
+    """
+    query: dict[str, Any] = {"name": "", "sport": None, "distance": None, "dates": None}
+    words = []
+
+    for token in text.split():
+        field, sep, value = token.partition(":")
+        field = field.lower()
+
+        if sep and field in ("type", "sport"):
+            query["sport"] = value or None
+        elif sep and field in ("km", "distance"):
+            query["distance"] = _parse_distance_range(value)
+        elif sep and field == "date":
+            query["dates"] = _parse_date_range(value)
+        else:
+            words.append(token)
+
+    query["name"] = " ".join(words)
+
+    return query
+
+
+@metrics.timed("store_query_seconds", query="search")
+def search(index: SearchIndex, query: dict[str, Any]) -> list[int] | None:
+    """
+    Return store positions matching every filter in `query`, or None if it has
+    no filters. Each filter comes from an index, and the smallest result is
+    intersected with the others so no filter scans the whole history.
+    """
+    store = index.store
+    results: list[list[int]] = []
+
+    if query["name"]:
+        results.append(index.name_positions(query["name"]))
+    if query["sport"]:
+        results.append(index.sport_positions(query["sport"]))
+    if query["distance"]:
+        results.append(store.range_positions("distance", *query["distance"]))
+    if query["dates"]:
+        results.append(store.range_positions("date", *query["dates"]))
+
+    if not results:
+        return None
+
+    results.sort(key=len)
+    matches = set(results[0])
+    for positions in results[1:]:
+        matches.intersection_update(positions)
+
+    return list(matches)
@@ -0,0 +1,232 @@
+# Opt-in event loop stall detector (`main.py --watch-stalls`): measures how
+# late the event loop runs a periodic heartbeat, and when a callback blocks it
+# for longer than a threshold, captures the main thread's stack mid-stall
+# along with the widget and message being handled
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from . import metrics
+
+HEARTBEAT_INTERVAL = 0.05
+DEFAULT_THRESHOLD = 0.1
+# lag samples kept for the percentiles, about the last minute
+LAG_SAMPLES = 1200
+MAX_REPORTS = 50
+STACK_LIMIT = 20
+STALL_LOG = Path(__file__).parent / "data" / "stalls.log"
+
+metrics.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a periodic heartbeat",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+metrics.counter("event_loop_stalls_total", "Event loop stalls over the threshold")
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _describe_callable(func: Any) -> str:
+    func = getattr(func, "func", func)  # unwrap partials
+    return getattr(func, "__qualname__", repr(func))
+
+
+def _describe_widget(node: Any) -> str:
+    name = type(node).__name__
+    if getattr(node, "id", None):
+        name += f"#{node.id}"
+    return name
+
+
+def _describe_message(message: Any) -> str:
+    name = type(message).__name__
+    callback = getattr(message, "callback", None)
+    if callback is not None:
+        # call_from_thread / call_later callbacks arrive as Callback events
+        return f"{name}({_describe_callable(callback)})"
+
+    # messages bubbled up from a widget, like Button.Pressed, name their source
+    control = getattr(message, "control", None)
+    if control is not None:
+        return f"{name} from {_describe_widget(control)}"
+    return name
+
+
+def _handling(frame: FrameType | None) -> tuple[str | None, str | None]:
+    """
+    Find the innermost message dispatch or timer tick on a stack and return
+    the widget handling it and what it's handling, e.g.
+    ("StravaTUIApp", "Pressed from Button#calculate-button").
+    """
+    while frame is not None:
+        code_name = frame.f_code.co_name
+        owner = frame.f_locals.get("self")
+
+        if code_name == "_dispatch_message":
+            message = frame.f_locals.get("message")
+            return _describe_widget(owner), _describe_message(message)
+
+        if code_name == "_tick" and hasattr(owner, "_callback"):
+            target = owner._target()
+            return (
+                _describe_widget(target) if target is not None else None,
+                f"Timer({_describe_callable(owner._callback)})",
+            )
+
+        frame = frame.f_back
+
+    return None, None
+
+
+class StallWatchdog:
+    """
+    Watches the event loop it's started on. A heartbeat task records how late
+    each wake-up is (the loop lag), and a separate thread notices when the
+    heartbeat has gone quiet for longer than `threshold` seconds and grabs the
+    loop thread's stack while the offending callback is still running.
+    """
+
+    def __init__(
+        self, threshold: float = DEFAULT_THRESHOLD, log_path: Path | None = None
+    ) -> None:
+        self.threshold = threshold
+        self.log_path = log_path
+        self.lags: deque[float] = deque(maxlen=LAG_SAMPLES)
+        self.reports: deque[dict[str, Any]] = deque(maxlen=MAX_REPORTS)
+        self.stall_count = 0
+
+        self._last_beat = time.perf_counter()
+        self._loop_thread_id: int | None = None
+        # report being filled in for a stall that's still going on
+        self._pending: dict[str, Any] | None = None
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start watching the running event loop (call from the loop thread)."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(
+            target=self._watch, name="stall-watchdog", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.perf_counter() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+
+            self.lags.append(lag)
+            metrics.observe("event_loop_lag_seconds", lag)
+            self._last_beat = now
+
+            pending = self._pending
+            self._pending = None
+            if pending is None and lag > self.threshold:
+                # ended before the watch thread got a look at it
+                pending = {
+                    "time": datetime.now().isoformat(timespec="seconds"),
+                    "widget": None,
+                    "message": None,
+                    "stack": "(stack not captured)",
+                }
+            if pending is not None:
+                pending["duration"] = lag + HEARTBEAT_INTERVAL
+                self._finish_report(pending)
+
+    def _watch(self) -> None:
+        # the heartbeat is due every interval, so it's stalled once it's more
+        # than the threshold late
+        stalled_after = self.threshold + HEARTBEAT_INTERVAL
+
+        while not self._stop.wait(HEARTBEAT_INTERVAL / 2):
+            beat = self._last_beat
+            quiet = time.perf_counter() - beat
+            if self._pending is not None or quiet <= stalled_after:
+                continue
+
+            report = self._capture()
+            # drop it if the loop woke up while the stack was being captured
+            if self._last_beat == beat:
+                self._pending = report
+
+    def _capture(self) -> dict[str, Any] | None:
+        """Snapshot what the loop thread is doing right now."""
+        if self._loop_thread_id is None:
+            return None
+
+        frame = sys._current_frames().get(self._loop_thread_id)
+        widget, message = _handling(frame)
+        stack = traceback.format_stack(frame, limit=STACK_LIMIT) if frame else []
+
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "widget": widget,
+            "message": message,
+            "stack": "".join(stack),
+        }
+
+    def _finish_report(self, report: dict[str, Any]) -> None:
+        self.stall_count += 1
+        self.reports.append(report)
+        metrics.inc("event_loop_stalls_total")
+
+        if self.log_path is not None:
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(format_report(report) + "\n\n")
+            except OSError:
+                pass
+
+    def lag_percentiles(self) -> dict[str, float]:
+        samples = list(self.lags)
+        return {
+            "p50": _percentile(samples, 0.5),
+            "p95": _percentile(samples, 0.95),
+            "p99": _percentile(samples, 0.99),
+            "max": max(samples, default=0.0),
+        }
+
+    def summary(self) -> str:
+        """One line of lag percentiles and the latest stall, for the overlay."""
+        lags = self.lag_percentiles()
+        text = (
+            f"loop lag p50 {lags['p50'] * 1000:.1f} ms  "
+            f"p95 {lags['p95'] * 1000:.1f} ms  p99 {lags['p99'] * 1000:.1f} ms  "
+            f"max {lags['max'] * 1000:.0f} ms  stalls {self.stall_count}"
+        )
+        if self.reports:
+            last = self.reports[-1]
+            text += (
+                f"  last {last['duration'] * 1000:.0f} ms "
+                f"in {last['message'] or '?'} on {last['widget'] or '?'}"
+            )
+        return text
+
+
+def format_report(report: dict[str, Any]) -> str:
+    return (
+        f"[{report['time']}] event loop stalled for "
+        f"{report['duration'] * 1000:.0f} ms handling {report['message'] or '?'} "
+        f"on {report['widget'] or '?'}\n{report['stack']}"
+    ).rstrip()
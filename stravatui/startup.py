@@ -0,0 +1,84 @@
+# Startup timing, printed by `main.py --profile-startup`. Kept free of
+# third-party imports so it can be imported before anything else.
+
+import builtins
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+_START = time.perf_counter()
+
+# (name, start, end) in seconds since this module was imported
+_spans: list[tuple[str, float, float]] = []
+# top-level package -> (start, end) of its first import, when tracing imports
+_imports: dict[str, tuple[float, float]] = {}
+_original_import = builtins.__import__
+
+
+def _now() -> float:
+    return time.perf_counter() - _START
+
+
+def mark(name: str) -> None:
+    """Record a point in time, e.g. the first paint."""
+    now = _now()
+    _spans.append((name, now, now))
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Record how long a block of startup work takes."""
+    start = _now()
+    try:
+        yield
+    finally:
+        _spans.append((name, start, _now()))
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    package = name.partition(".")[0]
+    if level or package in sys.modules or package in _imports:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _imports[package] = (_now(), 0.0)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _imports[package] = (_imports[package][0], _now())
+
+
+def trace_imports() -> None:
+    """
+    Time the first import of every top-level package from here on. Times
+    include anything a package imports in turn, like -X importtime's
+    cumulative column.
+    """
+    builtins.__import__ = _timed_import
+
+
+def report() -> str:
+    """Format everything recorded so far, in milliseconds since startup began."""
+    lines = ["startup profile (ms since main.py started)"]
+
+    if _imports:
+        lines.append("  imports")
+        for package, (start, end) in sorted(_imports.items(), key=lambda i: i[1][0]):
+            # only list the packages that cost something
+            if end - start >= 0.001:
+                lines.append(
+                    f"    {package:<28} at {start * 1000:>8.1f}  "
+                    f"took {(end - start) * 1000:>8.1f}"
+                )
+
+    lines.append("  init")
+    for name, start, end in sorted(_spans, key=lambda s: s[1]):
+        if end == start:
+            lines.append(f"    {name:<28} at {start * 1000:>8.1f}")
+        else:
+            lines.append(
+                f"    {name:<28} at {start * 1000:>8.1f}  "
+                f"took {(end - start) * 1000:>8.1f}"
+            )
+
+    return "\n".join(lines)
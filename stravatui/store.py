@@ -0,0 +1,361 @@
+# Local store of the athlete's full activity history, with persisted sort indexes
+
+import json
+import os
+import tempfile
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from . import metrics, tracing
+from .auth import _initialise_strava_client
+from .data_manager import _data_dir
+
+# bump when the layout of the store files changes so they get rebuilt
+STORE_VERSION = 1
+
+# columns kept per activity, in the same parallel-list layout as activities.json
+STORE_COLUMNS = (
+    "ids",
+    "names",
+    "start_dates",
+    "activity_type",
+    "distances",
+    "times",
+    "total_elevation_gain",
+    "average_heartrate",
+)
+
+# sort key -> whether it's shown largest first by default
+SORT_KEYS = {
+    "date": True,
+    "distance": True,
+    "pace": False,
+    "heartrate": True,
+}
+
+# appending more than 1/REBUILD_FRACTION of the history at once sorts the
+# indexes afresh rather than insorting each new activity
+REBUILD_FRACTION = 16
+
+
+def _store_dir(athlete: str | None = None) -> Path:
+    # kept in its own directory so the 24 hour cache purge leaves it alone
+    store_dir = _data_dir(athlete) / "store"
+    store_dir.mkdir(exist_ok=True)
+    return store_dir
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    # a temporary file of its own per write, so threads saving the same file
+    # never write into each other's
+    with tracing.span("cache write", file=f"store/{path.name}") as span:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp", delete=False
+        ) as f:
+            try:
+                json.dump(payload, f, separators=(",", ":"))
+                span.set(bytes=f.tell())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+
+        os.replace(f.name, path)
+
+
+def _read_json(path: Path) -> Any:
+    with tracing.span("cache read", file=f"store/{path.name}") as span:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+                span.set(bytes=f.tell())
+            return data
+        except (OSError, ValueError):
+            return None
+
+
+class SortOrder(Sequence):
+    """
+    Store positions in sort order, ascending or descending. Activities without
+    a value for the sort key always come last. Slicing reads straight out of
+    the index, so taking a window never touches the rest of the history.
+    """
+
+    def __init__(self, order: list[int], nulls: list[int], descending: bool) -> None:
+        self._order = order
+        self._nulls = nulls
+        self.descending = descending
+
+    def __len__(self) -> int:
+        return len(self._order) + len(self._nulls)
+
+    def _position(self, i: int) -> int:
+        n_valid = len(self._order)
+        if i >= n_valid:
+            return self._nulls[i - n_valid]
+        if self.descending:
+            return self._order[n_valid - 1 - i]
+        return self._order[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._position(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._position(i)
+
+
+class ActivityStore:
+    """Full activity history for one athlete, stored column-wise on disk."""
+
+    def __init__(self, athlete: str | None = None) -> None:
+        self.athlete = athlete
+        self.path = _store_dir(athlete) / "history.json"
+        self.index_path = _store_dir(athlete) / "indexes.json"
+
+        self.columns: dict[str, list] = {column: [] for column in STORE_COLUMNS}
+        self.indexes: dict[str, dict[str, list[int]]] = {}
+        self._ids: set[int] = set()
+        # sort key -> each position's rank in that key's order, built on demand
+        self._ranks: dict[str, list[int]] = {}
+        # sort key -> the values along its order, for bisecting, built on demand
+        self._key_values: dict[str, list] = {}
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.columns["ids"])
+
+    def __contains__(self, activity_id: int) -> bool:
+        return activity_id in self._ids
+
+    def _load(self) -> None:
+        history = _read_json(self.path)
+        if not history or history.get("version") != STORE_VERSION:
+            return
+
+        self.columns = {column: history["columns"][column] for column in STORE_COLUMNS}
+        self._ids = set(self.columns["ids"])
+
+        indexes = _read_json(self.index_path)
+        if indexes and indexes.get("count") == len(self):
+            self.indexes = indexes["indexes"]
+        else:
+            self.rebuild_indexes()
+
+    def save(self) -> None:
+        # the count the indexes were built over, so indexes left behind by
+        # add_activities(index=False) are rebuilt on the next load
+        index = self.indexes.get("date", {"order": [], "nulls": []})
+        indexed = len(index["order"]) + len(index["nulls"])
+
+        _write_json(self.path, {"version": STORE_VERSION, "columns": self.columns})
+        _write_json(self.index_path, {"count": indexed, "indexes": self.indexes})
+
+    def _sort_values(self, key: str, start: int = 0) -> list:
+        """
+        Values the activities from position `start` on are ordered by for a
+        sort key (None if missing).
+        """
+        columns = self.columns
+
+        if key == "date":
+            return columns["start_dates"][start:]
+        if key == "distance":
+            return columns["distances"][start:]
+        if key == "heartrate":
+            return [hr or None for hr in columns["average_heartrate"][start:]]
+        if key == "pace":
+            # seconds per metre, lower is faster
+            return [
+                time / distance if distance else None
+                for time, distance in zip(
+                    columns["times"][start:], columns["distances"][start:]
+                )
+            ]
+
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def _sorted_values(self, key: str) -> list:
+        """`key`'s values in the order of its index, kept until it's rebuilt."""
+        sorted_values = self._key_values.get(key)
+        if sorted_values is None:
+            values = self._sort_values(key)
+            sorted_values = [values[i] for i in self.indexes[key]["order"]]
+            self._key_values[key] = sorted_values
+
+        return sorted_values
+
+    @tracing.traced()
+    def rebuild_indexes(self) -> None:
+        """Sort every index key once, so queries only ever slice."""
+        self.indexes = {}
+        self._ranks = {}
+        self._key_values = {}
+        for key in SORT_KEYS:
+            values = self._sort_values(key)
+            present = [i for i, value in enumerate(values) if value is not None]
+            self.indexes[key] = {
+                "order": sorted(present, key=values.__getitem__),
+                "nulls": [i for i, value in enumerate(values) if value is None],
+            }
+
+    def _insert_indexes(self, start: int) -> None:
+        """Insort the activities from position `start` on into every index."""
+        self._ranks = {}
+        for key in SORT_KEYS:
+            index = self.indexes[key]
+            sorted_values = self._sorted_values(key)
+            for i, value in enumerate(self._sort_values(key, start), start):
+                if value is None:
+                    index["nulls"].append(i)
+                    continue
+                # after equal values, as a full sort keeps ties in position order
+                n = bisect_right(sorted_values, value)
+                index["order"].insert(n, i)
+                sorted_values.insert(n, value)
+
+    def add_activities(
+        self, records: list[dict[str, Any]], index: bool = True
+    ) -> int:
+        """
+        Append activities not already in the store and return how many were
+        new. They're insorted into the indexes, unless `index` is False for a
+        caller that calls rebuild_indexes once it's added everything.
+        """
+        start = len(self)
+        added = 0
+        for record in records:
+            if record["ids"] in self._ids:
+                continue
+
+            self._ids.add(record["ids"])
+            for column in STORE_COLUMNS:
+                self.columns[column].append(record[column])
+            added += 1
+
+        if not added or not index:
+            return added
+
+        # each insort shifts the order along, so sorting afresh is quicker for
+        # a batch that's big next to the history
+        if not self.indexes or added > len(self) // REBUILD_FRACTION:
+            self.rebuild_indexes()
+        else:
+            self._insert_indexes(start)
+
+        return added
+
+    def latest_start_date(self) -> datetime | None:
+        latest = max((date for date in self.columns["start_dates"] if date), default="")
+        return datetime.fromisoformat(latest) if latest else None
+
+    @metrics.timed("store_query_seconds", query="sorted_positions")
+    def sorted_positions(self, key: str, descending: bool | None = None) -> SortOrder:
+        """Every activity position ordered by `key` (default direction if None)."""
+        if descending is None:
+            descending = SORT_KEYS[key]
+
+        index = self.indexes[key]
+        return SortOrder(index["order"], index["nulls"], descending)
+
+    @metrics.timed("store_query_seconds", query="range_positions")
+    def range_positions(self, key: str, low: Any = None, high: Any = None) -> list[int]:
+        """
+        Positions whose `key` value is within [low, high] (either end open if
+        None), found by bisecting the key's index rather than scanning.
+        """
+        order = self.indexes[key]["order"]
+        sorted_values = self._sorted_values(key)
+
+        start = 0 if low is None else bisect_left(sorted_values, low)
+        end = len(order) if high is None else bisect_right(sorted_values, high)
+
+        return order[start:end]
+
+    def _rank(self, key: str) -> list[int]:
+        """Each position's place in `key`'s ascending order, missing values last."""
+        ranks = self._ranks.get(key)
+        if ranks is None:
+            index = self.indexes[key]
+            ranks = [0] * len(self)
+            for rank, i in enumerate(index["order"] + index["nulls"]):
+                ranks[i] = rank
+            self._ranks[key] = ranks
+
+        return ranks
+
+    @metrics.timed("store_query_seconds", query="sort_subset")
+    def sort_subset(
+        self, positions: Iterable[int], key: str, descending: bool | None = None
+    ) -> list[int]:
+        """Order a subset of positions by `key` in O(k log k) for k positions."""
+        if descending is None:
+            descending = SORT_KEYS[key]
+
+        ranks = self._rank(key)
+        n_valid = len(self.indexes[key]["order"])
+
+        if not descending:
+            return sorted(positions, key=ranks.__getitem__)
+
+        def descending_rank(i: int) -> int:
+            # reverse the valid ranks but keep activities without a value last
+            rank = ranks[i]
+            return rank if rank >= n_valid else n_valid - 1 - rank
+
+        return sorted(positions, key=descending_rank)
+
+    @metrics.timed("store_query_seconds", query="rows")
+    def rows(self, positions: Sequence[int]) -> list[dict[str, Any]]:
+        """Return the activities at the given positions as row dicts."""
+        columns = self.columns
+        return [
+            {column: columns[column][i] for column in STORE_COLUMNS}
+            for i in positions
+        ]
+
+
+def _activity_record(activity) -> dict[str, Any]:
+    """Pick the stored columns out of a stravalib summary activity."""
+    return {
+        "ids": activity.id,
+        "names": str(activity.name),
+        "start_dates": activity.start_date.isoformat() if activity.start_date else "",
+        "activity_type": str(activity.type),
+        "distances": float(activity.distance or 0),
+        "times": int(activity.moving_time or 0),
+        "total_elevation_gain": float(activity.total_elevation_gain or 0),
+        "average_heartrate": (
+            float(activity.average_heartrate) if activity.average_heartrate else None
+        ),
+    }
+
+
+@tracing.traced()
+def sync_history(athlete: str | None = None) -> ActivityStore:
+    """
+    Bring the local store up to date and return it. The first sync pages
+    through the whole history, after that only activities newer than the
+    latest one stored are fetched.
+    """
+    store = ActivityStore(athlete)
+    client = _initialise_strava_client(athlete)
+
+    if not client.access_token:
+        return store
+
+    latest = store.latest_start_date()
+    activities = (
+        client.get_activities(after=latest) if latest else client.get_activities()
+    )
+
+    if store.add_activities([_activity_record(act) for act in activities]):
+        store.save()
+
+    return store
@@ -0,0 +1,302 @@
+# Per-activity metrics worked out from a track's streams. Each takes a track
+# (typed arrays or memoryviews, see tracks.py) and returns a JSON-serialisable
+# value, and is registered in METRICS for the batch engine in analytics.py
+
+import math
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from functools import partial
+from typing import Any
+
+from .tracks import Track
+
+NAN = math.nan
+
+# name -> distance in metres, shortest first
+BEST_EFFORT_DISTANCES = {
+    "400m": 400.0,
+    "1k": 1000.0,
+    "1 mile": 1609.344,
+    "5k": 5000.0,
+    "10k": 10000.0,
+    "half marathon": 21097.5,
+    "marathon": 42195.0,
+}
+
+
+def best_efforts(track: Track) -> dict[str, float]:
+    """
+    Fastest time in seconds over each best-effort distance the activity
+    covers, with the start of each window interpolated between points.
+    """
+    if track.get("distance") is None or not len(track["time"]):
+        return {}
+
+    # plain lists index much faster than arrays or memoryviews in the loop
+    distance = track["distance"].tolist()
+    times = track["time"].tolist()
+    total = distance[-1]
+    efforts = {}
+
+    for name, target in BEST_EFFORT_DISTANCES.items():
+        if not total >= target:
+            break
+
+        best = float("inf")
+        i = 0
+        for j, end in enumerate(distance):
+            if end < target:
+                continue
+
+            # slide the window start to the last point at or before end - target
+            start = end - target
+            while distance[i + 1] <= start:
+                i += 1
+
+            d0, d1 = distance[i], distance[i + 1]
+            t0 = times[i]
+            if d1 > d0:
+                t0 += (times[i + 1] - t0) * (start - d0) / (d1 - d0)
+            if times[j] - t0 < best:
+                best = times[j] - t0
+
+        efforts[name] = round(best, 1)
+
+    return efforts
+
+
+# altitude is averaged over this many metres either side of each point before
+# grades are taken, evening out GPS and barometer noise
+ALTITUDE_WINDOW = 30.0
+# grades beyond this are clamped, past the range the cost model was fitted to
+MAX_GRADE = 0.45
+# energy cost of running on the flat, J/kg/m
+FLAT_COST = 3.6
+
+
+def smooth_altitude(altitude: list[float], distance: list[float]) -> list[float]:
+    """
+    Centred moving average of altitude over ALTITUDE_WINDOW metres either side,
+    kept as a running sum between two pointers so it's one pass. Points with
+    no reading in their window are NaN.
+    """
+    points = len(altitude)
+    smoothed = [NAN] * points
+    low = high = 0
+    total = 0.0
+    count = 0
+
+    for i in range(points):
+        while high < points and distance[high] <= distance[i] + ALTITUDE_WINDOW:
+            if altitude[high] == altitude[high]:
+                total += altitude[high]
+                count += 1
+            high += 1
+        while distance[low] < distance[i] - ALTITUDE_WINDOW:
+            if altitude[low] == altitude[low]:
+                total -= altitude[low]
+                count -= 1
+            low += 1
+
+        if count:
+            smoothed[i] = total / count
+
+    return smoothed
+
+
+def running_cost(grade: float) -> float:
+    """Energy cost of running (J/kg/m) at a grade, Minetti et al. (2002)."""
+    g = max(-MAX_GRADE, min(MAX_GRADE, grade))
+    return ((((155.4 * g - 30.4) * g - 43.3) * g + 46.3) * g + 19.5) * g + 3.6
+
+
+def equivalent_distance(track: Track) -> tuple[list[float], list[float]] | None:
+    """
+    Smoothed altitude and the flat-equivalent metres covered up to each point:
+    each step's distance scaled by the cost of running its grade relative to
+    the flat. Steps without altitude either side count as flat. None without
+    distance and altitude streams. Kept on the track, as several metrics use it.
+    """
+    if "_equivalent_distance" in track:
+        return track["_equivalent_distance"]
+    if track.get("distance") is None or track.get("altitude") is None:
+        return None
+
+    distance = track["distance"].tolist()
+    smoothed = smooth_altitude(track["altitude"].tolist(), distance)
+    equivalent = [0.0] * len(distance)
+
+    total = 0.0
+    for i in range(1, len(distance)):
+        step = distance[i] - distance[i - 1]
+        rise = smoothed[i] - smoothed[i - 1]
+        if step > 0 and rise == rise:
+            step *= running_cost(rise / step) / FLAT_COST
+        total += step
+        equivalent[i] = total
+
+    track["_equivalent_distance"] = smoothed, equivalent
+    return smoothed, equivalent
+
+
+def grade_adjusted(track: Track) -> dict[str, float]:
+    """
+    Flat-equivalent distance of the activity and its grade factor, the ratio
+    of real to flat-equivalent distance. Multiplying any pace for the
+    activity by the factor gives its grade-adjusted pace.
+    """
+    profile = equivalent_distance(track)
+    if profile is None or not len(track["time"]) or not track["distance"][-1] > 0:
+        return {}
+
+    smoothed, equivalent = profile
+    total = track["distance"][-1]
+    gain = sum(
+        max(0.0, b - a) for a, b in zip(smoothed, smoothed[1:]) if a == a and b == b
+    )
+
+    return {
+        "equivalent_distance": round(equivalent[-1], 1),
+        "factor": round(total / equivalent[-1], 4),
+        "smoothed_gain": round(gain, 1),
+    }
+
+
+# split length in metres by unit
+SPLIT_UNITS = {"km": 1000.0, "mile": 1609.344}
+# a final part split shorter than this (metres) is left off
+MIN_PART_SPLIT = 50.0
+
+
+def _interpolate(xs: Sequence[float], ys: Sequence[float], x: float) -> float:
+    """ys at x, linear between the points either side (xs ascending)."""
+    i = bisect_left(xs, x)
+    if i == 0:
+        return ys[0]
+    if i == len(xs):
+        return ys[-1]
+
+    x0, x1 = xs[i - 1], xs[i]
+    if x1 == x0:
+        return ys[i]
+    return ys[i - 1] + (ys[i] - ys[i - 1]) * (x - x0) / (x1 - x0)
+
+
+def splits(track: Track, unit: float) -> list[dict[str, float | None]]:
+    """
+    Time, elevation change, average heart rate and flat-equivalent distance
+    (for grade-adjusted pace) over each `unit` metres of the activity, plus a
+    final part split. Every boundary is interpolated between the points
+    either side, and heart rate is averaged over time from a running total,
+    so each split costs a couple of bisections.
+    """
+    if track.get("distance") is None or not len(track["time"]):
+        return []
+
+    distance = track["distance"].tolist()
+    times = track["time"].tolist()
+    total = distance[-1]
+    if not total >= MIN_PART_SPLIT:
+        return []
+
+    boundaries = [unit * k for k in range(1, int(total // unit) + 1)]
+    if total - (boundaries[-1] if boundaries else 0.0) >= MIN_PART_SPLIT:
+        boundaries.append(total)
+
+    altitude, equivalent = equivalent_distance(track) or (None, None)
+
+    # running totals of heart rate x seconds and of seconds with a reading,
+    # so the average between any two times is a difference of interpolations
+    beats = weight = None
+    heartrate = track.get("heartrate")
+    if heartrate is not None:
+        beats, weight = [0.0], [0.0]
+        for i in range(1, len(times)):
+            step = times[i] - times[i - 1]
+            hr = heartrate[i]
+            beats.append(beats[-1] + (hr * step if hr else 0.0))
+            weight.append(weight[-1] + (step if hr else 0.0))
+
+    def over(column: list[float], t0: float, t1: float) -> float:
+        return _interpolate(times, column, t1) - _interpolate(times, column, t0)
+
+    result = []
+    start, start_time = 0.0, times[0]
+    start_altitude = altitude[0] if altitude else None
+    for end in boundaries:
+        end_time = _interpolate(distance, times, end)
+
+        elevation = None
+        end_altitude = _interpolate(distance, altitude, end) if altitude else None
+        if end_altitude is not None and start_altitude is not None:
+            # NaN when either end has no altitude reading
+            change = end_altitude - start_altitude
+            elevation = round(change, 1) if change == change else None
+
+        average_hr = None
+        if beats is not None and weight is not None:
+            seconds = over(weight, start_time, end_time)
+            if seconds > 0:
+                average_hr = round(over(beats, start_time, end_time) / seconds, 1)
+
+        flat_distance = None
+        if equivalent is not None:
+            flat_distance = round(
+                _interpolate(distance, equivalent, end)
+                - _interpolate(distance, equivalent, start),
+                1,
+            )
+
+        result.append({
+            "distance": round(end - start, 1),
+            "time": round(end_time - start_time, 1),
+            "elevation": elevation,
+            "heartrate": average_hr,
+            "flat_distance": flat_distance,
+        })
+        start, start_time, start_altitude = end, end_time, end_altitude
+
+    return result
+
+
+# a gap between heart rate readings longer than this (seconds) is a pause,
+# and only this much of it is counted at the reading after it
+MAX_READING_GAP = 30.0
+
+
+def heartrate_histogram(track: Track) -> dict[str, Any]:
+    """
+    Seconds spent at each whole bpm, as the lowest bpm seen and a list of
+    seconds from there up. Zones of any boundaries are sums over this, so
+    changing them never means reading streams again.
+    """
+    heartrate = track.get("heartrate")
+    if heartrate is None or len(heartrate) < 2:
+        return {}
+
+    times = track["time"].tolist()
+    seconds = [0.0] * (max(heartrate) + 1)
+    for i, bpm in enumerate(heartrate.tolist()[1:], 1):
+        if bpm:
+            seconds[bpm] += min(times[i] - times[i - 1], MAX_READING_GAP)
+
+    low = next((bpm for bpm, spent in enumerate(seconds) if spent), None)
+    if low is None:
+        return {}
+
+    return {
+        "start": track["start"],
+        "low": low,
+        "seconds": [round(spent, 1) for spent in seconds[low:]],
+    }
+
+
+# name -> (version, function). Bump a metric's version when its output
+# changes, and every activity's value is recomputed on the next run
+METRICS: dict[str, tuple[int, Callable[[Track], Any]]] = {
+    "best_efforts": (1, best_efforts),
+    "splits_km": (2, partial(splits, unit=SPLIT_UNITS["km"])),
+    "splits_mile": (2, partial(splits, unit=SPLIT_UNITS["mile"])),
+    "grade_adjusted": (1, grade_adjusted),
+    "heartrate_histogram": (1, heartrate_histogram),
+}
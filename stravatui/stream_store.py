@@ -0,0 +1,180 @@
+# Local store of activity streams (time, position, altitude, distance, heart
+# rate, cadence), one compact binary file per activity: a small header
+# followed by each stream's raw array bytes, little-endian
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import tracing
+from .data_manager import _data_dir
+from .tracks import TRACK_COLUMNS, Track
+
+STREAM_MAGIC = b"STRM"
+# bump when the file layout changes, older files are then treated as missing
+STREAM_VERSION = 1
+# magic, version, point count, start (unix seconds), bitmask of streams stored
+HEADER = struct.Struct("<4sBIdB")
+
+
+def streams_dir(athlete: str | None = None) -> Path:
+    # next to the history store, out of reach of the 24 hour cache purge
+    directory = _data_dir(athlete) / "store" / "streams"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _stream_path(directory: Path, activity_id: int) -> Path:
+    return directory / f"{activity_id}.streams"
+
+
+def stored_tracks(directory: Path) -> dict[int, Path]:
+    """Activity id -> stream file for every activity in the stream store."""
+    return {
+        int(path.stem): path
+        for path in directory.glob("*.streams")
+        if path.stem.isdigit()
+    }
+
+
+def encode_track(track: Track) -> bytes:
+    points = len(track["time"])
+    mask = 0
+    parts = []
+
+    for bit, name in enumerate(TRACK_COLUMNS):
+        column = track.get(name)
+        if column is None:
+            continue
+        if len(column) != points:
+            raise ValueError(f"{name} has {len(column)} points, time has {points}")
+
+        mask |= 1 << bit
+        if sys.byteorder == "big":
+            column = array(column.typecode, column)
+            column.byteswap()
+        parts.append(column.tobytes())
+
+    header = HEADER.pack(STREAM_MAGIC, STREAM_VERSION, points, track["start"], mask)
+    return header + b"".join(parts)
+
+
+def decode_track(data: bytes | memoryview) -> Track | None:
+    """Rebuild a track from encode_track's bytes (None if the layout is old)."""
+    magic, version, points, start, mask = HEADER.unpack_from(data)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        return None
+
+    track: Track = {"start": start}
+    pos = HEADER.size
+    for bit, (name, code) in enumerate(TRACK_COLUMNS.items()):
+        if not mask & (1 << bit):
+            continue
+
+        column = array(code)
+        size = points * column.itemsize
+        column.frombytes(data[pos : pos + size])
+        if sys.byteorder == "big":
+            column.byteswap()
+        track[name] = column
+        pos += size
+
+    return track
+
+
+def save_track(directory: Path, activity_id: int, track: Track) -> int:
+    """Write an activity's streams, returning the bytes written."""
+    path = _stream_path(directory, activity_id)
+    data = encode_track(track)
+
+    # a temporary file of its own per write, so workers saving the same
+    # activity never write into each other's
+    with tempfile.NamedTemporaryFile(
+        dir=directory, prefix=f".{path.stem}-", suffix=".tmp", delete=False
+    ) as f:
+        try:
+            f.write(data)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+
+    os.replace(f.name, path)
+
+    return len(data)
+
+
+def load_track(activity_id: int, athlete: str | None = None) -> Track | None:
+    """An activity's stored streams, or None if they haven't been stored."""
+    path = _stream_path(streams_dir(athlete), activity_id)
+
+    with tracing.span("cache read", file=f"streams/{path.name}") as span:
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        span.set(bytes=len(data))
+
+    try:
+        return decode_track(data)
+    except struct.error:
+        return None
+
+
+@contextmanager
+def mapped_track(path: Path) -> Iterator[Track | None]:
+    """
+    Map a stream file into memory and yield its track with each column a
+    typed memoryview over the mapping, so nothing is copied or unpickled
+    (None if the file is from an older layout or truncated). The views are
+    only valid inside the `with` block. Big-endian machines get arrays.
+    """
+    with open(path, "rb") as f:
+        if sys.byteorder == "big":
+            yield decode_track(f.read())
+            return
+
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            yield None
+            return
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(mapped)
+        views = [data]
+        try:
+            magic, version, points, start, mask = HEADER.unpack_from(data)
+            track: Track | None = {"start": start}
+            if magic != STREAM_MAGIC or version != STREAM_VERSION:
+                track = None
+
+            pos = HEADER.size
+            for bit, (name, code) in enumerate(TRACK_COLUMNS.items()):
+                if track is None or not mask & (1 << bit):
+                    continue
+
+                size = points * struct.calcsize(code)
+                if pos + size > len(data):
+                    track = None
+                    continue
+
+                views.append(data[pos : pos + size])
+                views.append(views[-1].cast(code))
+                track[name] = views[-1]
+                pos += size
+
+            yield track
+        finally:
+            for view in reversed(views):
+                view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # a view sliced from a column is still alive, the mapping is
+                # closed when that's collected instead
+                pass
@@ -0,0 +1,260 @@
+# Batched sync of many athletes sharing one Strava rate-limit budget
+
+import argparse
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from . import metrics
+from .auth import list_athletes, set_athlete_session, validate_athlete
+from .data_manager import (
+    all_time_run_stats,
+    get_best_efforts,
+    get_recent_activities,
+    ytd_run_stats,
+)
+
+# Strava's default read limit per 15 minute window
+DEFAULT_BUDGET = 100
+BUDGET_WINDOW = 15 * 60
+
+# cached resources refreshed for each athlete, in the order they're scheduled.
+# Each is called with the athlete and refresh=True, and only replaces its cache
+# file once the fetch has succeeded
+SYNC_STAGES: dict[str, Callable[..., object]] = {
+    "activities": get_recent_activities,
+    "all_time": all_time_run_stats,
+    "ytd": ytd_run_stats,
+    "best_efforts": get_best_efforts,
+}
+
+
+class RateBudgetExhausted(Exception):
+    """Raised when the shared request budget runs out and waiting is disabled."""
+
+
+class RateBudget:
+    """
+    Request budget for one Strava rate-limit window, shared by every athlete
+    in a sync. The local count is reconciled with the usage Strava reports in
+    its rate-limit headers, since the limit applies to the whole application.
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_BUDGET,
+        window: float = BUDGET_WINDOW,
+        wait: bool = False,
+    ):
+        self.limit = limit
+        self.window = window
+        self.wait = wait
+        self.used_by: dict[str, int] = defaultdict(int)
+        self._used = 0
+        self._window_start = time.monotonic()
+        self._cond = threading.Condition()
+
+    @property
+    def remaining(self) -> int:
+        with self._cond:
+            return max(0, self.limit - self._used)
+
+    def _roll_window(self) -> None:
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._used = 0
+            self._cond.notify_all()
+
+    def acquire(self, athlete: str) -> None:
+        """Take one request from the budget, on behalf of an athlete."""
+        with self._cond:
+            self._roll_window()
+            while self._used >= self.limit:
+                if not self.wait:
+                    raise RateBudgetExhausted(
+                        f"Rate-limit budget of {self.limit} requests used up"
+                    )
+                elapsed = time.monotonic() - self._window_start
+                self._cond.wait(max(0.0, self.window - elapsed))
+                self._roll_window()
+
+            self._used += 1
+            self.used_by[athlete] += 1
+
+    def update_from_headers(self, headers) -> None:
+        """Reconcile the budget with Strava's X-ReadRateLimit-* headers."""
+        usage = headers.get("X-ReadRateLimit-Usage") or headers.get(
+            "X-RateLimit-Usage"
+        )
+        limit = headers.get("X-ReadRateLimit-Limit") or headers.get(
+            "X-RateLimit-Limit"
+        )
+        if not usage or not limit:
+            return
+
+        try:
+            window_usage = int(usage.split(",")[0])
+            window_limit = int(limit.split(",")[0])
+        except ValueError:
+            return
+
+        with self._cond:
+            self._used = max(self._used, window_usage)
+            self.limit = min(self.limit, window_limit)
+
+
+class BudgetedSession(requests.Session):
+    """A requests session that charges every request to a shared RateBudget."""
+
+    def __init__(self, budget: RateBudget, athlete: str):
+        super().__init__()
+        self.budget = budget
+        self.athlete = athlete
+
+    def request(self, method, url, *args, **kwargs):
+        self.budget.acquire(self.athlete)
+        response = super().request(method, url, *args, **kwargs)
+        self.budget.update_from_headers(response.headers)
+        return response
+
+
+def _fair_schedule(athletes: list[str], stages: list[str]) -> list[tuple[str, str]]:
+    """
+    Order tasks round-robin so every athlete gets a stage before any athlete
+    gets its next one. If the budget runs out part way through, the remaining
+    failures are spread evenly across athletes rather than hitting the last few.
+    """
+    return [(athlete, stage) for stage in stages for athlete in athletes]
+
+
+def sync_athletes(
+    athletes: list[str],
+    budget: RateBudget,
+    max_workers: int = 4,
+    stages: list[str] | None = None,
+) -> dict[str, dict]:
+    """
+    Refresh the cached data of several athletes concurrently and return a per
+    athlete report of completed and failed stages, elapsed time, API calls and
+    throughput. A stage that fails leaves that resource's last good cache in
+    place.
+    """
+    stages = stages or list(SYNC_STAGES)
+    report: dict[str, dict] = {
+        athlete: {"completed": [], "failed": {}, "started": None, "finished": None}
+        for athlete in athletes
+    }
+    report_lock = threading.Lock()
+
+    for athlete in athletes:
+        validate_athlete(athlete)
+        set_athlete_session(athlete, BudgetedSession(budget, athlete))
+
+    def run_task(athlete: str, stage: str) -> None:
+        # an athlete's stages interleave with everyone else's, so its time is
+        # from its first stage starting to its last one finishing
+        with report_lock:
+            if report[athlete]["started"] is None:
+                report[athlete]["started"] = time.perf_counter()
+        try:
+            SYNC_STAGES[stage](athlete, refresh=True)
+        except Exception as e:
+            with report_lock:
+                report[athlete]["failed"][stage] = str(e)
+        else:
+            with report_lock:
+                report[athlete]["completed"].append(stage)
+        finally:
+            with report_lock:
+                report[athlete]["finished"] = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for athlete, stage in _fair_schedule(athletes, stages):
+                executor.submit(run_task, athlete, stage)
+    finally:
+        for athlete in athletes:
+            set_athlete_session(athlete, None)
+
+    for athlete, entry in report.items():
+        started, finished = entry.pop("started"), entry.pop("finished")
+        entry["elapsed"] = finished - started if started is not None else 0.0
+        calls = budget.used_by.get(athlete, 0)
+        entry["api_calls"] = calls
+        entry["calls_per_sec"] = calls / entry["elapsed"] if entry["elapsed"] else 0.0
+
+    return report
+
+
+def format_report(report: dict[str, dict], budget: RateBudget) -> str:
+    """Format a sync report as a plain text table."""
+    lines = [
+        f"{'athlete':<20} {'ok':>4} {'failed':>6} {'calls':>6} "
+        f"{'calls/s':>8} {'time (s)':>9}"
+    ]
+    for athlete, entry in report.items():
+        lines.append(
+            f"{athlete:<20} {len(entry['completed']):>4} {len(entry['failed']):>6} "
+            f"{entry['api_calls']:>6} {entry['calls_per_sec']:>8.2f} "
+            f"{entry['elapsed']:>9.2f}"
+        )
+        for stage, error in entry["failed"].items():
+            lines.append(f"    {stage}: {error}")
+
+    used = sum(budget.used_by.values())
+    lines.append(f"budget used {used}, remaining {budget.remaining} of {budget.limit}")
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh cached data for a team")
+    parser.add_argument(
+        "athletes", nargs="*", help="athletes to sync (default: all with tokens)"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET)
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="wait for the next rate-limit window instead of failing",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        metavar="FILE",
+        help="write API usage and cache metrics to FILE ('-' for stdout)",
+    )
+    parser.add_argument(
+        "--metrics-format", choices=("prometheus", "json"), default="prometheus"
+    )
+    args = parser.parse_args(argv)
+
+    athletes = args.athletes or list_athletes()
+    if not athletes:
+        parser.error("no athletes given and no tokens found in tokens/")
+
+    budget = RateBudget(limit=args.budget, wait=args.wait)
+    report = sync_athletes(athletes, budget, max_workers=args.workers)
+    print(format_report(report, budget))
+
+    if args.metrics:
+        text = (
+            metrics.prometheus_text()
+            if args.metrics_format == "prometheus"
+            else metrics.json_text()
+        )
+        if str(args.metrics) == "-":
+            print(text)
+        else:
+            args.metrics.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
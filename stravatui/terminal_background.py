@@ -1,15 +1,24 @@
+import json
 import os
 import re
 import select
+import sys
 import termios
+import threading
 import time
 import tty
+from concurrent.futures import Future
+from pathlib import Path
 
 OSC11_QUERY = b"\x1b]11;?\x07"  # OSC 11 query, BEL-terminated
 OSC11_RE = re.compile(
     r"11;rgb:([0-9a-fA-F]{2,4})/([0-9a-fA-F]{2,4})/([0-9a-fA-F]{2,4})"
 )
 
+# probe results per terminal session, so only the first launch in a terminal waits
+CACHE_FILE = Path(__file__).parent / "data" / "terminal_background.json"
+CACHE_SIZE = 32
+
 
 def _hex_to_8bit(part: str) -> int:
     value = int(part, 16)
@@ -69,6 +78,86 @@ def query_terminal_background(timeout: float = 0.12) -> None | tuple:
         os.close(fd)
 
 
+def _session_key() -> str | None:
+    """
+    Identify the current terminal session by its type, tty and session id (the
+    shell that owns the terminal), or None if there's no terminal to key on.
+    """
+    try:
+        tty_name = os.ttyname(sys.stdin.fileno())
+        session_id = os.getsid(0)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+    term = os.getenv("TERM", "")
+    colorterm = os.getenv("COLORTERM", "")
+
+    return f"{term}|{colorterm}|{tty_name}|{session_id}"
+
+
+def _read_cache() -> dict[str, list[int] | None]:
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache: dict[str, list[int] | None]) -> None:
+    # keep only the most recent sessions
+    cache = dict(list(cache.items())[-CACHE_SIZE:])
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = CACHE_FILE.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, CACHE_FILE)
+    except OSError:
+        pass
+
+
+def cached_terminal_background(timeout: float = 0.12) -> None | tuple:
+    """
+    Return the terminal background like query_terminal_background, but only
+    probe the terminal once per terminal session. No answer isn't cached, as
+    the probe may only have timed out on a busy terminal.
+    """
+    key = _session_key()
+    if key is None:
+        return query_terminal_background(timeout)
+
+    cache = _read_cache()
+    # caches written before misses were left out can hold None
+    if cache.get(key) is not None:
+        return tuple(cache[key])
+
+    rgb = query_terminal_background(timeout)
+    if rgb is not None:
+        cache[key] = list(rgb)
+        _write_cache(cache)
+
+    return rgb
+
+
+def start_terminal_background_query(timeout: float = 0.12) -> Future:
+    """
+    Look up the terminal background in a background thread so the wait for
+    the terminal's reply overlaps with other startup work. The result must be
+    collected (future.result()) before anything else takes over the terminal.
+    """
+    future: Future = Future()
+
+    def run() -> None:
+        try:
+            future.set_result(cached_terminal_background(timeout))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="terminal-background", daemon=True).start()
+
+    return future
+
+
 def is_dark(rgb: tuple[int, int, int]) -> bool:
     r, g, b = rgb
 
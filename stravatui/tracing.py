@@ -0,0 +1,222 @@
+# Lightweight tracing of the load pipeline: nested spans with wall time,
+# thread and payload sizes, exportable as Chrome trace-event JSON
+#
+# Tracing is off unless enable() is called (`main.py --trace FILE`). While
+# it's off span() hands back a shared no-op and traced() costs one flag check.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sized
+from functools import wraps
+from pathlib import Path
+from typing import Any
+
+# oldest spans are dropped past this, so a long session can't grow unbounded
+MAX_EVENTS = 100_000
+
+_enabled = False
+_START = time.perf_counter()
+
+# (name, start, end, thread id, depth, args), times in seconds since _START
+_events: deque[tuple[str, float, float, int, int, dict[str, Any]]] = deque(
+    maxlen=MAX_EVENTS
+)
+_thread_names: dict[int, str] = {}
+_local = threading.local()
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def now() -> float:
+    """Seconds since tracing was imported, the clock every span uses."""
+    return time.perf_counter() - _START
+
+
+def payload_size(value: Any) -> int | None:
+    """
+    A rough size for span args: the row count of column-wise dicts (like
+    activities.json), len() of anything else sized, otherwise None.
+    """
+    if isinstance(value, dict) and value:
+        first = next(iter(value.values()))
+        if isinstance(first, list):
+            return len(first)
+    return len(value) if isinstance(value, Sized) else None
+
+
+def _stack() -> list["Span"]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+        thread = threading.current_thread()
+        _thread_names[threading.get_ident()] = thread.name
+    return stack
+
+
+class Span:
+    """A timed block of work, use via span()."""
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict[str, Any]) -> None:
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def set(self, **args: Any) -> None:
+        """Attach details known only once the work is done, e.g. bytes read."""
+        self.args.update(args)
+
+    def __enter__(self) -> "Span":
+        _stack().append(self)
+        self.start = now()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        end = now()
+        stack = _stack()
+        stack.pop()
+        if exc_info[0] is not None:
+            self.args["error"] = exc_info[0].__name__
+        _events.append(
+            (
+                self.name,
+                self.start,
+                end,
+                threading.get_ident(),
+                len(stack),
+                self.args,
+            )
+        )
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **args: Any) -> Span | _NullSpan:
+    """
+    Time a block of work as a span nested under any span already open on
+    this thread:
+
+        with tracing.span("cache read", file=path.name) as s:
+            ...
+            s.set(bytes=size)
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, args)
+
+
+def record(name: str, start: float, end: float, **args: Any) -> None:
+    """Add a span that has already finished, timed by the caller (see now())."""
+    if not _enabled:
+        return
+    _events.append((name, start, end, threading.get_ident(), len(_stack()), args))
+
+
+def traced(name: str | None = None) -> Callable:
+    """Decorator recording every call of a function as a span."""
+
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            with Span(label, {}) as s:
+                result = func(*args, **kwargs)
+                s.set(items=payload_size(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def events() -> list[dict[str, Any]]:
+    """Every recorded span as a dict, in the order they finished."""
+    return [
+        {
+            "name": name,
+            "start": start,
+            "end": end,
+            "thread": _thread_names.get(tid, str(tid)),
+            "depth": depth,
+            "args": args,
+        }
+        for name, start, end, tid, depth, args in list(_events)
+    ]
+
+
+def last_trace(root: str) -> list[dict[str, Any]]:
+    """
+    The spans of the most recent `root` span (e.g. "load"): the root itself
+    and everything that started while it ran, on any thread, by start time.
+    """
+    spans = events()
+    roots = [s for s in spans if s["name"] == root]
+    if not roots:
+        return []
+
+    last = max(roots, key=lambda s: s["start"])
+    within = [s for s in spans if last["start"] <= s["start"] <= last["end"]]
+
+    return sorted(within, key=lambda s: (s["start"], s["depth"]))
+
+
+def chrome_trace() -> dict[str, Any]:
+    """The recorded spans in Chrome's trace-event format (chrome://tracing)."""
+    pid = os.getpid()
+    trace_events: list[dict[str, Any]] = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": tid,
+            "args": {"name": thread_name},
+        }
+        for tid, thread_name in _thread_names.items()
+    ]
+
+    for name, start, end, tid, depth, args in list(_events):
+        trace_events.append({
+            "name": name,
+            "ph": "X",
+            "ts": start * 1_000_000,
+            "dur": (end - start) * 1_000_000,
+            "pid": pid,
+            "tid": tid,
+            "args": {k: v for k, v in args.items() if v is not None},
+        })
+
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path: Path) -> None:
+    with open(path, "w") as f:
+        json.dump(chrome_trace(), f, default=str)
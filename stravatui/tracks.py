@@ -0,0 +1,480 @@
+# Streaming GPX, TCX and FIT track parsers. A track is a dict of compact typed
+# arrays, one per stream, plus its start time:
+#
+#   {"start": 1615705954.0, "time": array("f"), "lat": array("d"), ...}
+#
+# Missing values are NaN in float columns and 0 in heart rate and cadence, and
+# streams with no values at all are left out. Distance is worked out from the
+# positions when the file doesn't record it.
+
+import gzip
+import math
+import mmap
+import struct
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+from xml.etree.ElementTree import iterparse
+
+Track = dict[str, Any]
+
+# stream -> array typecode, in the order they're stored
+TRACK_COLUMNS = {
+    "time": "f",  # seconds since the start
+    "lat": "d",
+    "lon": "d",
+    "altitude": "f",
+    "distance": "f",  # metres since the start
+    "heartrate": "H",
+    "cadence": "H",
+}
+
+# formats that can be read, by file extension (after any .gz)
+TRACK_FORMATS = ("gpx", "tcx", "fit")
+
+# altitude changes smaller than this (metres) are treated as GPS noise when
+# adding up the elevation gain
+ELEVATION_NOISE = 0.5
+EARTH_RADIUS = 6_371_000.0
+NAN = math.nan
+
+
+def track_format(filename: str) -> str | None:
+    """A track file's format from its name, e.g. "activities/1.gpx.gz" -> "gpx"."""
+    extension = filename.lower().removesuffix(".gz").rpartition(".")[2]
+    return extension if extension in TRACK_FORMATS else None
+
+
+def _timestamp(text: str) -> float:
+    return datetime.fromisoformat(text.strip().replace("Z", "+00:00")).timestamp()
+
+
+def cumulative_distance(lat: array, lon: array) -> array:
+    """Metres travelled up to each point, from the haversine distance of each step."""
+    distance = array("f", bytes(4 * len(lat)))
+    total = 0.0
+    last = None
+
+    for i, (phi, lam) in enumerate(zip(lat, lon)):
+        if phi != phi:  # NaN, no fix for this point
+            distance[i] = total
+            continue
+
+        phi, lam = math.radians(phi), math.radians(lam)
+        if last is not None:
+            d_phi, d_lam = phi - last[0], lam - last[1]
+            a = (
+                math.sin(d_phi / 2) ** 2
+                + math.cos(last[0]) * math.cos(phi) * math.sin(d_lam / 2) ** 2
+            )
+            total += 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+        last = (phi, lam)
+        distance[i] = total
+
+    return distance
+
+
+def _finish_track(
+    start: float | None, columns: dict[str, array], present: set[str]
+) -> Track:
+    """Drop streams that had no values and fill in distance from positions."""
+    if "distance" not in present and "lat" in present:
+        columns["distance"] = cumulative_distance(columns["lat"], columns["lon"])
+        present.add("distance")
+
+    track: Track = {"start": start or 0.0}
+    for name, column in columns.items():
+        if name in present or name == "time":
+            track[name] = column
+    return track
+
+
+def _new_columns() -> dict[str, array]:
+    return {name: array(code) for name, code in TRACK_COLUMNS.items()}
+
+
+# XML point element, the element holding the points and child element ->
+# stream, per format
+XML_LAYOUTS = {
+    "gpx": (
+        "trkpt",
+        "trkseg",
+        {"time": "time", "ele": "altitude", "hr": "heartrate", "cad": "cadence"},
+    ),
+    "tcx": (
+        "Trackpoint",
+        "Track",
+        {
+            "Time": "time",
+            "LatitudeDegrees": "lat",
+            "LongitudeDegrees": "lon",
+            "AltitudeMeters": "altitude",
+            "DistanceMeters": "distance",
+            "Value": "heartrate",  # HeartRateBpm/Value
+            "Cadence": "cadence",
+            "RunCadence": "cadence",  # Garmin's activity extension
+        },
+    ),
+}
+
+
+def parse_xml_track(stream: IO[bytes], fmt: str) -> Track:
+    """
+    Parse a GPX or TCX track element by element, appending each point's
+    values straight onto the stream arrays and discarding the elements as
+    soon as they've been read, so memory only grows with the arrays.
+    """
+    point_tag, container_tag, fields = XML_LAYOUTS[fmt]
+    columns = _new_columns()
+    appenders = {name: column.append for name, column in columns.items()}
+    present: set[str] = set()
+
+    start = None
+    container = None
+    point: dict[str, Any] = {}
+
+    for event, element in iterparse(stream, events=("start", "end")):
+        tag = element.tag
+        name = tag[tag.rfind("}") + 1 :]
+
+        if event == "start":
+            if name == point_tag:
+                point = {}
+                # GPX keeps the position in attributes
+                if "lat" in element.attrib:
+                    point["lat"] = float(element.attrib["lat"])
+                    point["lon"] = float(element.attrib["lon"])
+            elif name == container_tag:
+                container = element
+            continue
+
+        field = fields.get(name)
+        if field is not None and element.text:
+            point[field] = element.text
+            continue
+
+        if name != point_tag:
+            continue
+
+        if "time" in point:
+            timestamp = _timestamp(point["time"])
+            if start is None:
+                start = timestamp
+            appenders["time"](timestamp - start)
+        else:
+            appenders["time"](NAN)
+
+        for column in ("lat", "lon", "altitude", "distance"):
+            value = point.get(column)
+            appenders[column](NAN if value is None else float(value))
+        for column in ("heartrate", "cadence"):
+            value = point.get(column)
+            appenders[column](0 if value is None else int(float(value)))
+        present.update(point)
+
+        # drop the points read so far, the container would otherwise keep
+        # an (empty) element for every one of them
+        if container is not None:
+            container.clear()
+        else:
+            element.clear()
+
+    return _finish_track(start, columns, present)
+
+
+# ----------------------------------------------------------------------------
+# FIT
+# ----------------------------------------------------------------------------
+
+# FIT timestamps count seconds from 1989-12-31 00:00 UTC
+FIT_EPOCH = 631065600
+FIT_RECORD = 20
+SEMICIRCLES = 180 / 2**31
+
+# base type number -> struct code
+FIT_BASE_TYPES = {
+    0: "B",  # enum
+    1: "b",
+    2: "B",
+    3: "h",
+    4: "H",
+    5: "i",
+    6: "I",
+    8: "f",
+    9: "d",
+    10: "B",
+    11: "H",
+    12: "I",
+    14: "q",
+    15: "Q",
+    16: "Q",
+}
+
+# timestamp field number, shared by every message type
+FIT_TIMESTAMP = 253
+# record message field number -> stream, and each stream's invalid value
+FIT_RECORD_FIELDS = {
+    0: "lat",
+    1: "lon",
+    2: "altitude",
+    78: "enhanced_altitude",
+    3: "heartrate",
+    4: "cadence",
+    5: "distance",
+}
+FIT_INVALID = {
+    "time": 0xFFFFFFFF,
+    "lat": 0x7FFFFFFF,
+    "lon": 0x7FFFFFFF,
+    "altitude": 0xFFFF,
+    "enhanced_altitude": 0xFFFFFFFF,
+    "heartrate": 0xFF,
+    "cadence": 0xFF,
+    "distance": 0xFFFFFFFF,
+}
+
+
+def _fit_definition(
+    view: memoryview, pos: int, developer_fields: bool
+) -> tuple[int, tuple[int, struct.Struct, dict[str, int]]]:
+    """
+    Read a definition message at `pos`, returning where the next message
+    starts and (global message number, struct for its data messages, stream
+    -> position in the unpacked values).
+    """
+    big_endian = view[pos + 1] == 1
+    global_number = int.from_bytes(
+        view[pos + 2 : pos + 4], "big" if big_endian else "little"
+    )
+    field_count = view[pos + 4]
+    pos += 5
+
+    codes = []
+    fields: dict[str, int] = {}
+    # position in the unpacked values, padding isn't unpacked
+    index = 0
+    for _ in range(field_count):
+        number, size, base_type = view[pos], view[pos + 1], view[pos + 2] & 0x1F
+        pos += 3
+
+        code = FIT_BASE_TYPES.get(base_type)
+        if code is None or struct.calcsize(f"<{code}") != size:
+            # strings, byte arrays and arrays of values aren't needed
+            codes.append(f"{size}x")
+            continue
+
+        if number == FIT_TIMESTAMP:
+            fields["time"] = index
+        elif global_number == FIT_RECORD and number in FIT_RECORD_FIELDS:
+            fields[FIT_RECORD_FIELDS[number]] = index
+        codes.append(code)
+        index += 1
+
+    if developer_fields:
+        developer_count = view[pos]
+        pos += 1
+        size = sum(view[pos + 3 * i + 1] for i in range(developer_count))
+        pos += 3 * developer_count
+        codes.append(f"{size}x")
+
+    layout = struct.Struct((">" if big_endian else "<") + "".join(codes))
+    return pos, (global_number, layout, fields)
+
+
+def parse_fit(data: bytes | mmap.mmap) -> Track:
+    """
+    Parse the record messages of a FIT file from a buffer (bytes or an mmap),
+    unpacking each message in place with a struct compiled per definition.
+    """
+    columns = _new_columns()
+    time, lat, lon = columns["time"], columns["lat"], columns["lon"]
+    altitude, distance = columns["altitude"], columns["distance"]
+    heartrate, cadence = columns["heartrate"], columns["cadence"]
+    present: set[str] = set()
+
+    with memoryview(data) as view:
+        if len(view) < 12 or bytes(view[8:12]) != b".FIT":
+            raise ValueError("not a FIT file")
+
+        header_size = view[0]
+        end = min(len(view), header_size + int.from_bytes(view[4:8], "little"))
+        pos = header_size
+
+        definitions: dict[int, tuple[int, struct.Struct, dict[str, int]]] = {}
+        start = None
+        last_timestamp = 0
+
+        while pos < end:
+            header = view[pos]
+            pos += 1
+
+            if header & 0x80:
+                # compressed timestamp header: the low 5 bits of the time
+                local = (header >> 5) & 0x3
+                offset = header & 0x1F
+                timestamp = (last_timestamp & ~0x1F) + offset
+                if offset < last_timestamp & 0x1F:
+                    timestamp += 0x20
+            elif header & 0x40:
+                pos, definitions[header & 0x0F] = _fit_definition(
+                    view, pos, bool(header & 0x20)
+                )
+                continue
+            else:
+                local = header & 0x0F
+                timestamp = None
+
+            global_number, layout, fields = definitions[local]
+            values = layout.unpack_from(view, pos)
+            pos += layout.size
+
+            if "time" in fields and values[fields["time"]] != FIT_INVALID["time"]:
+                timestamp = values[fields["time"]]
+            if timestamp is not None:
+                last_timestamp = timestamp
+            if global_number != FIT_RECORD:
+                continue
+
+            if start is None:
+                start = last_timestamp
+            time.append(last_timestamp - start)
+
+            value = values[fields["lat"]] if "lat" in fields else FIT_INVALID["lat"]
+            if value != FIT_INVALID["lat"] and "lon" in fields:
+                lat.append(value * SEMICIRCLES)
+                lon.append(values[fields["lon"]] * SEMICIRCLES)
+                present.add("lat")
+            else:
+                lat.append(NAN)
+                lon.append(NAN)
+
+            if "enhanced_altitude" in fields and (
+                values[fields["enhanced_altitude"]] != FIT_INVALID["enhanced_altitude"]
+            ):
+                altitude.append(values[fields["enhanced_altitude"]] / 5 - 500)
+                present.add("altitude")
+            elif "altitude" in fields and (
+                values[fields["altitude"]] != FIT_INVALID["altitude"]
+            ):
+                altitude.append(values[fields["altitude"]] / 5 - 500)
+                present.add("altitude")
+            else:
+                altitude.append(NAN)
+
+            value = values[fields["distance"]] if "distance" in fields else None
+            if value is not None and value != FIT_INVALID["distance"]:
+                distance.append(value / 100)
+                present.add("distance")
+            else:
+                distance.append(NAN)
+
+            for stream, column in (("heartrate", heartrate), ("cadence", cadence)):
+                value = values[fields[stream]] if stream in fields else 0
+                if value and value != FIT_INVALID[stream]:
+                    column.append(value)
+                    present.add(stream)
+                else:
+                    column.append(0)
+
+    if "lat" in present:
+        present.add("lon")
+    return _finish_track(
+        float(FIT_EPOCH + start) if start is not None else None, columns, present
+    )
+
+
+# ----------------------------------------------------------------------------
+# reading tracks
+# ----------------------------------------------------------------------------
+
+
+def read_track(raw: IO[bytes], filename: str) -> Track:
+    """
+    Parse a track from a binary stream (such as a file in a zip), named
+    like Strava's export files, decompressing .gz files on the fly.
+    """
+    fmt = track_format(filename)
+    if fmt is None:
+        raise ValueError(f"Unsupported track file: {filename}")
+
+    stream = gzip.GzipFile(fileobj=raw) if filename.lower().endswith(".gz") else raw
+    if fmt == "fit":
+        return parse_fit(stream.read())
+    return parse_xml_track(stream, fmt)
+
+
+def read_track_file(path: Path) -> Track:
+    """Parse a track file on disk, mapping uncompressed FIT files into memory."""
+    if track_format(path.name) == "fit" and path.suffix.lower() == ".fit":
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return parse_fit(mapped)
+
+    with open(path, "rb") as f:
+        return read_track(f, path.name)
+
+
+def from_api_streams(streams: dict[str, list], start: float) -> Track:
+    """Build a track from Strava API streams ({"time": [...], "latlng": ...})."""
+    columns = _new_columns()
+    present = {"time"}
+    points = len(streams.get("time", ()))
+    columns["time"].extend(float(t) for t in streams.get("time", ()))
+
+    latlng = streams.get("latlng")
+    if latlng:
+        columns["lat"].extend(point[0] for point in latlng)
+        columns["lon"].extend(point[1] for point in latlng)
+        present.update(("lat", "lon"))
+    else:
+        columns["lat"].extend([NAN] * points)
+        columns["lon"].extend([NAN] * points)
+
+    for name, source, missing in (
+        ("altitude", "altitude", NAN),
+        ("distance", "distance", NAN),
+        ("heartrate", "heartrate", 0),
+        ("cadence", "cadence", 0),
+    ):
+        data = streams.get(source)
+        if data:
+            columns[name].extend(data)
+            present.add(name)
+        else:
+            columns[name].extend([missing] * points)
+
+    return _finish_track(start, columns, present)
+
+
+def summarise_track(track: Track) -> dict[str, Any]:
+    """Point count, elapsed seconds, elevation gain and average heart rate."""
+    times = track["time"]
+    summary: dict[str, Any] = {
+        "points": len(times),
+        "elapsed_time": int(times[-1]) if times and times[-1] == times[-1] else None,
+        "elevation_gain": None,
+        "average_heartrate": None,
+    }
+
+    altitude = track.get("altitude")
+    if altitude:
+        gain = 0.0
+        last = None
+        for value in altitude:
+            if value != value:
+                continue
+            if last is None:
+                last = value
+            elif abs(value - last) >= ELEVATION_NOISE:
+                gain += max(0.0, value - last)
+                last = value
+        summary["elevation_gain"] = round(gain, 1)
+
+    heartrate = track.get("heartrate")
+    if heartrate:
+        recorded = [value for value in heartrate if value]
+        if recorded:
+            summary["average_heartrate"] = round(sum(recorded) / len(recorded), 1)
+
+    return summary
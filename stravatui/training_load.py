@@ -0,0 +1,250 @@
+# Training load over the whole activity history: fitness (CTL), fatigue (ATL)
+# and form (TSB) as exponentially weighted averages of daily load, and 7 and
+# 28 day rolling run distance. Daily values are kept in the store, and new
+# activities are folded in from the day they fall on, so a sync only works out
+# the days since the last one
+
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from . import tracing
+from .activity_utils import VALID_RUN_TYPES
+from .hr_zones import load_zones
+from .store import _read_json, _store_dir, _write_json
+
+if TYPE_CHECKING:
+    from .store import ActivityStore
+
+# bump when the layout or the load model changes so the state is rebuilt
+STATE_VERSION = 2
+
+# time constants in days of the fitness and fatigue averages
+CTL_DAYS = 42
+ATL_DAYS = 7
+# rolling run distance windows in days
+ROLLING_DAYS = (7, 28)
+# intensity assumed for activities without heart rate, an easy effort
+DEFAULT_INTENSITY = 0.7
+
+
+def _state_path(athlete: str | None) -> Path:
+    return _store_dir(athlete) / "training_load.json"
+
+
+def _empty_state(threshold: int) -> dict[str, Any]:
+    return {
+        "version": STATE_VERSION,
+        "threshold": threshold,
+        # store positions folded in so far, the store only ever appends, and
+        # the id at the last one to tell a rebuilt store apart
+        "count": 0,
+        "last_id": None,
+        "first_day": None,
+        "load": [],
+        "distance": [],
+        "ctl": [],
+        "atl": [],
+        **{f"distance_{days}": [] for days in ROLLING_DAYS},
+        # activity id -> [day, load, whether the load came from its streams]
+        "activities": {},
+    }
+
+
+def state_mtime(athlete: str | None = None) -> int:
+    """When the stored training load last changed (0 if there isn't one)."""
+    try:
+        return _state_path(athlete).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def load_state(athlete: str | None = None) -> dict[str, Any] | None:
+    """The stored training load, None if there isn't one yet."""
+    state = _read_json(_state_path(athlete))
+    if not state or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def activity_load(
+    seconds: float,
+    average_heartrate: float | None,
+    histogram: dict[str, Any] | None,
+    threshold: int,
+) -> float:
+    """
+    Heart rate training load (hrTSS) of an activity: 100 per hour at
+    threshold heart rate, scaled by the square of intensity. Worked out over
+    the heart rate histogram from its streams where there is one, otherwise
+    from the average heart rate, otherwise at DEFAULT_INTENSITY.
+    """
+    if histogram:
+        low = histogram["low"]
+        return sum(
+            spent * ((low + i) / threshold) ** 2
+            for i, spent in enumerate(histogram["seconds"])
+        ) / 36
+
+    intensity = average_heartrate / threshold if average_heartrate else None
+    return seconds / 36 * (intensity or DEFAULT_INTENSITY) ** 2
+
+
+def _activity_day(start_date: str) -> date:
+    return datetime.fromisoformat(start_date).astimezone().date()
+
+
+def _prepend_days(state: dict[str, Any], days: int) -> None:
+    """Start the series `days` earlier, for an activity before the first day."""
+    for column in ("load", "distance"):
+        state[column][:0] = [0.0] * days
+    for activity in state["activities"].values():
+        activity[0] += days
+
+
+def _recompute(state: dict[str, Any], start: int) -> None:
+    """Work out the averages and rolling sums from day `start` to the end."""
+    load, distance = state["load"], state["distance"]
+    ctl, atl = state["ctl"], state["atl"]
+    # rest days before a new activity haven't been worked out either
+    start = min(start, len(ctl))
+    del ctl[start:], atl[start:]
+
+    for day in range(start, len(load)):
+        previous_ctl = ctl[-1] if ctl else 0.0
+        previous_atl = atl[-1] if atl else 0.0
+        ctl.append(previous_ctl + (load[day] - previous_ctl) / CTL_DAYS)
+        atl.append(previous_atl + (load[day] - previous_atl) / ATL_DAYS)
+
+    for days in ROLLING_DAYS:
+        rolling = state[f"distance_{days}"]
+        del rolling[start:]
+        for day in range(start, len(distance)):
+            rolling.append(round(sum(distance[max(0, day - days + 1) : day + 1]), 1))
+
+
+@tracing.traced()
+def update_training_load(store: "ActivityStore", athlete: str | None = None) -> bool:
+    """
+    Fold activities added to the store since the last update into the stored
+    training load, and switch activities whose heart rate histogram has been
+    computed since over to load from their streams. Only the days from the
+    earliest one changed are worked out again, or all of them if the store
+    isn't the one the state was built over. Returns whether anything changed.
+    """
+    # the metrics engine brings in multiprocessing, so import it when needed
+    from .analytics import metric_values
+
+    threshold = load_zones(athlete)[-1]
+    columns = store.columns
+    # earliest day whose load or distance changed
+    changed: int | None = None
+
+    state = load_state(athlete)
+    if state is not None:
+        # only fold into it if it was built over the start of this same store
+        count, ids = state["count"], columns["ids"]
+        if (
+            state["threshold"] != threshold
+            or count > len(ids)
+            or (count and ids[count - 1] != state["last_id"])
+        ):
+            state, changed = None, 0
+    if state is None:
+        state = _empty_state(threshold)
+
+    histograms = metric_values("heartrate_histogram", athlete)
+    activities = state["activities"]
+
+    new = [i for i in range(state["count"], len(store)) if columns["start_dates"][i]]
+    days = {i: _activity_day(columns["start_dates"][i]) for i in new}
+    if days:
+        first = min(days.values())
+        if state["first_day"] is None:
+            state["first_day"] = first.isoformat()
+        elif first < date.fromisoformat(state["first_day"]):
+            _prepend_days(state, (date.fromisoformat(state["first_day"]) - first).days)
+            state["first_day"] = first.isoformat()
+            changed = 0
+
+    first_day = date.fromisoformat(state["first_day"]) if state["first_day"] else None
+    for i, day in days.items():
+        offset = (day - first_day).days
+        for column in ("load", "distance"):
+            state[column].extend([0.0] * (offset + 1 - len(state[column])))
+
+        activity_id = columns["ids"][i]
+        histogram = histograms.get(activity_id)
+        seconds = columns["times"][i] or 0
+        load = activity_load(
+            seconds, columns["average_heartrate"][i], histogram, threshold
+        )
+        activities[str(activity_id)] = [offset, load, bool(histogram)]
+        state["load"][offset] += load
+        if columns["activity_type"][i] in VALID_RUN_TYPES:
+            state["distance"][offset] += (columns["distances"][i] or 0) / 1000
+        changed = offset if changed is None else min(changed, offset)
+
+    # streams are fetched after the activity is synced, so switch over to the
+    # load from the histogram once it's there
+    for activity_id, histogram in histograms.items():
+        activity = activities.get(str(activity_id))
+        if not histogram or activity is None or activity[2]:
+            continue
+
+        load = activity_load(0, None, histogram, threshold)
+        state["load"][activity[0]] += load - activity[1]
+        activities[str(activity_id)] = [activity[0], load, True]
+        changed = activity[0] if changed is None else min(changed, activity[0])
+
+    state["count"] = len(store)
+    state["last_id"] = columns["ids"][-1] if len(store) else None
+    if changed is None:
+        return False
+
+    _recompute(state, changed)
+    _write_json(_state_path(athlete), state)
+    return True
+
+
+def training_load_series(
+    state: dict[str, Any] | None, days: int, today: date | None = None
+) -> dict[str, list]:
+    """
+    The last `days` days of the training load up to `today`, carried on past
+    the last activity as rest days. Form is the day before's fitness less
+    its fatigue, what the day was started with.
+    """
+    if state is None or state["first_day"] is None:
+        return {
+            key: []
+            for key in ("days", "ctl", "atl", "tsb")
+            + tuple(f"distance_{n}" for n in ROLLING_DAYS)
+        }
+
+    today = today or date.today()
+    first_day = date.fromisoformat(state["first_day"])
+    ctl, atl = list(state["ctl"]), list(state["atl"])
+    rolling = {n: list(state[f"distance_{n}"]) for n in ROLLING_DAYS}
+    distance = list(state["distance"])
+
+    for _ in range((today - first_day).days + 1 - len(ctl)):
+        ctl.append(ctl[-1] * (1 - 1 / CTL_DAYS))
+        atl.append(atl[-1] * (1 - 1 / ATL_DAYS))
+        distance.append(0.0)
+        for n, values in rolling.items():
+            values.append(round(sum(distance[-n:]), 1))
+
+    start = max(0, len(ctl) - days)
+    return {
+        "days": [
+            (first_day + timedelta(days=d)).isoformat() for d in range(start, len(ctl))
+        ],
+        "ctl": [round(value, 2) for value in ctl[start:]],
+        "atl": [round(value, 2) for value in atl[start:]],
+        "tsb": [
+            round(ctl[d - 1] - atl[d - 1], 2) if d else 0.0
+            for d in range(start, len(ctl))
+        ],
+        **{f"distance_{n}": values[start:] for n, values in rolling.items()},
+    }
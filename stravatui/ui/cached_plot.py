@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from collections.abc import Callable
+
+from rich.console import RenderResult
+from textual_plotext import PlotextPlot
+from textual_plotext.plot import Plot
+
+from .. import tracing
+
+# rendered sizes kept per plot, enough for a few resizes back and forth
+RENDER_CACHE_SIZE = 8
+
+DrawFunction = Callable[[Plot, int, int], None]
+
+
+class CachedPlot(PlotextPlot):
+    """
+    A PlotextPlot that draws from a stored draw function and caches what it
+    renders by (series fingerprint, widget size, theme). Resizing back to a
+    seen size, switching pages or refreshing with unchanged data is just a
+    cache lookup. The draw function gets the plot size so it can decimate
+    series down to what that size can show.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._draw: DrawFunction | None = None
+        self._series_key: str | None = None
+        self._plot_cache: OrderedDict[tuple, RenderResult] = OrderedDict()
+
+    def set_draw(self, draw: DrawFunction, series_key: str) -> bool:
+        """
+        Set what to draw, identified by a fingerprint of the series it plots.
+        Returns False, leaving the plot untouched, if the series haven't changed.
+        """
+        if series_key == self._series_key and self._draw is not None:
+            return False
+
+        self._plot_cache.clear()
+        self._draw = draw
+        self._series_key = series_key
+        self.refresh()
+
+        return True
+
+    def clear_render_cache(self) -> None:
+        self._plot_cache.clear()
+
+    def render(self) -> RenderResult:
+        if self._draw is None:
+            return super().render()
+
+        width, height = self.size.width, self.size.height
+        key = (self._series_key, width, height, self.app.theme)
+
+        cached = self._plot_cache.get(key)
+        if cached is not None:
+            self._plot_cache.move_to_end(key)
+            return cached
+
+        with tracing.span("render plot", plot=self.id, width=width, height=height):
+            self.plt.clear_figure()
+            self._draw(self.plt, width, height)
+            rendered = super().render()
+
+        self._plot_cache[key] = rendered
+        if len(self._plot_cache) > RENDER_CACHE_SIZE:
+            self._plot_cache.popitem(last=False)
+
+        return rendered
@@ -0,0 +1,100 @@
+import calendar
+from datetime import date, timedelta
+
+from rich.text import Text
+from textual.widgets import Static
+
+from ..daily_bins import BIN_UNITS
+
+# no run, then each quarter of the year's run days from least to most
+LEVEL_STYLES = ("#30363d", "#0e4429", "#006d32", "#26a641", "#39d353")
+CELL = "■"
+# row labels, Monday first
+WEEKDAY_LABELS = ("Mon", "", "Wed", "", "Fri", "", "Sun")
+LABEL_WIDTH = 4
+
+
+def _level_bounds(days: list[float]) -> list[float]:
+    """Upper bounds of the first three levels, the quartiles of run days."""
+    ran = sorted(value for value in days if value > 0)
+    if not ran:
+        return []
+    return [ran[len(ran) * quarter // 4] for quarter in (1, 2, 3)]
+
+
+def _level(value: float, bounds: list[float]) -> int:
+    if value <= 0:
+        return 0
+    return 1 + sum(value > bound for bound in bounds)
+
+
+def format_heatmap(
+    days: list[float], year: int, metric: str, today: date | None = None
+) -> Text:
+    """
+    Lay out one `metric` value per day of `year` (see daily_bins) as a
+    GitHub-style calendar: a column per week, a row per weekday, shaded by
+    which quarter of the year's run days the value falls in. Days after
+    `today` are left blank.
+    """
+    today = today or date.today()
+    first = date(year, 1, 1)
+    length = 366 if calendar.isleap(year) else 365
+    days = days or [0.0] * length
+    weeks = (first.weekday() + length + 6) // 7
+    bounds = _level_bounds(days)
+
+    text = Text(no_wrap=True, overflow="crop")
+    total = sum(days)
+    if BIN_UNITS[metric] == "km":
+        summary = f"{total:,.0f} km"
+    else:
+        summary = f"{total / 60:,.0f} hours"
+    text.append(f"{year}  ", "bold")
+    text.append(f"{summary} run, {sum(1 for value in days if value > 0)} days\n")
+
+    # month names over the week their first day falls in
+    header = [" "] * weeks
+    for month in range(1, 13):
+        week = (first.weekday() + date(year, month, 1).timetuple().tm_yday - 1) // 7
+        name = calendar.month_abbr[month]
+        if week + len(name) <= weeks and header[week] == " ":
+            header[week : week + len(name)] = name
+    text.append(" " * LABEL_WIDTH + "".join(header) + "\n", "dim")
+
+    for weekday, label in enumerate(WEEKDAY_LABELS):
+        text.append(f"{label:<{LABEL_WIDTH}}", "dim")
+        for week in range(weeks):
+            n = week * 7 + weekday - first.weekday()
+            if not 0 <= n < length or first + timedelta(days=n) > today:
+                text.append(" ")
+                continue
+            text.append(CELL, LEVEL_STYLES[_level(days[n], bounds)])
+        text.append("\n")
+
+    text.append(" " * LABEL_WIDTH + "less ", "dim")
+    for style in LEVEL_STYLES:
+        text.append(CELL, style)
+    text.append(f" more   {metric}  [ ] year, t distance/time", "dim")
+
+    return text
+
+
+class CalendarHeatmap(Static):
+    """Calendar of a year's daily run distance or time."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._series_key: str | None = None
+
+    def show(self, days: list[float], year: int, metric: str, series_key: str) -> bool:
+        """
+        Show a year's daily values, identified by a fingerprint of them.
+        Returns False, leaving the widget untouched, if that hasn't changed.
+        """
+        if series_key == self._series_key:
+            return False
+
+        self._series_key = series_key
+        self.update(format_heatmap(days, year, metric))
+        return True
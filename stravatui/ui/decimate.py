@@ -0,0 +1,93 @@
+# Reduce plot series to what a terminal plot of a given size can actually show
+
+# braille markers pack a 2x4 grid of dots into each terminal cell
+BRAILLE_COLS = 2
+BRAILLE_ROWS = 4
+
+
+def lttb(
+    xs: list[float], ys: list[float], threshold: int
+) -> tuple[list[float], list[float]]:
+    """
+    Downsample a line to `threshold` points with Largest-Triangle-Three-Buckets,
+    which keeps the points that contribute most to the visible shape (peaks and
+    troughs) rather than every n-th point.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+
+    sampled_x = [xs[0]]
+    sampled_y = [ys[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # average of the next bucket is the third point of the triangle
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(ys[next_start:next_end]) / next_count
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = xs[a], ys[a]
+
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled_x.append(xs[chosen])
+        sampled_y.append(ys[chosen])
+        a = chosen
+
+    sampled_x.append(xs[-1])
+    sampled_y.append(ys[-1])
+
+    return sampled_x, sampled_y
+
+
+def grid_bin(
+    xs: list[float], ys: list[float], x_bins: int, y_bins: int
+) -> tuple[list[float], list[float]]:
+    """
+    Reduce a scatter to at most one point per (x_bins x y_bins) grid cell,
+    using the mean of the points that fall in each occupied cell. With one
+    cell per braille dot the plot looks the same as plotting every point.
+    """
+    if len(xs) <= x_bins * y_bins or not xs:
+        return list(xs), list(ys)
+
+    x_min, x_max = min(xs), max(xs)
+    y_min, y_max = min(ys), max(ys)
+    x_scale = (x_bins - 1) / (x_max - x_min) if x_max > x_min else 0.0
+    y_scale = (y_bins - 1) / (y_max - y_min) if y_max > y_min else 0.0
+
+    cells: dict[tuple[int, int], list[float]] = {}
+    for x, y in zip(xs, ys):
+        key = (int((x - x_min) * x_scale), int((y - y_min) * y_scale))
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [x, y, 1]
+        else:
+            cell[0] += x
+            cell[1] += y
+            cell[2] += 1
+
+    binned_x = [cell[0] / cell[2] for cell in cells.values()]
+    binned_y = [cell[1] / cell[2] for cell in cells.values()]
+
+    return binned_x, binned_y
+
+
+def scatter_bins(width: int, height: int, rows: int = 1, cols: int = 1) -> tuple[int, int]:
+    """Return the braille dot grid of one subplot in a rows x cols layout."""
+    return (
+        max(1, width // cols * BRAILLE_COLS),
+        max(1, height // rows * BRAILLE_ROWS),
+    )
@@ -0,0 +1,181 @@
+from collections.abc import Sequence
+
+from textual import events
+from textual.binding import Binding
+from textual.message import Message
+from textual.widgets import DataTable
+
+from ..store import SORT_KEYS, ActivityStore
+from .tables import format_history_rows
+
+# (label, width) of each column, fixed so paging doesn't make them jump about
+HISTORY_COLUMNS = (
+    ("Date", 10),
+    ("Activity", 32),
+    ("Type", 14),
+    ("Distance (km)", 13),
+    ("Time (mins)", 11),
+    ("Pace (min/km)", 13),
+    ("Avg HR", 6),
+)
+SORT_LABELS = {
+    "date": "date",
+    "distance": "distance",
+    "pace": "pace",
+    "heartrate": "heart rate",
+}
+MOUSE_SCROLL_ROWS = 3
+
+
+class HistoryTable(DataTable):
+    """
+    Activities table over the full local history. Only the rows that fit in
+    the widget are ever added to the table; paging, scrolling and sorting
+    move a window over the store's sort indexes and re-format just that.
+    """
+
+    BINDINGS = [
+        Binding("d", "sort('date')", "sort date", show=True),
+        Binding("k", "sort('distance')", "sort distance", show=True),
+        Binding("p", "sort('pace')", "sort pace", show=True),
+        Binding("h", "sort('heartrate')", "sort HR", show=True),
+        Binding("home", "first_page", "first", show=False),
+        Binding("end", "last_page", "last", show=False),
+    ]
+
+    class WindowChanged(Message):
+        """Posted when the visible window, sort or store changes."""
+
+        def __init__(self, text: str) -> None:
+            super().__init__()
+            self.text = text
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(cursor_type="row", **kwargs)
+        self._store: ActivityStore | None = None
+        self._order: Sequence[int] | None = None
+        # store positions matching the current search, None when not searching
+        self._matches: list[int] | None = None
+        self.sort_key = "date"
+        self.descending = SORT_KEYS["date"]
+        self.window_start = 0
+
+    def on_mount(self) -> None:
+        for label, width in HISTORY_COLUMNS:
+            self.add_column(label, width=width)
+
+    @property
+    def total(self) -> int:
+        return len(self._order) if self._order is not None else 0
+
+    @property
+    def page_size(self) -> int:
+        height = self.scrollable_content_region.height - self.header_height
+        return max(1, height)
+
+    def set_store(self, store: ActivityStore) -> None:
+        """Show a (new or updated) store, keeping the current sort."""
+        self._store = store
+        self._matches = None
+        self._order = self._sorted_order()
+        self._show_window(self.window_start, self.cursor_row)
+
+    def set_matches(self, matches: list[int] | None) -> None:
+        """Only show the given store positions (all of them if None)."""
+        self._matches = matches
+        self._order = self._sorted_order()
+        self._show_window(0)
+
+    def _sorted_order(self) -> Sequence[int] | None:
+        if self._store is None:
+            return None
+        if self._matches is None:
+            return self._store.sorted_positions(self.sort_key, self.descending)
+        return self._store.sort_subset(self._matches, self.sort_key, self.descending)
+
+    def _show_window(self, start: int, cursor_row: int = 0) -> None:
+        """Format and show the rows from `start`, with the cursor on `cursor_row`."""
+        if self._store is None or self._order is None:
+            return
+
+        page_size = self.page_size
+        self.window_start = max(0, min(start, self.total - page_size))
+        positions = self._order[self.window_start : self.window_start + page_size]
+
+        self.clear()
+        self.add_rows(format_history_rows(self._store.rows(positions)))
+        if positions:
+            self.move_cursor(row=max(0, min(cursor_row, len(positions) - 1)))
+
+        self.post_message(self.WindowChanged(self._status_text(len(positions))))
+
+    def _status_text(self, shown: int) -> str:
+        direction = "descending" if self.descending else "ascending"
+        sort_text = f"sorted by {SORT_LABELS[self.sort_key]}, {direction}"
+        activities = "activities" if self._matches is None else "matching activities"
+        if not shown:
+            return f"no {activities}, {sort_text}"
+
+        first = self.window_start + 1
+        last = self.window_start + shown
+        return f"{first}-{last} of {self.total} {activities}, {sort_text}"
+
+    def _scroll_window(self, rows: int, cursor_row: int | None = None) -> None:
+        if cursor_row is None:
+            cursor_row = self.cursor_row
+        self._show_window(self.window_start + rows, cursor_row)
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._show_window(self.window_start, self.cursor_row)
+
+    def action_sort(self, key: str) -> None:
+        """Sort by `key`, flipping the direction if it's already the sort key."""
+        if self._store is None:
+            return
+
+        if key == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key = key
+            self.descending = SORT_KEYS[key]
+
+        self._order = self._sorted_order()
+        self._show_window(0)
+
+    def action_cursor_down(self) -> None:
+        if self.cursor_row < self.row_count - 1:
+            super().action_cursor_down()
+        else:
+            self._scroll_window(1)
+
+    def action_cursor_up(self) -> None:
+        if self.cursor_row > 0:
+            super().action_cursor_up()
+        else:
+            self._scroll_window(-1)
+
+    def action_page_down(self) -> None:
+        self._scroll_window(self.page_size)
+
+    def action_page_up(self) -> None:
+        self._scroll_window(-self.page_size)
+
+    def action_first_page(self) -> None:
+        self._show_window(0)
+
+    def action_last_page(self) -> None:
+        self._show_window(self.total, self.page_size - 1)
+
+    def action_scroll_top(self) -> None:
+        self.action_first_page()
+
+    def action_scroll_bottom(self) -> None:
+        self.action_last_page()
+
+    def on_mouse_scroll_down(self, event: events.MouseScrollDown) -> None:
+        event.stop()
+        self._scroll_window(MOUSE_SCROLL_ROWS)
+
+    def on_mouse_scroll_up(self, event: events.MouseScrollUp) -> None:
+        event.stop()
+        self._scroll_window(-MOUSE_SCROLL_ROWS)
@@ -0,0 +1,158 @@
+from typing import Any
+
+from rich.text import Text
+from textual.widgets import Static
+
+from .. import metrics
+
+# how often (seconds) the panel re-reads the metrics while it's on screen
+REFRESH_INTERVAL = 1.0
+HEADING_STYLE = "#FBB86C bold"
+
+
+def _format_bytes(size: float) -> str:
+    if size < 1024:
+        return f"{size:.0f} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / 1024 / 1024:.1f} MiB"
+
+
+def _by_label(series: list[dict[str, Any]], label: str) -> dict[str, float]:
+    """Sum series values by one label, e.g. requests per endpoint."""
+    totals: dict[str, float] = {}
+    for entry in series:
+        key = entry["labels"].get(label, "")
+        totals[key] = totals.get(key, 0) + entry["value"]
+    return totals
+
+
+def _api_lines(snapshot: dict[str, Any]) -> list[str]:
+    requests = snapshot["strava_api_requests_total"]["series"]
+    calls = _by_label(requests, "endpoint")
+    errors = _by_label(
+        [s for s in requests if not s["labels"]["status"].startswith("2")], "endpoint"
+    )
+    limited = _by_label(snapshot["strava_api_rate_limited_total"]["series"], "endpoint")
+    retries = _by_label(snapshot["strava_api_retries_total"]["series"], "endpoint")
+    sizes = _by_label(
+        snapshot["strava_api_response_bytes_total"]["series"], "endpoint"
+    )
+    latency = {
+        s["labels"]["endpoint"]: s
+        for s in snapshot["strava_api_latency_seconds"]["series"]
+    }
+
+    if not calls:
+        return ["no API calls yet"]
+
+    lines = [
+        f"{'endpoint':<34} {'calls':>6} {'errors':>6} {'429s':>5} {'retries':>7} "
+        f"{'received':>10} {'p50 ms':>8} {'p95 ms':>8}"
+    ]
+    for name in sorted(calls, key=calls.__getitem__, reverse=True):
+        lines.append(
+            f"{name:<34} {calls[name]:>6.0f} {errors.get(name, 0):>6.0f} "
+            f"{limited.get(name, 0):>5.0f} {retries.get(name, 0):>7.0f} "
+            f"{_format_bytes(sizes.get(name, 0)):>10} "
+            f"{latency[name]['p50'] * 1000:>8.1f} {latency[name]['p95'] * 1000:>8.1f}"
+        )
+
+    lines.append(
+        f"{'total':<34} {sum(calls.values()):>6.0f} {sum(errors.values()):>6.0f} "
+        f"{sum(limited.values()):>5.0f} {sum(retries.values()):>7.0f} "
+        f"{_format_bytes(sum(sizes.values())):>10}"
+    )
+    return lines
+
+
+def _rate_limit_lines(snapshot: dict[str, Any]) -> list[str]:
+    series = snapshot["strava_rate_limit_remaining"]["series"]
+    if not series:
+        return ["no rate-limit headers seen yet"]
+
+    return [
+        f"{s['labels']['kind']:<8} {s['labels']['window']:<6} {s['value']:>6.0f} left"
+        for s in sorted(series, key=lambda s: tuple(s["labels"].values()))
+    ]
+
+
+def _cache_lines(snapshot: dict[str, Any]) -> list[str]:
+    counts: dict[str, dict[str, float]] = {}
+    for s in snapshot["cache_requests_total"]["series"]:
+        resource = counts.setdefault(s["labels"]["resource"], {"hit": 0, "miss": 0})
+        resource[s["labels"]["result"]] += s["value"]
+
+    if not counts:
+        return ["no cache lookups yet"]
+
+    lines = [f"{'resource':<34} {'hits':>6} {'misses':>6} {'hit rate':>9}"]
+    for resource, result in sorted(counts.items()):
+        total = result["hit"] + result["miss"]
+        lines.append(
+            f"{resource:<34} {result['hit']:>6.0f} {result['miss']:>6.0f} "
+            f"{result['hit'] / total:>9.0%}"
+        )
+    return lines
+
+
+def _store_lines(snapshot: dict[str, Any]) -> list[str]:
+    series = snapshot["store_query_seconds"]["series"]
+    if not series:
+        return ["no store queries yet"]
+
+    lines = [f"{'query':<34} {'count':>6} {'p50 ms':>8} {'p95 ms':>8}"]
+    for s in sorted(series, key=lambda s: s["labels"]["query"]):
+        lines.append(
+            f"{s['labels']['query']:<34} {s['count']:>6.0f} "
+            f"{s['p50'] * 1000:>8.2f} {s['p95'] * 1000:>8.2f}"
+        )
+    return lines
+
+
+def _event_loop_lines(snapshot: dict[str, Any]) -> list[str]:
+    # only recorded when the stall watchdog is running
+    lag = snapshot.get("event_loop_lag_seconds", {}).get("series")
+    if not lag:
+        return []
+
+    stalls = sum(s["value"] for s in snapshot["event_loop_stalls_total"]["series"])
+    return [
+        f"lag p50 {lag[0]['p50'] * 1000:.1f} ms, p95 {lag[0]['p95'] * 1000:.1f} ms "
+        f"over {lag[0]['count']:.0f} heartbeats, {stalls:.0f} stalls"
+    ]
+
+
+def format_metrics(snapshot: dict[str, Any]) -> Text:
+    """Lay out a metrics snapshot as the debug page's sections."""
+    sections = [
+        ("Strava API", _api_lines(snapshot)),
+        ("Rate limit", _rate_limit_lines(snapshot)),
+        ("Caches", _cache_lines(snapshot)),
+        ("Activity store queries", _store_lines(snapshot)),
+    ]
+    event_loop = _event_loop_lines(snapshot)
+    if event_loop:
+        sections.append(("Event loop", event_loop))
+
+    text = Text(no_wrap=True, overflow="ellipsis")
+    for title, lines in sections:
+        text.append(f"{title}\n", HEADING_STYLE)
+        text.append("\n".join(lines) + "\n\n")
+
+    return text
+
+
+class MetricsPanel(Static):
+    """API usage, cache and store metrics, kept current while on screen."""
+
+    def on_mount(self) -> None:
+        self.update_metrics()
+        self.set_interval(REFRESH_INTERVAL, self._refresh_if_shown)
+
+    def _refresh_if_shown(self) -> None:
+        if self.is_on_screen:
+            self.update_metrics()
+
+    def update_metrics(self) -> None:
+        self.update(format_metrics(metrics.snapshot()))
@@ -0,0 +1,177 @@
+from textual.app import ComposeResult
+from textual.containers import Center, Container, Horizontal, Vertical, VerticalScroll
+from textual.widgets import Button, Collapsible, DataTable, Input, Label, Select
+
+from .calendar_heatmap import CalendarHeatmap
+from .history_table import HistoryTable
+from .metrics_panel import MetricsPanel
+from .trace_waterfall import TraceWaterfall
+from .text_labels import (
+    about_page_bottom_text,
+    about_page_text,
+    best_efforts_label,
+    last_five_label,
+    zones_label,
+)
+
+
+class OverviewPage(Container):
+    """Comparison table and plots for recent, YTD and all time stats."""
+
+    def compose(self) -> ComposeResult:
+        # plotext is slow to import, so only load it once a page with plots is built
+        from .cached_plot import CachedPlot
+
+        with Vertical(id="overview-left"):
+            # label with distance comparison text get's added in once API calls made in worker thread
+            yield Label("", id="overview-label")
+            with Center():
+                yield DataTable(id="table-2")
+            yield CachedPlot(id="plot-3")
+        with Vertical(id="overview-right"):
+            yield CachedPlot(id="plot-4")
+            yield CalendarHeatmap(id="calendar-heatmap")
+            yield CachedPlot(id="load-plot")
+
+
+class LastFivePage(Container):
+    """Last five runs and recent best efforts."""
+
+    def compose(self) -> ComposeResult:
+        from .cached_plot import CachedPlot
+
+        with Horizontal(id="last-five-horizontal"):
+            with Vertical(id="last-five-left"):
+                yield Label(last_five_label, id="table-1-label")
+                with Center():
+                    yield DataTable(id="table-1", cell_padding=3, cursor_type="row")
+                # filled with a run's splits when its row is selected
+                with Collapsible(title="splits", id="splits-detail"):
+                    with Horizontal(id="splits-tables"):
+                        yield DataTable(id="splits-km-table", cursor_type="none")
+                        yield DataTable(id="splits-mile-table", cursor_type="none")
+                yield CachedPlot(id="last-five-subplot")
+            with Vertical(id="last-five-right"):
+                yield Label(
+                    best_efforts_label,
+                    id="efforts-plot-label",
+                )
+                with Center(id="label-with-efforts-table"):
+                    yield DataTable(id="best-efforts-table", cell_padding=1)
+                yield CachedPlot(id="effort-plot")
+                yield CachedPlot(id="progression-plot")
+
+
+class HistoryPage(Container):
+    """Every stored activity in a sortable, paged table."""
+
+    def compose(self) -> ComposeResult:
+        yield Input(
+            placeholder="search names, type:run  km:5-10  date:2024-01..2024-06",
+            id="history-search",
+        )
+        yield Label("syncing activity history...", id="history-status")
+        with Center(id="history-center"):
+            yield HistoryTable(id="history-table")
+
+    def on_history_table_window_changed(
+        self, event: HistoryTable.WindowChanged
+    ) -> None:
+        self.query_one("#history-status", Label).update(event.text)
+
+
+class CalculatorPage(Container):
+    """Race time prediction calculator."""
+
+    def compose(self) -> ComposeResult:
+        with Vertical(id="calculator-container"):
+            yield Label(
+                "Race Time Calculator (Riegel's Formula)",
+                id="calculator-title",
+            )
+            yield Label("Enter a recent race result:", id="calculator-subtitle")
+
+            with Horizontal(id="calculator-inputs"):
+                yield Select(
+                    [
+                        ("5K", "5k"),
+                        ("10K", "10k"),
+                        ("Half Marathon", "half"),
+                        ("Marathon", "marathon"),
+                    ],
+                    prompt="select distance",
+                    id="race-distance-select",
+                )
+                yield Input(
+                    placeholder="MM:SS or HH:MM:SS",
+                    id="race-time-input",
+                )
+                yield Button(
+                    "calculate",
+                    id="calculate-button",
+                    variant="primary",
+                )
+
+            # fills in the best grade-adjusted prediction from recent runs
+            with Center():
+                yield Button(
+                    "predict from recent runs (grade-adjusted)",
+                    id="race-from-runs-button",
+                    flat=True,
+                )
+
+            with Center(classes="race-results-container"):
+                yield DataTable(id="race-results-table", cell_padding=10)
+
+    def on_mount(self) -> None:
+        # hide results table until there are results
+        self.query_one("#race-results-table", DataTable).display = False
+
+
+class ZonesPage(Container):
+    """Weekly and monthly time in heart rate zones."""
+
+    def compose(self) -> ComposeResult:
+        from .cached_plot import CachedPlot
+
+        yield Label(zones_label, id="zones-label")
+        yield CachedPlot(id="zones-plot")
+        with Center(id="zones-center"):
+            yield DataTable(id="zones-table", cursor_type="none")
+
+
+class AboutPage(Container):
+    """About text and links."""
+
+    def compose(self) -> ComposeResult:
+        yield Label(about_page_text, id="about-label")
+        yield Label(about_page_bottom_text, id="about-label-bottom")
+
+
+class TracePage(Container):
+    """Waterfall of the last traced load, only reachable by its key binding."""
+
+    def compose(self) -> ComposeResult:
+        with VerticalScroll(id="trace-scroll"):
+            yield TraceWaterfall(id="trace-waterfall")
+
+
+class DebugPage(Container):
+    """API usage and cache metrics, only reachable by its key binding."""
+
+    def compose(self) -> ComposeResult:
+        with VerticalScroll(id="debug-scroll"):
+            yield MetricsPanel(id="metrics-panel")
+
+
+# page id -> page widget, in navigation order
+PAGES: dict[str, type[Container]] = {
+    "overview-page": OverviewPage,
+    "last-five-page": LastFivePage,
+    "history-page": HistoryPage,
+    "plot-page": CalculatorPage,
+    "zones-page": ZonesPage,
+    "about-page": AboutPage,
+    "trace-page": TracePage,
+    "debug-page": DebugPage,
+}
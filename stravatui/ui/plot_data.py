@@ -1,13 +1,24 @@
+from datetime import date, timedelta
+from typing import Any
+
+from .. import tracing
 from ..activity_utils import (
     calculate_activity_totals,
     extract_by_indices,
     filter_activities_with_heartrate,
     filter_valid_activities,
     float_convert,
+    is_valid_run_activity,
 )
 from ..formatters import create_pace_list, pace_to_minutes
+from ..hr_zones import week_start, zone_names, zone_totals
+
+# weeks in the zones plot and months in the zones table
+ZONE_WEEKS = 16
+ZONE_MONTHS = 12
 
 
+@tracing.traced()
 def prepare_overview_data(
     names: list[str],
     distances: list[str],
@@ -15,8 +26,13 @@ def prepare_overview_data(
     average_heartrate: list[str],
     total_elevation_gain: list[str],
     activity_type: list[str],
+    grade_factors: list[float | None] | None = None,
 ) -> dict[str, list]:
-    """Filter data for overview page subplot."""
+    """
+    Filter data for overview page subplot. `grade_factors` are the activities'
+    grade factors from their streams (see stream_metrics.grade_adjusted), used
+    for grade-adjusted pace. Activities without one keep their actual pace.
+    """
     paces = create_pace_list(times, distances)
 
     valid_indices = filter_activities_with_heartrate(
@@ -34,6 +50,16 @@ def prepare_overview_data(
     filtered_times = extract_by_indices(times, valid_indices)
     pace_mins = [pace_to_minutes(pace) for pace in filtered_pace]
 
+    factors = (
+        extract_by_indices(grade_factors, valid_indices)
+        if grade_factors
+        else [None] * len(pace_mins)
+    )
+    grade_adjusted_pace_mins = [
+        pace * factor if pace is not None and factor else pace
+        for pace, factor in zip(pace_mins, factors)
+    ]
+
     # convert all data for other plots
     filtered_average_heartrate_float = [float(hr) for hr in filtered_average_heartrate]
     filtered_total_elevation_gain_float = [
@@ -49,14 +75,57 @@ def prepare_overview_data(
         "average_heartrate": filtered_average_heartrate_float,
         "total_elevation_gain": filtered_total_elevation_gain_float,
         "pace_mins": pace_mins,
+        "grade_factors": factors,
+        "grade_adjusted_pace_mins": grade_adjusted_pace_mins,
     }
 
 
-def prepare_comparison_data(
+def prepare_race_efforts(
+    distances: list[str],
+    times: list[str],
+    activity_type: list[str],
+    grade_factors: list[float | None],
+) -> list[tuple[float, float]]:
+    """
+    (distance in metres, grade-adjusted moving time in seconds) of each
+    recent run with a grade factor, for race predictions.
+    """
+    return [
+        (float(distance), float(time) * factor)
+        for act_type, distance, time, factor in zip(
+            activity_type, distances, times, grade_factors
+        )
+        if factor and is_valid_run_activity(act_type, distance, time)
+    ]
+
+
+@tracing.traced()
+def prepare_recent_totals(
     activity_type: list[str],
     distances: list[str],
     times: list[str],
     total_elevation_gain: list[str],
+) -> dict[str, float]:
+    """Count and total up the valid recent runs."""
+    run_indices = filter_valid_activities(
+        activity_type, distances, times, total_elevation_gain
+    )
+
+    recent_distance, recent_time, recent_elevation = calculate_activity_totals(
+        distances, times, total_elevation_gain, run_indices
+    )
+
+    return {
+        "count": len(run_indices),
+        "distance": recent_distance,
+        "time": recent_time,
+        "elevation": recent_elevation,
+    }
+
+
+@tracing.traced()
+def prepare_comparison_data(
+    recent_totals: dict[str, float],
     ytd_stats: dict,
     all_time_stats: dict,
 ) -> dict[str, list[str] | list[float]]:
@@ -78,23 +147,23 @@ def prepare_comparison_data(
     all_time_time_mins = float_convert(all_time_elapsed_time) / 60
     all_time_elevation = float_convert(all_time_elevation_gain)
 
-    run_indices = filter_valid_activities(
-        activity_type, distances, times, total_elevation_gain
-    )
-
-    # calculate recent totals using run_indices
-    recent_distance, recent_time, recent_elevation = calculate_activity_totals(
-        distances, times, total_elevation_gain, run_indices
-    )
-
     return {
         "periods": ["Recent", "YTD", "All Time"],
-        "total_distances": [recent_distance, ytd_distance_km, all_time_distance_km],
-        "total_times": [recent_time, ytd_time_mins, all_time_time_mins],
-        "total_elevation_gains": [recent_elevation, ytd_elevation, all_time_elevation],
+        "total_distances": [
+            recent_totals["distance"],
+            ytd_distance_km,
+            all_time_distance_km,
+        ],
+        "total_times": [recent_totals["time"], ytd_time_mins, all_time_time_mins],
+        "total_elevation_gains": [
+            recent_totals["elevation"],
+            ytd_elevation,
+            all_time_elevation,
+        ],
     }
 
 
+@tracing.traced()
 def prepare_best_efforts_data(
     best_efforts: list[dict],
 ) -> dict[str, list[float] | list[str]]:
@@ -121,3 +190,39 @@ def prepare_best_efforts_data(
         "pace_values": rounded_pace,
         "times": time_mins,
     }
+
+
+@tracing.traced()
+def prepare_zone_data(
+    histograms: list[dict[str, Any]],
+    boundaries: tuple[int, ...],
+    today: date | None = None,
+) -> dict[str, list]:
+    """
+    Minutes in each heart rate zone over each of the last ZONE_WEEKS weeks,
+    including weeks without any, and over the last ZONE_MONTHS months with
+    any, from the activities' heartrate_histogram values.
+    """
+    totals = zone_totals(histograms, boundaries)
+    zones = zone_names(boundaries)
+
+    monday = date.fromisoformat(week_start(today or date.today()))
+    weeks = [
+        (monday - timedelta(weeks=n)).isoformat() for n in range(ZONE_WEEKS - 1, -1, -1)
+    ]
+    week_totals = dict(totals["weeks"])
+    empty = [0.0] * len(zones)
+    week_minutes = [
+        [round(week_totals.get(week, empty)[zone] / 60, 1) for week in weeks]
+        for zone in range(len(zones))
+    ]
+
+    months = totals["months"][-ZONE_MONTHS:]
+    return {
+        "zones": zones,
+        # MM-DD of each week's Monday
+        "weeks": [week[5:] for week in weeks],
+        "week_minutes": week_minutes,
+        "months": [month for month, _ in months],
+        "month_minutes": [[round(t / 60, 1) for t in times] for _, times in months],
+    }
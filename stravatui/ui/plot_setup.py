@@ -1,215 +1,352 @@
+from datetime import date
 from typing import TYPE_CHECKING, Any
 
-from textual_plotext import PlotextPlot
+from .. import tracing
+from ..derived_cache import fingerprint
+from .decimate import grid_bin, lttb, scatter_bins
 
 if TYPE_CHECKING:
+    from textual_plotext.plot import Plot
+
     from ..app import StravaTUIApp
+    from .cached_plot import CachedPlot
 
-from .plot_data import (
-    prepare_best_efforts_data,
-    prepare_comparison_data,
-    prepare_overview_data,
-)
+# each setup_* function keys its plot on a fingerprint of the series it draws
+# and returns whether the plot changed, so refreshing with the same data is free
 
 
-def setup_overview_plots(
-    app: "StravaTUIApp", overview_data: dict[str, list[Any]]
+def _cached_plot(app: "StravaTUIApp", selector: str) -> "CachedPlot":
+    # imported here so plotext only loads once there's something to plot
+    from .cached_plot import CachedPlot
+
+    return app.query_one(selector, CachedPlot)
+
+
+def _scatter(
+    plt: "Plot",
+    xs: list[float],
+    ys: list[float],
+    bins: tuple[int, int],
+    **kwargs: Any,
 ) -> None:
-    """Setup subplot for overview page."""
-    overview_subplot = app.query_one("#plot-3", PlotextPlot).plt
-    overview_subplot.subplots(2, 2)
-
-    overview_subplot.subplot(1, 1).scatter(
-        overview_data["average_heartrate"],
-        overview_data["total_elevation_gain"],
-        marker="braille",
-        color="green",
-    )
-    overview_subplot.subplot(1, 1).xlabel("Avg HR (bpm)")
-    overview_subplot.subplot(1, 1).title("Avg HR (bpm) vs Elevation (m)")
-
-    overview_subplot.subplot(1, 2).scatter(
-        overview_data["distances"],
-        overview_data["times"],
-        marker="braille",
-        color="orange",
-    )
-    overview_subplot.subplot(1, 2).xlabel("Distance (km)")
-    overview_subplot.subplot(1, 2).title("Distance (km) vs Time (min)")
-
-    overview_subplot.subplot(2, 1).scatter(
-        overview_data["pace_mins"],
-        overview_data["average_heartrate"],
-        marker="braille",
-        color="red",
-    )
-    overview_subplot.subplot(2, 1).xlabel("Avg pace(min/km)")
-    overview_subplot.subplot(2, 1).title("Pace vs Avg HR (bpm)")
-
-    overview_subplot.subplot(2, 2).scatter(
-        overview_data["pace_mins"],
-        overview_data["total_elevation_gain"],
-        marker="braille",
-        color="cyan",
-    )
-    overview_subplot.subplot(2, 2).xlabel("Avg pace (min/km)")
-    overview_subplot.subplot(2, 2).title("Pace (min/km) vs Elevation (m)")
+    """Scatter plot reduced to one point per braille dot of the plot area."""
+    binned_x, binned_y = grid_bin(xs, ys, *bins)
+    plt.scatter(binned_x, binned_y, **kwargs)
 
-    app.query_one("#plot-3", PlotextPlot).refresh()
+
+@tracing.traced()
+def setup_overview_plots(
+    app: "StravaTUIApp",
+    overview_data: dict[str, list[Any]],
+    grade_adjusted: bool = False,
+) -> bool:
+    """
+    Setup subplot for overview page, with grade-adjusted pace in the pace
+    plots if `grade_adjusted`.
+    """
+    paces = overview_data["pace_mins"]
+    pace_label, pace_title = "Avg pace", "Pace"
+    if grade_adjusted:
+        # older cached view models don't have it
+        paces = overview_data.get("grade_adjusted_pace_mins", paces)
+        pace_label, pace_title = "Avg GAP", "GAP"
+
+    def draw(overview_subplot: "Plot", width: int, height: int) -> None:
+        bins = scatter_bins(width, height, rows=2, cols=2)
+        overview_subplot.subplots(2, 2)
+
+        _scatter(
+            overview_subplot.subplot(1, 1),
+            overview_data["average_heartrate"],
+            overview_data["total_elevation_gain"],
+            bins,
+            marker="braille",
+            color="green",
+        )
+        overview_subplot.subplot(1, 1).xlabel("Avg HR (bpm)")
+        overview_subplot.subplot(1, 1).title("Avg HR (bpm) vs Elevation (m)")
+
+        _scatter(
+            overview_subplot.subplot(1, 2),
+            overview_data["distances"],
+            overview_data["times"],
+            bins,
+            marker="braille",
+            color="orange",
+        )
+        overview_subplot.subplot(1, 2).xlabel("Distance (km)")
+        overview_subplot.subplot(1, 2).title("Distance (km) vs Time (min)")
+
+        _scatter(
+            overview_subplot.subplot(2, 1),
+            paces,
+            overview_data["average_heartrate"],
+            bins,
+            marker="braille",
+            color="red",
+        )
+        overview_subplot.subplot(2, 1).xlabel(f"{pace_label} (min/km)")
+        overview_subplot.subplot(2, 1).title(f"{pace_title} vs Avg HR (bpm)")
+
+        _scatter(
+            overview_subplot.subplot(2, 2),
+            paces,
+            overview_data["total_elevation_gain"],
+            bins,
+            marker="braille",
+            color="cyan",
+        )
+        overview_subplot.subplot(2, 2).xlabel(f"{pace_label} (min/km)")
+        overview_subplot.subplot(2, 2).title(f"{pace_title} (min/km) vs Elevation (m)")
+
+    return _cached_plot(app, "#plot-3").set_draw(
+        draw, fingerprint("overview", overview_data, grade_adjusted)
+    )
 
 
+@tracing.traced()
 def setup_comparison_plots(
     app: "StravaTUIApp", comparison_data: dict[str, list[str] | list[float]]
-) -> None:
+) -> bool:
     """Setup comparison subplot for overview page."""
-    distance_comparison_bar = app.query_one("#plot-4", PlotextPlot).plt
-    distance_comparison_bar.subplots(3, 1)
-
-    distance_comparison_bar.subplot(1, 1).bar(
-        comparison_data["periods"],
-        comparison_data["total_distances"],
-        orientation="horizontal",
-        width=2 / 5,
-        color="cyan",
-    )
-    distance_comparison_bar.subplot(1, 1).xlabel("Distance (km)")
 
-    distance_comparison_bar.subplot(2, 1).bar(
-        comparison_data["periods"],
-        comparison_data["total_times"],
-        orientation="horizontal",
-        width=2 / 5,
+    def draw(distance_comparison_bar: "Plot", width: int, height: int) -> None:
+        distance_comparison_bar.subplots(3, 1)
+
+        distance_comparison_bar.subplot(1, 1).bar(
+            comparison_data["periods"],
+            comparison_data["total_distances"],
+            orientation="horizontal",
+            width=2 / 5,
+            color="cyan",
+        )
+        distance_comparison_bar.subplot(1, 1).xlabel("Distance (km)")
+
+        distance_comparison_bar.subplot(2, 1).bar(
+            comparison_data["periods"],
+            comparison_data["total_times"],
+            orientation="horizontal",
+            width=2 / 5,
+        )
+        distance_comparison_bar.subplot(2, 1).xlabel("Time (mins)")
+
+        distance_comparison_bar.subplot(3, 1).bar(
+            comparison_data["periods"],
+            comparison_data["total_elevation_gains"],
+            orientation="horizontal",
+            width=2 / 5,
+            color="orange",
+        )
+        distance_comparison_bar.subplot(3, 1).xlabel("Elevation gain (m)")
+
+    return _cached_plot(app, "#plot-4").set_draw(
+        draw, fingerprint("comparison", comparison_data)
     )
-    distance_comparison_bar.subplot(2, 1).xlabel("Time (mins)")
-
-    distance_comparison_bar.subplot(3, 1).bar(
-        comparison_data["periods"],
-        comparison_data["total_elevation_gains"],
-        orientation="horizontal",
-        width=2 / 5,
-        color="orange",
+
+
+@tracing.traced()
+def setup_calendar_heatmap(
+    app: "StravaTUIApp",
+    calendar_data: dict[str, dict[str, list[float]]],
+    year: int,
+    metric: str,
+) -> bool:
+    """
+    Setup the calendar of a year's daily run distance or time next to the
+    comparison plots, from the daily bins (see daily_bins.calendar_years).
+    """
+    from .calendar_heatmap import CalendarHeatmap
+
+    days = calendar_data.get(str(year), {}).get(metric, [])
+    # days after today are blank, so the calendar changes daily too
+    key = fingerprint("calendar", days, year, metric, date.today())
+    return app.query_one("#calendar-heatmap", CalendarHeatmap).show(
+        days, year, metric, key
     )
-    distance_comparison_bar.subplot(3, 1).xlabel("Elevation gain (m)")
 
-    app.query_one("#plot-4", PlotextPlot).refresh()
+
+@tracing.traced()
+def setup_training_load_plot(app: "StravaTUIApp", load_data: dict[str, list]) -> bool:
+    """
+    Setup fitness, fatigue and form above 7 and 28 day rolling distance for
+    the overview page.
+    """
+
+    def draw(load_plot: "Plot", width: int, height: int) -> None:
+        # empty until the first history sync, and plotext can't draw a legend
+        # for an empty series
+        if not load_data["days"]:
+            load_plot.title("Training load shows once your history has synced")
+            return
+
+        load_plot.subplots(2, 1)
+        days = list(range(len(load_data["days"])))
+        # a date label about every 30 days, at most one per 12 columns
+        step = max(30, len(days) * 12 // max(width, 1))
+        ticks = days[::step], [day[5:] for day in load_data["days"][::step]]
+        # each line decimated to what the plot's width can show
+        points = max(3, width * 2)
+
+        fitness = load_plot.subplot(1, 1)
+        for key, label, color in (
+            ("ctl", "fitness", "cyan"),
+            ("atl", "fatigue", "red"),
+            ("tsb", "form", "green"),
+        ):
+            fitness.plot(
+                *lttb(days, load_data[key], points),
+                marker="braille",
+                color=color,
+                label=label,
+            )
+        fitness.xticks(*ticks)
+        fitness.title("Training load")
+
+        volume = load_plot.subplot(2, 1)
+        for key, label, color in (
+            ("distance_7", "7 day", "orange"),
+            ("distance_28", "28 day", "blue"),
+        ):
+            volume.plot(
+                *lttb(days, load_data[key], points),
+                marker="braille",
+                color=color,
+                label=label,
+            )
+        volume.xticks(*ticks)
+        volume.title("Rolling distance (km)")
+
+    return _cached_plot(app, "#load-plot").set_draw(
+        draw, fingerprint("training load", load_data)
+    )
 
 
+@tracing.traced()
 def setup_recent_plots(
     app: "StravaTUIApp", overview_data: dict[str, list[Any]]
-) -> None:
+) -> bool:
     """Setup subplot with recent activities data."""
-    recent_subplot = app.query_one("#last-five-subplot", PlotextPlot).plt
-    recent_subplot.subplots(2, 2)
-
-    recent_subplot.subplot(1, 1).bar(
-        overview_data["names"][:5],
-        overview_data["average_heartrate"][:5],
-        orientation="horizontal",
-        width=1 / 7,
-        color="#DCD37C",
+    # only the five most recent activities are shown, so key on just those
+    recent = {key: values[:5] for key, values in overview_data.items()}
+
+    def draw(recent_subplot: "Plot", width: int, height: int) -> None:
+        recent_subplot.subplots(2, 2)
+
+        recent_subplot.subplot(1, 1).bar(
+            recent["names"],
+            recent["average_heartrate"],
+            orientation="horizontal",
+            width=1 / 7,
+            color="#DCD37C",
+        )
+        recent_subplot.subplot(1, 1).xlabel("Average heartrate")
+
+        recent_subplot.subplot(1, 2).bar(
+            recent["names"],
+            recent["distances"],
+            orientation="horizontal",
+            width=1 / 5,
+            color="orange",
+        )
+        recent_subplot.subplot(1, 2).xlabel("Distance (km)")
+
+        recent_subplot.subplot(2, 1).bar(
+            recent["names"],
+            recent["times"],
+            orientation="horizontal",
+            width=1 / 5,
+            color="red",
+        )
+        recent_subplot.subplot(2, 1).xlabel("Time (min)")
+
+        recent_subplot.subplot(2, 2).bar(
+            recent["names"],
+            recent["total_elevation_gain"],
+            orientation="horizontal",
+            width=1 / 5,
+            color="cyan",
+        )
+        recent_subplot.subplot(2, 2).xlabel("Total elevation gain (m)")
+
+    return _cached_plot(app, "#last-five-subplot").set_draw(
+        draw, fingerprint("recent", recent)
     )
-    recent_subplot.subplot(1, 1).xlabel("Average heartrate")
-
-    recent_subplot.subplot(1, 2).bar(
-        overview_data["names"][:5],
-        overview_data["distances"][:5],
-        orientation="horizontal",
-        width=1 / 5,
-        color="orange",
-    )
-    recent_subplot.subplot(1, 2).xlabel("Distance (km)")
-
-    recent_subplot.subplot(2, 1).bar(
-        overview_data["names"][:5],
-        overview_data["times"][:5],
-        orientation="horizontal",
-        width=1 / 5,
-        color="red",
-    )
-    recent_subplot.subplot(2, 1).xlabel("Time (min)")
-
-    recent_subplot.subplot(2, 2).bar(
-        overview_data["names"][:5],
-        overview_data["total_elevation_gain"][:5],
-        orientation="horizontal",
-        width=1 / 5,
-        color="cyan",
-    )
-    recent_subplot.subplot(2, 2).xlabel("Total elevation gain (m)")
-
-    app.query_one("#last-five-subplot", PlotextPlot).refresh()
 
 
+@tracing.traced()
 def setup_best_efforts_plot(
     app: "StravaTUIApp", effort: dict[str, list[float] | list[str]]
-) -> None:
+) -> bool:
     """Setup best effors time comparison plot."""
-    efforts_plot = app.query_one("#effort-plot", PlotextPlot).plt
-    efforts_plot.bar(
-        effort["distance_km"],
-        effort["times"],
-        width=1,
-        orientation="horizontal",
+
+    def draw(efforts_plot: "Plot", width: int, height: int) -> None:
+        efforts_plot.bar(
+            effort["distance_km"],
+            effort["times"],
+            width=1,
+            orientation="horizontal",
+        )
+        efforts_plot.yreverse(reverse=True)
+        efforts_plot.xlabel("Time (mins)")
+        efforts_plot.title("Best effort distance (km) vs Time (mins)")
+
+    return _cached_plot(app, "#effort-plot").set_draw(
+        draw, fingerprint("efforts", effort)
     )
-    efforts_plot.yreverse(reverse=True)
-    efforts_plot.xlabel("Time (mins)")
-    efforts_plot.title("Best effort distance (km) vs Time (mins)")
-    app.query_one("#effort-plot", PlotextPlot).refresh()
 
 
+@tracing.traced()
 def setup_progression_plot(
     app: "StravaTUIApp", effort_data: dict[str, list[float] | list[str]]
-) -> None:
+) -> bool:
     """Setup distance against pace progression plot."""
     # only use filly if there's data to plot
     has_data = len(effort_data["distance_km"]) > 0
 
-    progression_plot = app.query_one("#progression-plot", PlotextPlot).plt
-    progression_plot.plot(
-        effort_data["distance_km"],
-        effort_data["pace_values"],
-        marker="fhd",
-        color="orange",
-        filly=has_data,
+    def draw(progression_plot: "Plot", width: int, height: int) -> None:
+        distance_km, pace_values = lttb(
+            effort_data["distance_km"],
+            effort_data["pace_values"],
+            max(3, width * 2),
+        )
+        progression_plot.plot(
+            distance_km,
+            pace_values,
+            marker="fhd",
+            color="orange",
+            filly=has_data,
+        )
+        progression_plot.xlabel("Distance (km)")
+        progression_plot.title("Change of pace (min/km) across best effort distances")
+
+    return _cached_plot(app, "#progression-plot").set_draw(
+        draw, fingerprint("progression", effort_data)
     )
-    progression_plot.xlabel("Distance (km)")
-    progression_plot.title("Change of pace (min/km) across best effort distances")
-    app.query_one("#progression-plot", PlotextPlot).refresh()
-
 
-def setup_plots(
-    app,
-    recent_data: dict,
-    ytd_stats: dict,
-    all_time_stats: dict,
-    effort_data: list[dict],
-) -> None:
-    """Pass prepared data to plot widgets."""
-    effort = prepare_best_efforts_data(effort_data)
-
-    overview_data = prepare_overview_data(
-        recent_data["names"],
-        recent_data["distances"],
-        recent_data["times"],
-        recent_data["average_heartrate"],
-        recent_data["total_elevation_gain"],
-        recent_data["activity_type"],
-    )
-    comparison_data = prepare_comparison_data(
-        recent_data["activity_type"],
-        recent_data["distances"],
-        recent_data["times"],
-        recent_data["total_elevation_gain"],
-        ytd_stats,
-        all_time_stats,
-    )
 
-    setup_overview_plots(app, overview_data)
+# zone colours from easy to hard
+ZONE_COLORS = ["blue", "cyan", "green", "orange", "red"]
 
-    setup_comparison_plots(app, comparison_data)
 
-    setup_recent_plots(app, overview_data)
+@tracing.traced()
+def setup_zones_plot(app: "StravaTUIApp", zone_data: dict[str, list]) -> bool:
+    """Setup weekly time in heart rate zones, one stacked bar per week."""
 
-    setup_best_efforts_plot(app, effort)
+    def draw(zones_plot: "Plot", width: int, height: int) -> None:
+        zones = zone_data["zones"]
+        # more zones than colours share the hardest zone's colour
+        colors = [ZONE_COLORS[min(i, len(ZONE_COLORS) - 1)] for i in range(len(zones))]
+        zones_plot.stacked_bar(
+            zone_data["weeks"],
+            zone_data["week_minutes"],
+            labels=zones,
+            color=colors,
+            width=3 / 5,
+        )
+        zones_plot.xlabel("Week starting")
+        zones_plot.ylabel("Time (mins)")
+        zones_plot.title("Weekly time in heart rate zones")
 
-    setup_progression_plot(app, effort)
+    return _cached_plot(app, "#zones-plot").set_draw(
+        draw, fingerprint("zones", zone_data)
+    )
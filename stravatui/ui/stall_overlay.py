@@ -0,0 +1,20 @@
+from textual.widgets import Static
+
+from ..stall_watchdog import StallWatchdog
+
+# how often (seconds) the overlay re-reads the lag percentiles
+REFRESH_INTERVAL = 1.0
+
+
+class StallOverlay(Static):
+    """One-line overlay of event loop lag percentiles and the latest stall."""
+
+    def __init__(self, watchdog: StallWatchdog, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.watchdog = watchdog
+
+    def on_mount(self) -> None:
+        self.set_interval(REFRESH_INTERVAL, self.update_summary)
+
+    def update_summary(self) -> None:
+        self.update(self.watchdog.summary())
@@ -3,28 +3,25 @@ from typing import TYPE_CHECKING
 from rich.text import Text
 from textual.widgets import DataTable
 
-from ..activity_utils import (
-    calculate_activity_totals,
-    filter_valid_activities,
-    float_convert,
-)
-from ..formatters import create_pace_list
+from .. import tracing
+from ..activity_utils import float_convert
+from ..formatters import _format_pace, create_pace_list
+from ..race_calculator import _format_race_time
+from ..stream_metrics import SPLIT_UNITS
 
 if TYPE_CHECKING:
     from ..app import StravaTUIApp
 
 
-def populate_activities_table(app: "StravaTUIApp", last_five_data: list[dict]) -> None:
-    """Populate the activities table with last five activities data."""
+@tracing.traced()
+def format_activity_rows(last_five_data: list[dict]) -> list[tuple[str, ...]]:
+    """Format the last five activities as rows for the activities table."""
     names = [d["names"] for d in last_five_data]
     times = [d["times"] for d in last_five_data]
     distances = [d["distances"] for d in last_five_data]
 
     paces = create_pace_list(times, distances)
 
-    table_1 = app.query_one("#table-1", DataTable)
-    table_1.add_columns("Activity", "Distance (km)", "Time (mins)", "Pace (min/km)")
-
     formatted_rows = []
     for name, distance, time, pace in zip(names, distances, times, paces):
         try:
@@ -34,16 +31,16 @@ def populate_activities_table(app: "StravaTUIApp", last_five_data: list[dict]) -
         except (ValueError, ZeroDivisionError):
             formatted_rows.append((name, "0.0", "0.0", "N/A"))
 
-    table_1.add_rows(formatted_rows)
+    return formatted_rows
 
 
-def populate_comparison_table(
-    app: "StravaTUIApp",
+@tracing.traced()
+def format_comparison_rows(
     all_time_data: dict[str, str],
     ytd_data: dict[str, str],
-    recent_data: dict[str, list[str]],
-) -> None:
-    """Populate comparison table with common stats across all three periods."""
+    recent_totals: dict[str, float],
+) -> list[tuple[str, ...]]:
+    """Format common stats across all three periods as comparison table rows."""
 
     all_time_count = all_time_data["all_time_count"]
     all_time_distance = float_convert(all_time_data["all_time_distance"]) / 1000
@@ -55,75 +52,286 @@ def populate_comparison_table(
     ytd_time = float_convert(ytd_data["ytd_moving_time"]) / 60
     ytd_elevation_gain = ytd_data["ytd_elevation_gain"]
 
-    run_indices = filter_valid_activities(
-        recent_data["activity_type"],
-        recent_data["distances"],
-        recent_data["times"],
-        recent_data["total_elevation_gain"],
-    )
-    recent_count = str(len(run_indices))
-    recent_distance, recent_time, recent_elevation = calculate_activity_totals(
-        recent_data["distances"],
-        recent_data["times"],
-        recent_data["total_elevation_gain"],
-        run_indices,
-    )
+    recent_count = str(recent_totals["count"])
+    recent_distance = recent_totals["distance"]
+    recent_time = recent_totals["time"]
+    recent_elevation = recent_totals["elevation"]
 
-    table_2 = app.query_one("#table-2", DataTable)
+    return [
+        (
+            "Last 60 Days",
+            f"{recent_count}",
+            f"{recent_distance:.2f}",
+            f"{recent_time:.2f}",
+            f"{str(recent_elevation)}",
+        ),
+        (
+            "YTD",
+            f"{ytd_count}",
+            f"{ytd_distance:.2f}",
+            f"{ytd_time:.2f}",
+            f"{int(float(ytd_elevation_gain)):.0f}",
+        ),
+        (
+            "All Time",
+            f"{all_time_count}",
+            f"{all_time_distance:.2f}",
+            f"{all_time_time:.2f}",
+            f"{int(float(all_time_elevation_gain)):.0f}",
+        ),
+    ]
 
-    # only show fields available for all three periods
-    table_2.add_columns(
-        "Period",
-        "Activities",
-        "Distance (km)",
-        "Time (mins)",
-        "Elevation (m)",
-    )
 
-    table_2.add_rows(
-        [
-            (
-                "Last 60 Days",
-                f"{recent_count}",
-                f"{recent_distance:.2f}",
-                f"{recent_time:.2f}",
-                f"{str(recent_elevation)}",
-            ),
+@tracing.traced()
+def format_best_effort_rows(best_efforts_summary: list[dict]) -> list[tuple[str, ...]]:
+    """Format aggregated best efforts as rows for the best efforts table."""
+    return [
+        (
+            effort["distance"],
+            effort["best_time"],
+            effort["pace"],
+            effort["activity_name"],
+            effort["date"],
+        )
+        for effort in best_efforts_summary
+    ]
+
+
+def format_split_rows(
+    splits: list[dict] | None, unit: str
+) -> list[tuple[str, ...]]:
+    """Format an activity's splits in `unit` ("km" or "mile") as table rows."""
+    unit_metres = SPLIT_UNITS[unit]
+    formatted_rows = []
+    for number, split in enumerate(splits or [], 1):
+        distance = split["distance"]
+        flat_distance = split.get("flat_distance")
+        elevation = split["elevation"]
+        heartrate = split["heartrate"]
+
+        # a short final split is labelled with how much of a unit it covers
+        label = str(number)
+        if distance < unit_metres - 1:
+            label = f"{distance / unit_metres:.2f}"
+        formatted_rows.append((
+            label,
+            _format_race_time(split["time"]),
+            # _format_pace is per km, so scale the distance to get pace per unit
+            _format_pace(split["time"], distance * 1000 / unit_metres),
             (
-                "YTD",
-                f"{ytd_count}",
-                f"{ytd_distance:.2f}",
-                f"{ytd_time:.2f}",
-                f"{int(float(ytd_elevation_gain)):.0f}",
+                _format_pace(split["time"], flat_distance * 1000 / unit_metres)
+                if flat_distance
+                else "-"
             ),
-            (
-                "All Time",
-                f"{all_time_count}",
-                f"{all_time_distance:.2f}",
-                f"{all_time_time:.2f}",
-                f"{int(float(all_time_elevation_gain)):.0f}",
+            f"{elevation:+.0f}" if elevation is not None else "-",
+            f"{heartrate:.0f}" if heartrate else "-",
+        ))
+
+    return formatted_rows
+
+
+def _format_hours(minutes: float) -> str:
+    return f"{int(minutes // 60)}:{int(minutes % 60):02d}"
+
+
+def format_zone_rows(zone_data: dict[str, list]) -> list[tuple[str, ...]]:
+    """
+    Format monthly minutes in each heart rate zone as table rows, newest
+    first, with each zone's time (h:mm) and share of the month.
+    """
+    formatted_rows = []
+    for month, minutes in zip(
+        reversed(zone_data["months"]), reversed(zone_data["month_minutes"])
+    ):
+        total = sum(minutes)
+        formatted_rows.append((
+            month,
+            *(
+                f"{_format_hours(zone)} ({zone / total:.0%})" if total else "-"
+                for zone in minutes
             ),
-        ]
+            _format_hours(total),
+        ))
+
+    return formatted_rows
+
+
+def _sport_name(activity_type: str) -> str:
+    """Return the bare sport name from a stored type, e.g. "root='Run'" -> "Run"."""
+    return activity_type.removeprefix("root='").removesuffix("'")
+
+
+def format_history_rows(
+    rows: list[dict], name_width: int = 32
+) -> list[tuple[str, ...]]:
+    """Format a window of stored activities as rows for the history table."""
+    formatted_rows = []
+    for row in rows:
+        name = row["names"]
+        if len(name) > name_width:
+            name = name[: name_width - 1] + "…"
+
+        distance = row["distances"]
+        heartrate = row["average_heartrate"]
+
+        formatted_rows.append((
+            row["start_dates"][:10],
+            name,
+            _sport_name(row["activity_type"]),
+            f"{distance / 1000:.2f}",
+            f"{row['times'] / 60:.2f}",
+            _format_pace(row["times"], distance),
+            f"{heartrate:.0f}" if heartrate else "-",
+        ))
+
+    return formatted_rows
+
+
+def _content_keys(rows: list[tuple[str, ...]]) -> list[str]:
+    """Key rows by their content, numbering repeats, for rows with no natural id."""
+    seen: dict[str, int] = {}
+    keys = []
+    for row in rows:
+        key = "|".join(row)
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return keys
+
+
+def update_table(
+    table: DataTable,
+    columns: tuple[str, ...],
+    rows: list[tuple],
+    row_keys: list[str],
+) -> int:
+    """
+    Bring a table in line with `rows` in place, matching rows up by
+    `row_keys`: rows that went away are removed, new ones added and only
+    cells whose value changed are updated. Columns are only added the first
+    time, so this is safe to call on every refresh. Returns the number of
+    changes made (0 means the table already matched).
+    """
+    if not table.columns:
+        for label in columns:
+            table.add_column(label, key=label)
+
+    wanted = dict(zip(row_keys, rows))
+    changes = 0
+
+    for row_key in [key.value for key in table.rows]:
+        if row_key not in wanted:
+            table.remove_row(row_key)
+            changes += 1
+
+    for row_key, row in wanted.items():
+        if row_key not in table.rows:
+            table.add_row(*row, key=row_key)
+            changes += 1
+            continue
+
+        for column, old, new in zip(columns, table.get_row(row_key), row):
+            if old != new:
+                table.update_cell(row_key, column, new, update_width=True)
+                changes += 1
+
+    if changes and [row.key.value for row in table.ordered_rows] != row_keys:
+        # added rows go to the end, so put everything back in order
+        rank = {tuple(map(str, row)): i for i, row in enumerate(wanted.values())}
+        table.sort(key=lambda values: rank.get(tuple(map(str, values)), 0))
+
+    return changes
+
+
+@tracing.traced()
+def populate_activities_table(
+    app: "StravaTUIApp",
+    activity_rows: list[tuple[str, ...]],
+    activity_ids: list[str] | None = None,
+) -> int:
+    """
+    Update the activities table with pre-formatted last five activity rows,
+    keyed by activity id when every row has one so a selected row can be
+    looked up.
+    """
+    table_1 = app.query_one("#table-1", DataTable)
+    ids = activity_ids or []
+    if len(ids) != len(activity_rows) or not all(ids) or len(set(ids)) != len(ids):
+        ids = _content_keys(activity_rows)
+
+    return update_table(
+        table_1,
+        ("Activity", "Distance (km)", "Time (mins)", "Pace (min/km)"),
+        activity_rows,
+        ids,
+    )
+
+
+def populate_splits_table(
+    table: DataTable, unit: str, split_rows: list[tuple[str, ...]]
+) -> int:
+    """Update a splits table with pre-formatted split rows."""
+    unit_label = "km" if unit == "km" else "mi"
+    return update_table(
+        table,
+        (unit_label, "Time", f"Pace (min/{unit_label})", "GAP", "Elev (m)", "HR"),
+        split_rows,
+        [str(i) for i in range(len(split_rows))],
+    )
+
+
+@tracing.traced()
+def populate_comparison_table(
+    app: "StravaTUIApp", comparison_rows: list[tuple[str, ...]]
+) -> int:
+    """Update comparison table with pre-formatted rows for the three periods."""
+    table_2 = app.query_one("#table-2", DataTable)
+
+    # only show fields available for all three periods, one row per period
+    return update_table(
+        table_2,
+        ("Period", "Activities", "Distance (km)", "Time (mins)", "Elevation (m)"),
+        comparison_rows,
+        [row[0] for row in comparison_rows],
     )
 
 
+@tracing.traced()
 def populate_best_efforts_table(
-    app: "StravaTUIApp", best_efforts_summary: list[dict]
-) -> None:
-    """Populate the best efforts table with aggregated best efforts data."""
+    app: "StravaTUIApp", best_effort_rows: list[tuple[str, ...]]
+) -> int:
+    """Update the best efforts table with pre-formatted best effort rows."""
     table_4 = app.query_one("#best-efforts-table", DataTable)
 
-    # clear existing table
-    table_4.clear()
+    rows = [
+        (
+            Text(distance, justify="center"),
+            Text(best_time, justify="center"),
+            Text(pace, justify="center"),
+            activity_name,
+            date,
+        )
+        for distance, best_time, pace, activity_name, date in best_effort_rows
+    ]
 
-    # add fixed columns
-    table_4.add_columns("Distance", "Time (mins)", "Pace (min/km)", "Activity", "Date")
+    # one row per best effort distance
+    return update_table(
+        table_4,
+        ("Distance", "Time (mins)", "Pace (min/km)", "Activity", "Date"),
+        rows,
+        [row[0] for row in best_effort_rows],
+    )
 
-    for effort in best_efforts_summary:
-        table_4.add_row(
-            Text(effort["distance"], justify="center"),
-            Text(effort["best_time"], justify="center"),
-            Text(effort["pace"], justify="center"),
-            effort["activity_name"],
-            effort["date"],
-        )
+
+@tracing.traced()
+def populate_zones_table(
+    app: "StravaTUIApp", zones: list[str], zone_rows: list[tuple[str, ...]]
+) -> int:
+    """Update the zones table with pre-formatted monthly rows."""
+    table = app.query_one("#zones-table", DataTable)
+
+    # the zones are the columns, so start over when their boundaries change
+    columns = ("Month", *zones, "Total")
+    if tuple(column.value for column in table.columns) != columns:
+        table.clear(columns=True)
+
+    return update_table(table, columns, zone_rows, [row[0] for row in zone_rows])
@@ -1,6 +1,5 @@
 from rich.text import Text
 
-from ..activity_utils import calculate_activity_totals, filter_valid_activities
 from ..formatters import DISTANCES, ELEVATIONS
 
 last_five_label = Text()
@@ -14,6 +13,13 @@ best_efforts_label = Text.assemble(
     justify="center",
 )
 
+zones_label = Text.assemble(
+    ("Time in "),
+    ("heart rate zones", "#F86C6C bold italic"),
+    (" by week and by month"),
+    justify="center",
+)
+
 about_page_text = Text.assemble(
     ("Thanks for using "),
     ("stravaTUI", "#FBB86C bold"),
@@ -30,32 +36,13 @@ about_page_bottom_text = Text.assemble(
 )
 
 
-def _get_recent_elevation_gain_sum(recent_data):
-    distances = recent_data["distances"]
-    times = recent_data["times"]
-    total_elevation_gain = recent_data["total_elevation_gain"]
-    activity_type = recent_data["activity_type"]
-
-    run_indices = filter_valid_activities(
-        activity_type, distances, times, total_elevation_gain
-    )
-
-    recent_distance, recent_time, recent_elevation_gain = calculate_activity_totals(
-        distances, times, total_elevation_gain, run_indices
-    )
-
-    return recent_elevation_gain
-
-
 def create_overview_label(
-    all_time_distance_km: float, recent_data: dict[str, list[str]]
+    all_time_distance_km: float, recent_elevation_gain: float
 ) -> Text:
     """
     Create a label for the overview page based on user's all time distance and
     recent elevation gain.
     """
-    recent_elevation_gain = _get_recent_elevation_gain_sum(recent_data)
-
     closest_distance = min(
         DISTANCES.items(), key=lambda x: abs(x[1] - all_time_distance_km)
     )[0]
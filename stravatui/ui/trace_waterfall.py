@@ -0,0 +1,84 @@
+from typing import Any
+
+from rich.text import Text
+from textual import events
+from textual.widgets import Static
+
+from .. import tracing
+
+NAME_WIDTH = 44
+DETAIL_WIDTH = 40
+MIN_BAR_WIDTH = 10
+BAR_STYLE = "#FBB86C"
+ERROR_STYLE = "#d9534f"
+
+
+def _format_bytes(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / 1024 / 1024:.1f} MiB"
+
+
+def _span_details(span: dict[str, Any]) -> str:
+    args = span["args"]
+    details = [span["thread"]]
+    for key, value in args.items():
+        if value is None:
+            continue
+        if key == "bytes":
+            details.append(_format_bytes(value))
+        else:
+            details.append(f"{key}={value}")
+    return " ".join(details)
+
+
+def format_waterfall(spans: list[dict[str, Any]], width: int) -> Text:
+    """
+    Lay out spans (see tracing.last_trace) as a waterfall: one line per span,
+    indented by nesting, with a bar placed by start time and sized by duration.
+    """
+    if not spans:
+        return Text("no load traced yet")
+
+    origin = min(span["start"] for span in spans)
+    total = max(span["end"] for span in spans) - origin or 1e-9
+    bar_width = max(MIN_BAR_WIDTH, width - NAME_WIDTH - DETAIL_WIDTH - 12)
+
+    text = Text(no_wrap=True, overflow="ellipsis")
+    text.append(f"last load: {total * 1000:.1f} ms, {len(spans)} spans\n\n", "bold")
+
+    for span in spans:
+        name = ("  " * span["depth"] + span["name"])[:NAME_WIDTH]
+        duration = span["end"] - span["start"]
+
+        first = int((span["start"] - origin) / total * bar_width)
+        length = max(1, round(duration / total * bar_width))
+        length = min(length, bar_width - first)
+        bar = " " * first + "█" * length + " " * (bar_width - first - length)
+
+        text.append(f"{name:<{NAME_WIDTH}} ")
+        text.append(bar, ERROR_STYLE if "error" in span["args"] else BAR_STYLE)
+        text.append(f" {duration * 1000:>8.2f} ms  ")
+        text.append(_span_details(span)[:DETAIL_WIDTH] + "\n", "dim")
+
+    return text
+
+
+class TraceWaterfall(Static):
+    """Waterfall of the spans traced during the last data load."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._spans: list[dict[str, Any]] = []
+
+    def show(self, spans: list[dict[str, Any]]) -> None:
+        self._spans = spans
+        self.update(format_waterfall(spans, self.size.width))
+
+    def on_resize(self, event: events.Resize) -> None:
+        # keep the app's "tracing is off" message rather than an empty waterfall
+        if not tracing.is_enabled():
+            return
+        self.update(format_waterfall(self._spans, event.size.width))
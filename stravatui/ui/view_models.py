@@ -0,0 +1,205 @@
+from datetime import date
+from typing import Any
+
+from .. import tracing
+from ..daily_bins import calendar_years
+from ..data_manager import get_last_five_activities
+from ..derived_cache import cached, fingerprint
+from ..hr_zones import load_zones, week_start
+from ..store import ActivityStore
+from ..training_load import load_state, state_mtime, training_load_series
+from .plot_data import (
+    prepare_best_efforts_data,
+    prepare_comparison_data,
+    prepare_overview_data,
+    prepare_race_efforts,
+    prepare_recent_totals,
+    prepare_zone_data,
+)
+from .tables import (
+    format_activity_rows,
+    format_best_effort_rows,
+    format_comparison_rows,
+    format_zone_rows,
+)
+from .text_labels import create_overview_label
+
+
+def _grade_factors(ids: list[Any], athlete: str | None) -> list[float | None]:
+    """Each activity's stored grade factor, None where it hasn't been computed."""
+    # the metrics engine brings in multiprocessing, so import it when needed
+    from ..analytics import metric_values
+
+    grade_adjusted = metric_values("grade_adjusted", athlete)
+    factors = []
+    for activity_id in ids:
+        value = grade_adjusted.get(int(activity_id)) if activity_id else None
+        factors.append(value.get("factor") if value else None)
+    return factors
+
+
+def _zone_data(athlete: str | None) -> dict[str, list]:
+    """
+    Weekly and monthly time in heart rate zones, only summed again when the
+    stored histograms, the zone boundaries or the current week change.
+    """
+    from ..analytics import metric_values, results_mtime
+
+    boundaries = load_zones(athlete)
+    return cached(
+        "zone_data",
+        (
+            results_mtime("heartrate_histogram", athlete),
+            boundaries,
+            week_start(date.today()),
+        ),
+        lambda: prepare_zone_data(
+            list(metric_values("heartrate_histogram", athlete).values()), boundaries
+        ),
+        athlete,
+    )
+
+
+# days of training load on the overview
+LOAD_DAYS = 180
+
+
+def _training_load_data(athlete: str | None) -> dict[str, list]:
+    """
+    The last LOAD_DAYS days of training load, only read from the store again
+    when it has changed or a day has passed.
+    """
+    today = date.today()
+    return cached(
+        "training_load_data",
+        (state_mtime(athlete), today.isoformat(), LOAD_DAYS),
+        lambda: training_load_series(load_state(athlete), LOAD_DAYS, today),
+        athlete,
+    )
+
+
+@tracing.traced()
+def build_view_models(
+    recent_data: dict[str, list[str]],
+    all_time_data: dict[str, str],
+    ytd_run_data: dict[str, str],
+    best_efforts_summary: list[dict],
+    athlete: str | None = None,
+) -> dict[str, Any]:
+    """
+    Do all the filtering, aggregation and formatting the UI needs so the main
+    thread only has to hand ready-to-render values to widgets. Safe to call
+    from a worker thread since it never touches the DOM.
+
+    Each view model is memoised by a fingerprint of its inputs and persisted,
+    so unchanged data skips preparation entirely on the next launch.
+    """
+    ytd_distance_km = float(ytd_run_data["ytd_distance"]) / 1000
+    grade_factors = _grade_factors(recent_data.get("ids", []), athlete)
+    totals_inputs = (
+        recent_data["activity_type"],
+        recent_data["distances"],
+        recent_data["times"],
+        recent_data["total_elevation_gain"],
+    )
+    overview_inputs = (
+        recent_data["names"],
+        recent_data["distances"],
+        recent_data["times"],
+        recent_data["average_heartrate"],
+        recent_data["total_elevation_gain"],
+        recent_data["activity_type"],
+        grade_factors,
+    )
+    last_five_data = get_last_five_activities(recent_data)
+    zone_data = _zone_data(athlete)
+
+    # hash the (potentially large) activity lists once and key both of the
+    # view models derived from them on that
+    recent_key = fingerprint(*overview_inputs)
+
+    recent_totals = cached(
+        "recent_totals",
+        (recent_key,),
+        lambda: prepare_recent_totals(*totals_inputs),
+        athlete,
+    )
+
+    return {
+        # what selecting a last five row needs to look up its splits
+        "activity_refs": [
+            {"id": d["ids"], "start": d["start_dates"], "name": d["names"]}
+            for d in last_five_data
+        ],
+        "race_efforts": prepare_race_efforts(
+            recent_data["distances"],
+            recent_data["times"],
+            recent_data["activity_type"],
+            grade_factors,
+        ),
+        "overview_label": create_overview_label(
+            ytd_distance_km, recent_totals["elevation"]
+        ),
+        "activity_rows": cached(
+            "activity_rows",
+            (last_five_data,),
+            lambda: format_activity_rows(last_five_data),
+            athlete,
+        ),
+        "comparison_rows": cached(
+            "comparison_rows",
+            (all_time_data, ytd_run_data, recent_totals),
+            lambda: format_comparison_rows(all_time_data, ytd_run_data, recent_totals),
+            athlete,
+        ),
+        "best_effort_rows": cached(
+            "best_effort_rows",
+            (best_efforts_summary,),
+            lambda: format_best_effort_rows(best_efforts_summary),
+            athlete,
+        ),
+        "overview_data": cached(
+            "overview_data",
+            (recent_key,),
+            lambda: prepare_overview_data(*overview_inputs),
+            athlete,
+        ),
+        "comparison_data": cached(
+            "comparison_data",
+            (recent_totals, ytd_run_data, all_time_data),
+            lambda: prepare_comparison_data(recent_totals, ytd_run_data, all_time_data),
+            athlete,
+        ),
+        # read straight from the daily bins, which are already per day
+        "calendar_data": calendar_years(athlete),
+        "training_load_data": _training_load_data(athlete),
+        "zone_data": zone_data,
+        "zone_rows": format_zone_rows(zone_data),
+        "effort_data": cached(
+            "effort_data",
+            (best_efforts_summary,),
+            lambda: prepare_best_efforts_data(best_efforts_summary),
+            athlete,
+        ),
+    }
+
+
+@tracing.traced()
+def build_search_overview(store: ActivityStore, positions: list[int]) -> dict[str, list]:
+    """Overview plot data for the store activities matching a search."""
+    columns = store.columns
+
+    def column(name: str) -> list[str]:
+        # same string form as the activities cache prepare_overview_data expects
+        values = columns[name]
+        return [str(values[i]) for i in positions]
+
+    return prepare_overview_data(
+        column("names"),
+        column("distances"),
+        column("times"),
+        column("average_heartrate"),
+        column("total_elevation_gain"),
+        column("activity_type"),
+        _grade_factors([columns["ids"][i] for i in positions], store.athlete),
+    )
@@ -0,0 +1,75 @@
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from stravatui import data_manager
+from stravatui.tracks import Track, from_api_streams
+
+ATHLETE = "test"
+
+
+@pytest.fixture(autouse=True)
+def data_dirs(tmp_path, monkeypatch):
+    """Keep every athlete's caches and stores in a temporary directory."""
+    monkeypatch.setattr(data_manager, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(data_manager, "ATHLETES_DIR", tmp_path / "athletes")
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def utc(monkeypatch):
+    """Run in UTC, as activities are put on days in local time."""
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def make_record() -> Callable[..., dict[str, Any]]:
+    """Build a store record, a 5 km run at 5:00/km unless told otherwise."""
+
+    def make(activity_id: int, **columns: Any) -> dict[str, Any]:
+        record = {
+            "ids": activity_id,
+            "names": f"Run {activity_id}",
+            "start_dates": "2024-03-01T12:00:00+00:00",
+            "activity_type": "root='Run'",
+            "distances": 5000.0,
+            "times": 1500,
+            "total_elevation_gain": 20.0,
+            "average_heartrate": 150.0,
+        }
+        record.update(columns)
+        return record
+
+    return make
+
+
+@pytest.fixture
+def make_track() -> Callable[..., Track]:
+    """
+    Build a track from API-style streams: `points` readings a second apart at
+    a steady `speed` (m/s), with altitude climbing at `grade`.
+    """
+
+    def make(
+        points: int = 601,
+        speed: float = 4.0,
+        grade: float = 0.0,
+        heartrate: int | None = 150,
+        start: float = 1_700_000_000.0,
+    ) -> Track:
+        streams: dict[str, list] = {
+            "time": list(range(points)),
+            "distance": [speed * t for t in range(points)],
+            "altitude": [100.0 + grade * speed * t for t in range(points)],
+        }
+        if heartrate is not None:
+            streams["heartrate"] = [heartrate] * points
+        return from_api_streams(streams, start)
+
+    return make
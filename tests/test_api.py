@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+
+from .conftest import ATHLETE
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "_response_cache", {})
+    with TestClient(api.app) as client:
+        yield client
+
+
+def write_cache(directory, name: str, data) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(json.dumps(data))
+
+
+def test_etag_and_not_modified(client, data_dirs):
+    write_cache(data_dirs / "data", "activities.json", {"ids": [1]})
+
+    response = client.get("/data/activities")
+    assert response.status_code == 200
+    assert response.json() == {"ids": [1]}
+    etag = response.headers["etag"]
+
+    response = client.get("/data/activities", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    # a changed file is a new body and a new tag
+    write_cache(data_dirs / "data", "activities.json", {"ids": [1, 2]})
+    os.utime(data_dirs / "data" / "activities.json", ns=(1, 1))
+    response = client.get("/data/activities", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == {"ids": [1, 2]}
+    assert response.headers["etag"] != etag
+
+
+def test_athletes_are_served_apart(client, data_dirs):
+    write_cache(data_dirs / "data", "activities.json", {"ids": [1]})
+    write_cache(data_dirs / "athletes" / ATHLETE, "activities.json", {"ids": [2]})
+
+    default = client.get("/data/activities")
+    athlete = client.get("/data/activities", params={"athlete": ATHLETE})
+    assert default.json() == {"ids": [1]}
+    assert athlete.json() == {"ids": [2]}
+
+    # one athlete's tag doesn't match the other's body
+    response = client.get(
+        "/data/activities",
+        params={"athlete": ATHLETE},
+        headers={"If-None-Match": default.headers["etag"]},
+    )
+    assert response.status_code == 200
+
+
+def test_rollups_are_combined(client, data_dirs):
+    write_cache(data_dirs / "data", "all_time_run.json", {"count": 10})
+    write_cache(data_dirs / "data", "ytd_run.json", {"count": 2})
+
+    response = client.get("/data/rollups")
+    assert response.json() == {"all_time_run": {"count": 10}, "ytd_run": {"count": 2}}
+
+
+def test_missing_data(client, data_dirs):
+    assert client.get("/data/activities").status_code == 404
+    assert client.get("/data/activities", params={"athlete": "new"}).status_code == 404
+    # a read doesn't make the athlete's directory
+    assert not (data_dirs / "athletes" / "new").exists()
+
+    write_cache(data_dirs / "data", "all_time_run.json", {"count": 10})
+    assert client.get("/data/rollups").status_code == 404
+
+
+def test_invalid_athlete(client, data_dirs):
+    response = client.get("/data/best_efforts", params={"athlete": "../data"})
+    assert response.status_code == 400
+    assert client.get("/authorize", params={"athlete": ".hidden"}).status_code == 400
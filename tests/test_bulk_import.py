@@ -0,0 +1,93 @@
+import pytest
+
+from benchmarks.synthetic import generate_activities, write_export_archive
+from stravatui.bulk_import import import_archive
+from stravatui.store import ActivityStore
+from stravatui.stream_store import stored_tracks, streams_dir
+
+from .conftest import ATHLETE
+
+ACTIVITIES = 12
+BATCH_SIZE = 4
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def activities() -> list[dict]:
+    return generate_activities(ACTIVITIES, seed=3)
+
+
+@pytest.fixture
+def archive(tmp_path, activities):
+    path = tmp_path / "export.zip"
+    # long intervals keep the track files small
+    write_export_archive(path, activities, interval=60.0)
+    return path
+
+
+def run_import(path, **kwargs) -> dict[str, int]:
+    return import_archive(path, ATHLETE, workers=0, batch_size=BATCH_SIZE, **kwargs)
+
+
+def test_import(archive, activities):
+    counts = run_import(archive)
+
+    assert counts["rows"] == counts["imported"] == ACTIVITIES
+    assert counts["duplicates"] == counts["invalid"] == 0
+    # every fifth activity is exported without a track
+    assert counts["tracks"] == ACTIVITIES - ACTIVITIES // 5
+    assert counts["track_errors"] == 0
+
+    store = ActivityStore(ATHLETE)
+    assert sorted(store.columns["ids"]) == sorted(a["id"] for a in activities)
+    assert len(stored_tracks(streams_dir(ATHLETE))) == counts["tracks"]
+
+
+def test_import_again_skips_everything(archive):
+    run_import(archive)
+    counts = run_import(archive)
+
+    assert counts["rows"] == counts["duplicates"] == ACTIVITIES
+    assert counts["imported"] == counts["tracks"] == 0
+    assert len(ActivityStore(ATHLETE)) == ACTIVITIES
+
+
+def test_repeated_rows_are_imported_once(tmp_path, activities):
+    path = tmp_path / "export.zip"
+    write_export_archive(path, activities + activities[:3], interval=60.0)
+    counts = run_import(path)
+
+    assert counts["imported"] == ACTIVITIES
+    assert counts["duplicates"] == 3
+    assert len(ActivityStore(ATHLETE)) == ACTIVITIES
+
+
+def test_interrupted_import_resumes_from_the_checkpoint(archive):
+    def interrupt(counts: dict[str, int]) -> None:
+        if counts["rows"] == 2 * BATCH_SIZE:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        run_import(archive, progress=interrupt, checkpoint_batches=1)
+    # both batches were checkpointed before the interruption
+    assert len(ActivityStore(ATHLETE)) == 2 * BATCH_SIZE
+
+    counts = run_import(archive)
+    assert counts["duplicates"] == 2 * BATCH_SIZE
+    assert counts["imported"] == ACTIVITIES - 2 * BATCH_SIZE
+    assert len(ActivityStore(ATHLETE)) == ACTIVITIES
+
+
+def test_interrupted_import_loses_work_since_the_checkpoint(archive):
+    def interrupt(counts: dict[str, int]) -> None:
+        if counts["rows"] == 2 * BATCH_SIZE:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        run_import(archive, progress=interrupt, checkpoint_batches=3)
+    assert len(ActivityStore(ATHLETE)) == 0
+
+    assert run_import(archive)["imported"] == ACTIVITIES
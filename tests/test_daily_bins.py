@@ -0,0 +1,90 @@
+import pytest
+
+from stravatui.daily_bins import _load_bins, calendar_years, update_daily_bins
+from stravatui.store import ActivityStore
+
+from .conftest import ATHLETE
+
+
+@pytest.fixture
+def history(make_record):
+    return [
+        make_record(1, start_dates="2024-01-01T12:00:00+00:00"),
+        make_record(2, start_dates="2024-01-01T13:00:00+00:00", distances=3000.0),
+        make_record(3, start_dates="2024-12-31T12:00:00+00:00", times=1800),
+        make_record(4, start_dates="2023-06-15T12:00", activity_type="root='Ride'"),
+        make_record(5, start_dates=""),
+        make_record(6, start_dates="2023-06-15T12:00", activity_type="root='TrailRun'"),
+    ]
+
+
+def test_bins_runs_by_day(history):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    assert update_daily_bins(store, ATHLETE)
+
+    years = calendar_years(ATHLETE)
+    assert sorted(years) == ["2023", "2024"]
+    # leap year
+    assert len(years["2024"]["distance"]) == 366
+    assert len(years["2023"]["time"]) == 365
+
+    assert years["2024"]["distance"][0] == 8.0
+    assert years["2024"]["time"][0] == 50.0
+    assert years["2024"]["time"][365] == 30.0
+    # the ride is left out, the trail run isn't
+    assert years["2023"]["distance"][165] == 5.0
+    assert sum(years["2023"]["distance"]) == 5.0
+
+
+def test_incremental_bins_match_a_rebuild(history):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history[:2])
+    update_daily_bins(store, ATHLETE)
+    store.add_activities(history[2:])
+    update_daily_bins(store, ATHLETE)
+
+    scratch = ActivityStore("scratch")
+    scratch.add_activities(history)
+    update_daily_bins(scratch, "scratch")
+
+    assert _load_bins(ATHLETE) == _load_bins("scratch")
+
+
+def test_nothing_new_changes_nothing(history):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    update_daily_bins(store, ATHLETE)
+    assert not update_daily_bins(store, ATHLETE)
+
+
+def test_replaced_store_is_binned_again(history, make_record):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    update_daily_bins(store, ATHLETE)
+
+    # as many activities as before, so only the ids give it away
+    other = [
+        make_record(10 + i, start_dates=f"2022-05-{i + 1:02d}T12:00:00+00:00")
+        for i in range(len(history))
+    ]
+    replaced = ActivityStore(ATHLETE)
+    replaced.add_activities(other)
+    assert update_daily_bins(replaced, ATHLETE)
+
+    years = calendar_years(ATHLETE)
+    assert sorted(years) == ["2022"]
+    assert sum(years["2022"]["distance"]) == 5.0 * len(other)
+
+
+def test_calendar_years_follow_updates(history, make_record):
+    assert calendar_years(ATHLETE) == {}
+
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    update_daily_bins(store, ATHLETE)
+    assert "2025" not in calendar_years(ATHLETE)
+
+    store.add_activities([make_record(7, start_dates="2025-02-01T12:00:00+00:00")])
+    update_daily_bins(store, ATHLETE)
+    assert calendar_years(ATHLETE)["2025"]["distance"][31] == 5.0
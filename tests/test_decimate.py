@@ -0,0 +1,59 @@
+import math
+
+from stravatui.ui.decimate import grid_bin, lttb, scatter_bins
+
+
+def test_lttb_short_lines_are_unchanged():
+    xs, ys = [0.0, 1.0, 2.0], [5.0, 3.0, 4.0]
+    assert lttb(xs, ys, 3) == (xs, ys)
+    assert lttb(xs, ys, 10) == (xs, ys)
+    assert lttb(xs, ys, 2) == (xs, ys)
+
+
+def test_lttb_keeps_ends_and_threshold():
+    xs = [float(x) for x in range(1000)]
+    ys = [math.sin(x / 50) for x in xs]
+
+    sampled_x, sampled_y = lttb(xs, ys, 100)
+    assert len(sampled_x) == len(sampled_y) == 100
+    assert (sampled_x[0], sampled_x[-1]) == (0.0, 999.0)
+    assert sampled_x == sorted(sampled_x)
+    assert all(ys[int(x)] == y for x, y in zip(sampled_x, sampled_y))
+
+
+def test_lttb_keeps_spikes():
+    xs = [float(x) for x in range(500)]
+    ys = [0.0] * 500
+    ys[123], ys[377] = 10.0, -10.0
+
+    _, sampled_y = lttb(xs, ys, 20)
+    assert 10.0 in sampled_y
+    assert -10.0 in sampled_y
+
+
+def test_grid_bin_one_point_per_cell():
+    xs = [float(x % 100) for x in range(1000)]
+    ys = [float(x % 37) for x in range(1000)]
+
+    binned_x, binned_y = grid_bin(xs, ys, 10, 5)
+    assert len(binned_x) == len(binned_y) <= 50
+    cells = {(int(x / 99 * 9), int(y / 36 * 4)) for x, y in zip(binned_x, binned_y)}
+    assert len(cells) == len(binned_x)
+
+
+def test_grid_bin_means():
+    # the grid spans min to max, so with two columns the last holds the max
+    xs = [0.0, 1.0, 2.0, 10.0, 10.0]
+    ys = [0.0, 3.0, 0.0, 8.0, 6.0]
+    assert grid_bin(xs, ys, 2, 1) == ([1.0, 10.0], [1.0, 7.0])
+
+
+def test_grid_bin_small_inputs_are_unchanged():
+    assert grid_bin([1.0, 2.0], [3.0, 4.0], 2, 1) == ([1.0, 2.0], [3.0, 4.0])
+    assert grid_bin([], [], 1, 1) == ([], [])
+
+
+def test_scatter_bins():
+    assert scatter_bins(80, 20) == (160, 80)
+    assert scatter_bins(80, 20, rows=2, cols=2) == (80, 40)
+    assert scatter_bins(0, 0) == (1, 1)
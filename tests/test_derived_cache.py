@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from stravatui import derived_cache
+from stravatui.derived_cache import _read_entry, _write_entry, cached
+
+from .conftest import ATHLETE
+
+
+def test_computes_once_per_inputs(monkeypatch):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total": len(calls)}
+
+    assert cached("totals", (1,), compute, ATHLETE) == {"total": 1}
+    assert cached("totals", (1,), compute, ATHLETE) == {"total": 1}
+    # a new session reads it back from disk
+    monkeypatch.setattr(derived_cache, "_memory", {})
+    assert cached("totals", (1,), compute, ATHLETE) == {"total": 1}
+    assert cached("totals", (2,), compute, ATHLETE) == {"total": 2}
+    assert len(calls) == 2
+
+
+def test_concurrent_writes_leave_one_whole_entry(data_dirs):
+    values = [list(range(n, n + 5000)) for n in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        for n, value in enumerate(values):
+            pool.submit(_write_entry, "series", ATHLETE, str(n), value)
+
+    key, value = _read_entry("series", ATHLETE)
+    assert value == values[int(key)]
+    derived = data_dirs / "athletes" / ATHLETE / "derived"
+    assert [path.name for path in derived.iterdir()] == ["series.json"]
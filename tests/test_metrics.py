@@ -0,0 +1,131 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from stravatui import metrics
+from stravatui.auth import STRAVA_URL, _strava_session
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def series(name: str) -> dict:
+    return {
+        tuple(sorted(s["labels"].items())): s
+        for s in metrics.snapshot()[name]["series"]
+    }
+
+
+@pytest.fixture
+def strava(monkeypatch):
+    """A stand-in Strava answering with the queued statuses, then 200s."""
+    statuses: list[int] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b"[]"
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-RateLimit-Limit", "100,1000")
+            self.send_header("X-RateLimit-Usage", "10,300")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+    monkeypatch.setenv("STRAVA_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield statuses
+    server.shutdown()
+    server.server_close()
+
+
+def test_endpoint_folds_ids():
+    assert metrics.endpoint("/api/v3/activities/123/streams?keys=time") == (
+        "/api/v3/activities/{id}/streams"
+    )
+    assert metrics.endpoint("/api/v3/athlete/activities") == (
+        "/api/v3/athlete/activities"
+    )
+
+
+def test_record_api_response():
+    metrics.record_api_response("/api/v3/activities/1", 200, 0.2, 100)
+    metrics.record_api_response("/api/v3/activities/2", 429, 0.02, 10, retries=2)
+
+    requests = series("strava_api_requests_total")
+    name = ("endpoint", "/api/v3/activities/{id}")
+    assert requests[(name, ("status", "200"))]["value"] == 1
+    assert requests[(name, ("status", "429"))]["value"] == 1
+    assert series("strava_api_response_bytes_total")[(name,)]["value"] == 110
+    assert series("strava_api_rate_limited_total")[(name,)]["value"] == 1
+    assert series("strava_api_retries_total")[(name,)]["value"] == 2
+    assert series("strava_api_latency_seconds")[(name,)]["count"] == 2
+
+
+def test_rate_limit_remaining():
+    assert metrics.rate_limit_remaining() is None
+
+    metrics.record_api_response(
+        "/api/v3/athlete",
+        200,
+        0.1,
+        0,
+        headers={
+            "X-RateLimit-Limit": "200,2000",
+            "X-RateLimit-Usage": "20,1990",
+            "X-ReadRateLimit-Limit": "100,1000",
+            "X-ReadRateLimit-Usage": "bad,0",
+        },
+    )
+    # the daily window is the one closest to running out
+    assert metrics.rate_limit_remaining() == 10
+
+
+def test_quantile():
+    buckets = (1.0, 2.0, 4.0)
+    assert metrics.quantile(0.5, buckets, [0, 0, 0, 0]) == 0.0
+    assert metrics.quantile(0.5, buckets, [2, 2, 0, 0]) == 1.0
+    assert metrics.quantile(0.75, buckets, [2, 2, 0, 0]) == 1.5
+    # past the last bucket there's nothing to interpolate to
+    assert metrics.quantile(0.99, buckets, [0, 0, 0, 3]) == 4.0
+
+
+def test_prometheus_buckets_are_cumulative():
+    metrics.observe("store_query_seconds", 0.0002, query="search")
+    metrics.observe("store_query_seconds", 0.2, query="search")
+
+    lines = metrics.prometheus_text().splitlines()
+    assert 'store_query_seconds_bucket{query="search",le="0.00025"} 1' in lines
+    assert 'store_query_seconds_bucket{query="search",le="+Inf"} 2' in lines
+    assert 'store_query_seconds_count{query="search"} 2' in lines
+
+
+def test_strava_session_records_retries(strava):
+    # one retry, as later ones back off for a while
+    strava.append(503)
+    session = _strava_session()
+
+    response = session.get(f"{STRAVA_URL}/api/v3/athlete/activities")
+    assert response.status_code == 200
+
+    name = ("endpoint", "/api/v3/athlete/activities")
+    assert series("strava_api_retries_total")[(name,)]["value"] == 1
+    requests = series("strava_api_requests_total")
+    assert requests[(name, ("status", "200"))]["value"] == 1
+    assert metrics.rate_limit_remaining() == 90
+
+
+def test_strava_session_does_not_retry_rate_limits(strava):
+    strava.append(429)
+    response = _strava_session().get(f"{STRAVA_URL}/api/v3/athlete")
+
+    assert response.status_code == 429
+    assert series("strava_api_retries_total") == {}
@@ -0,0 +1,95 @@
+import pytest
+
+from stravatui.search import SearchIndex, parse_query, search
+from stravatui.store import ActivityStore
+
+from .conftest import ATHLETE
+
+
+@pytest.fixture
+def index(make_record):
+    store = ActivityStore(ATHLETE)
+    store.add_activities([
+        make_record(1, names="Morning Run", start_dates="2024-01-05T08:00"),
+        make_record(2, names="Evening Tempo", distances=8000.0),
+        make_record(3, names="Long run by the river", distances=24000.0),
+        make_record(4, names="Nur Fun", activity_type="root='TrailRun'"),
+        make_record(5, names="Commute", activity_type="root='Ride'"),
+    ])
+    return SearchIndex(store)
+
+
+def names(index: SearchIndex, positions) -> list[str]:
+    return sorted(index.store.columns["names"][i] for i in positions)
+
+
+def test_name_search_is_case_insensitive(index):
+    assert names(index, index.name_positions("RUN")) == [
+        "Long run by the river",
+        "Morning Run",
+    ]
+
+
+def test_name_search_confirms_trigram_candidates(index):
+    # "run fun" shares every trigram of "nur fun" bar the order
+    assert index.name_positions("run fun") == []
+    assert names(index, index.name_positions("nur fun")) == ["Nur Fun"]
+
+
+def test_short_name_queries(index):
+    assert names(index, index.name_positions("te")) == ["Commute", "Evening Tempo"]
+    assert index.name_positions("zq") == []
+
+
+def test_sport_search(index):
+    assert names(index, index.sport_positions("run")) == [
+        "Evening Tempo",
+        "Long run by the river",
+        "Morning Run",
+        "Nur Fun",
+    ]
+    assert names(index, index.sport_positions("ride")) == ["Commute"]
+
+
+def test_index_is_saved_and_updated(index, make_record):
+    index.store.add_activities([make_record(6, names="Track session")])
+    index.update()
+
+    reloaded = SearchIndex(index.store)
+    assert reloaded.count == 6
+    assert names(reloaded, reloaded.name_positions("track")) == ["Track session"]
+
+
+def test_index_built_over_another_store_is_ignored(index, make_record):
+    other = ActivityStore("other")
+    other.add_activities([make_record(9, names="Hill repeats")])
+    index.path.replace(SearchIndex(other).path)
+
+    rebuilt = SearchIndex(other)
+    assert names(rebuilt, rebuilt.name_positions("run")) == []
+    assert names(rebuilt, rebuilt.name_positions("hill")) == ["Hill repeats"]
+
+
+def test_parse_query():
+    query = parse_query("long Type:trail km:5-10 date:2024-01..2024-03 river")
+    assert query == {
+        "name": "long river",
+        "sport": "trail",
+        "distance": (5000.0, 10000.0),
+        "dates": ("2024-01", "2024-03￿"),
+    }
+    assert parse_query("km:21-")["distance"] == (21000.0, None)
+    assert parse_query("date:2024")["dates"] == ("2024", "2024￿")
+    assert parse_query("km:far date:last-week")["distance"] is None
+    assert parse_query("date:last-week")["dates"] is None
+
+
+def test_search_intersects_filters(index):
+    assert search(index, parse_query("")) is None
+    assert names(index, search(index, parse_query("run km:20-"))) == [
+        "Long run by the river"
+    ]
+    assert names(index, search(index, parse_query("type:run date:2024-01"))) == [
+        "Morning Run"
+    ]
+    assert search(index, parse_query("tempo type:ride")) == []
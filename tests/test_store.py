@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import pytest
+
+from stravatui.store import SORT_KEYS, ActivityStore
+
+from .conftest import ATHLETE
+
+
+@pytest.fixture
+def store(make_record):
+    store = ActivityStore(ATHLETE)
+    store.add_activities([
+        make_record(1, distances=5000.0, times=1500, start_dates="2024-01-05T08:00"),
+        make_record(2, distances=10000.0, times=2700, start_dates="2024-02-10T08:00"),
+        make_record(
+            3,
+            distances=0.0,
+            times=600,
+            average_heartrate=None,
+            start_dates="2024-03-15T08:00",
+        ),
+        make_record(4, distances=21097.5, times=6300, start_dates="2023-12-31T08:00"),
+        make_record(
+            5,
+            distances=5000.0,
+            times=1380,
+            average_heartrate=165.0,
+            start_dates="2024-02-10T18:00",
+        ),
+    ])
+    return store
+
+
+def ids(store: ActivityStore, positions) -> list[int]:
+    return [store.columns["ids"][i] for i in positions]
+
+
+def test_round_trip(store):
+    store.save()
+    loaded = ActivityStore(ATHLETE)
+
+    assert loaded.columns == store.columns
+    assert loaded.indexes == store.indexes
+    assert 3 in loaded and 6 not in loaded
+
+
+def test_stale_index_file_is_rebuilt(store, make_record):
+    # saved with one more activity than the indexes were built over
+    store.add_activities([make_record(6)], index=False)
+    store.save()
+
+    loaded = ActivityStore(ATHLETE)
+    assert len(loaded.indexes["date"]["order"]) == 6
+
+
+def test_add_activities_skips_stored_ids(store, make_record):
+    assert store.add_activities([make_record(1), make_record(6), make_record(6)]) == 1
+    assert len(store) == 6
+
+
+def test_sorted_positions(store):
+    # equal distances keep position order ascending, so reverse descending
+    assert ids(store, store.sorted_positions("distance")) == [4, 2, 5, 1, 3]
+    by_date = store.sorted_positions("date", descending=False)
+    assert ids(store, by_date) == [4, 1, 2, 5, 3]
+    # no distance, so no pace, and no heart rate: always last
+    assert ids(store, store.sorted_positions("pace")) == [2, 5, 4, 1, 3]
+    assert ids(store, store.sorted_positions("heartrate"))[-1] == 3
+    assert ids(store, store.sorted_positions("pace", descending=True))[-1] == 3
+
+
+def test_sort_order_slices(store):
+    order = store.sorted_positions("distance")
+    assert ids(store, order[1:3]) == [2, 5]
+    assert ids(store, [order[-1]]) == [3]
+    with pytest.raises(IndexError):
+        order[5]
+
+
+def test_range_positions_inclusive_edges(store):
+    five_k = store.range_positions("distance", 5000.0, 5000.0)
+    assert sorted(ids(store, five_k)) == [1, 5]
+    assert ids(store, store.range_positions("distance", 5000.1, 21097.5)) == [2, 4]
+    assert ids(store, store.range_positions("distance", 21097.5)) == [4]
+    assert ids(store, store.range_positions("distance", high=0.0)) == [3]
+
+
+def test_range_positions_outside_values(store):
+    assert store.range_positions("distance", 50000.0) == []
+    assert store.range_positions("distance", high=-1.0) == []
+    assert store.range_positions("distance", 30000.0, 10.0) == []
+    assert len(store.range_positions("distance")) == len(store)
+
+
+def test_range_positions_derived_keys(store):
+    # seconds per metre, activity 3 has no pace and is never in range
+    assert ids(store, store.range_positions("pace", 0.3, 0.3)) == [1]
+    assert ids(store, store.range_positions("pace", high=0.28)) == [2, 5]
+    assert ids(store, store.range_positions("heartrate", 160.0)) == [5]
+    assert 3 not in ids(store, store.range_positions("heartrate"))
+
+
+def test_range_positions_date_prefixes(store):
+    feb = store.range_positions("date", "2024-02", "2024-02￿")
+    assert sorted(ids(store, feb)) == [2, 5]
+
+
+def test_insort_matches_rebuild(store, make_record):
+    for batch in range(3):
+        store.add_activities([
+            make_record(
+                10 + batch * 2 + k,
+                distances=float(3000 + 1700 * ((batch + k) % 4)),
+                times=900 + 300 * k,
+                average_heartrate=None if k else 140.0 + batch,
+                start_dates=f"2024-0{batch + 1}-2{k}T08:00:00+00:00",
+            )
+            for k in range(2)
+        ])
+    insorted = {key: dict(index) for key, index in store.indexes.items()}
+    assert store.range_positions("distance", 4700.0, 5000.0)
+
+    store.rebuild_indexes()
+    assert insorted == store.indexes
+    for key in SORT_KEYS:
+        assert store.range_positions(key) == store.indexes[key]["order"]
+
+
+def test_sort_subset(store):
+    subset = store.range_positions("date", "2024-01", "2024-03")
+    assert ids(store, store.sort_subset(subset, "distance")) == [2, 5, 1]
+    ascending = store.sort_subset(subset, "distance", descending=False)
+    assert ids(store, ascending) == [1, 5, 2]
+
+
+def test_latest_start_date(make_record):
+    store = ActivityStore(ATHLETE)
+    assert store.latest_start_date() is None
+
+    store.add_activities([make_record(1, start_dates="")])
+    assert store.latest_start_date() is None
+
+    store.add_activities([
+        make_record(2, start_dates="2024-05-01T07:00:00+00:00"),
+        make_record(3, start_dates="2024-04-01T07:00:00+00:00"),
+    ])
+    latest = datetime.fromisoformat("2024-05-01T07:00:00+00:00")
+    assert store.latest_start_date() == latest
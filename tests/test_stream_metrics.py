@@ -0,0 +1,117 @@
+import pytest
+
+from stravatui.stream_metrics import (
+    MAX_READING_GAP,
+    best_efforts,
+    grade_adjusted,
+    heartrate_histogram,
+    running_cost,
+    splits,
+)
+from stravatui.tracks import from_api_streams
+
+
+def test_best_efforts_at_steady_pace(make_track):
+    # 4 m/s for 10 minutes, 2.4 km
+    efforts = best_efforts(make_track(points=601, speed=4.0))
+    assert efforts == {
+        "400m": 100.0,
+        "1k": 250.0,
+        "1 mile": pytest.approx(402.3, abs=0.1),
+    }
+
+
+def test_best_efforts_find_the_fastest_window():
+    # 1 km at 5 m/s in the middle of 3 km at 2.5 m/s
+    distance, time = [0.0], [0.0]
+    for speed, seconds in ((2.5, 400), (5.0, 200), (2.5, 400)):
+        for _ in range(seconds):
+            distance.append(distance[-1] + speed)
+            time.append(time[-1] + 1)
+    track = from_api_streams({"time": time, "distance": distance}, 0.0)
+
+    efforts = best_efforts(track)
+    assert efforts["1k"] == 200.0
+    assert efforts["400m"] == 80.0
+    assert "5k" not in efforts
+
+
+def test_best_efforts_without_distance():
+    assert best_efforts(from_api_streams({"time": [0, 1, 2]}, 0.0)) == {}
+
+
+def test_km_splits(make_track):
+    # 2.4 km at 4 m/s: two full splits and a 400 m part split
+    result = splits(make_track(points=601, speed=4.0), 1000.0)
+
+    assert [split["distance"] for split in result] == [1000.0, 1000.0, 400.0]
+    assert [split["time"] for split in result] == [250.0, 250.0, 100.0]
+    assert {split["heartrate"] for split in result} == {150.0}
+    assert {split["elevation"] for split in result} == {0.0}
+
+
+def test_short_part_split_is_left_off(make_track):
+    # 1.01 km, the last 10 m is under MIN_PART_SPLIT
+    result = splits(make_track(points=203, speed=5.0), 1000.0)
+    assert [split["distance"] for split in result] == [1000.0]
+
+
+def test_grade_adjusted_pace():
+    flat = grade_adjusted(
+        from_api_streams(
+            {
+                "time": list(range(501)),
+                "distance": [4.0 * t for t in range(501)],
+                "altitude": [50.0] * 501,
+            },
+            0.0,
+        )
+    )
+    assert flat["factor"] == 1.0
+    assert flat["equivalent_distance"] == 2000.0
+
+    # a steady 5% climb costs more than the flat, so its flat-equivalent
+    # distance is longer and the factor speeds the pace up
+    climb = grade_adjusted(
+        from_api_streams(
+            {
+                "time": list(range(501)),
+                "distance": [4.0 * t for t in range(501)],
+                "altitude": [50.0 + 0.2 * t for t in range(501)],
+            },
+            0.0,
+        )
+    )
+    assert climb["factor"] == pytest.approx(3.6 / running_cost(0.05), abs=0.02)
+    assert climb["smoothed_gain"] == pytest.approx(100.0, abs=5.0)
+
+
+def test_splits_carry_flat_distance(make_track):
+    uphill = splits(make_track(points=601, speed=4.0, grade=0.05), 1000.0)
+    assert all(split["flat_distance"] > split["distance"] for split in uphill)
+
+
+def test_heartrate_histogram():
+    track = from_api_streams(
+        {
+            "time": [0, 1, 2, 3, 103, 104],
+            "heartrate": [140, 140, 141, 0, 150, 141],
+        },
+        1_700_000_000.0,
+    )
+    histogram = heartrate_histogram(track)
+
+    assert histogram["start"] == 1_700_000_000.0
+    assert histogram["low"] == 140
+    # the first reading has no time before it, the pause counts MAX_READING_GAP
+    seconds = dict(enumerate(histogram["seconds"], 140))
+    assert seconds[140] == 1.0
+    assert seconds[141] == 2.0
+    assert seconds[150] == MAX_READING_GAP
+    assert sum(histogram["seconds"]) == 3.0 + MAX_READING_GAP
+
+
+def test_heartrate_histogram_without_readings():
+    assert heartrate_histogram(from_api_streams({"time": [0, 1, 2]}, 0.0)) == {}
+    no_beats = from_api_streams({"time": [0, 1], "heartrate": [0, 0]}, 0.0)
+    assert heartrate_histogram(no_beats) == {}
@@ -0,0 +1,93 @@
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from stravatui.stream_store import (
+    STREAM_VERSION,
+    decode_track,
+    encode_track,
+    load_track,
+    mapped_track,
+    save_track,
+    stored_tracks,
+    streams_dir,
+)
+from stravatui.tracks import from_api_streams
+
+from .conftest import ATHLETE
+
+
+def columns(track) -> dict:
+    return {name: list(values) for name, values in track.items() if name != "start"}
+
+
+def test_encode_decode_round_trip(make_track):
+    track = make_track(points=50)
+    decoded = decode_track(encode_track(track))
+
+    assert decoded["start"] == track["start"]
+    assert columns(decoded) == columns(track)
+    for name in columns(track):
+        assert decoded[name].typecode == track[name].typecode
+
+
+def test_missing_streams_stay_missing():
+    track = from_api_streams({"time": [0, 1, 2], "heartrate": [120, 125, 130]}, 0.0)
+    decoded = decode_track(encode_track(track))
+
+    assert set(decoded) == {"start", "time", "heartrate"}
+    assert list(decoded["heartrate"]) == [120, 125, 130]
+
+
+def test_mismatched_stream_lengths_are_refused(make_track):
+    track = make_track(points=10)
+    track["heartrate"] = array("H", [150] * 9)
+    with pytest.raises(ValueError):
+        encode_track(track)
+
+
+def test_save_load_and_map(make_track):
+    track = make_track(points=200)
+    directory = streams_dir(ATHLETE)
+    size = save_track(directory, 42, track)
+
+    path = directory / "42.streams"
+    assert path.stat().st_size == size
+    assert stored_tracks(directory) == {42: path}
+    assert columns(load_track(42, ATHLETE)) == columns(track)
+
+    with mapped_track(path) as mapped:
+        assert mapped["start"] == track["start"]
+        assert columns(mapped) == columns(track)
+
+
+def test_concurrent_saves_leave_one_whole_file(make_track):
+    tracks = [make_track(points=2000, heartrate=140 + n) for n in range(8)]
+    directory = streams_dir(ATHLETE)
+    with ThreadPoolExecutor(8) as pool:
+        for track in tracks:
+            pool.submit(save_track, directory, 42, track)
+
+    saved = columns(load_track(42, ATHLETE))
+    assert saved in [columns(track) for track in tracks]
+    assert [path.name for path in directory.iterdir()] == ["42.streams"]
+
+
+def test_unreadable_files(make_track):
+    directory = streams_dir(ATHLETE)
+    assert load_track(1, ATHLETE) is None
+
+    data = bytearray(encode_track(make_track(points=20)))
+    # an older layout
+    data[4] = STREAM_VERSION + 1
+    (directory / "2.streams").write_bytes(bytes(data))
+    assert load_track(2, ATHLETE) is None
+
+    # truncated part way through the streams, and inside the header
+    (directory / "3.streams").write_bytes(encode_track(make_track(points=20))[:-8])
+    (directory / "4.streams").write_bytes(b"STRM")
+    for activity_id in (2, 3, 4):
+        with mapped_track(directory / f"{activity_id}.streams") as mapped:
+            assert mapped is None
+    assert load_track(4, ATHLETE) is None
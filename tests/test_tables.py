@@ -0,0 +1,62 @@
+import pytest
+from textual.app import App, ComposeResult
+from textual.widgets import DataTable
+
+from stravatui.ui.tables import _content_keys, update_table
+
+COLUMNS = ("Activity", "Distance (km)")
+
+
+class TableApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def contents(table: DataTable) -> list[tuple[str, list]]:
+    return [(row.key.value, table.get_row(row.key)) for row in table.ordered_rows]
+
+
+@pytest.mark.anyio
+async def test_update_table_diffs_rows():
+    async with TableApp().run_test() as pilot:
+        table = pilot.app.query_one(DataTable)
+        rows = [("Morning Run", "5.00"), ("Long Run", "21.10")]
+        assert update_table(table, COLUMNS, rows, ["1", "2"]) == 2
+        assert [column.label.plain for column in table.columns.values()] == list(
+            COLUMNS
+        )
+
+        # the same rows again change nothing
+        assert update_table(table, COLUMNS, rows, ["1", "2"]) == 0
+
+        # one cell edited, one row gone and one new
+        rows = [("Morning Run", "5.20"), ("Tempo", "8.00")]
+        assert update_table(table, COLUMNS, rows, ["1", "3"]) == 3
+        assert contents(table) == [
+            ("1", ["Morning Run", "5.20"]),
+            ("3", ["Tempo", "8.00"]),
+        ]
+        assert len(table.columns) == len(COLUMNS)
+
+
+@pytest.mark.anyio
+async def test_update_table_keeps_the_given_order():
+    async with TableApp().run_test() as pilot:
+        table = pilot.app.query_one(DataTable)
+        rows = [("Morning Run", "5.00"), ("Long Run", "21.10")]
+        update_table(table, COLUMNS, rows, ["1", "2"])
+
+        # a newer activity goes at the top, not the end
+        rows = [("Tempo", "8.00"), *rows]
+        assert update_table(table, COLUMNS, rows, ["3", "1", "2"]) == 1
+        assert [key for key, _ in contents(table)] == ["3", "1", "2"]
+
+
+def test_content_keys_number_repeats():
+    rows = [("Run", "5.00"), ("Run", "5.00"), ("Ride", "20.00")]
+    assert _content_keys(rows) == ["Run|5.00", "Run|5.00#2", "Ride|20.00"]
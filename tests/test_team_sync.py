@@ -0,0 +1,124 @@
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from stravatui import auth, team_sync
+from stravatui.team_sync import (
+    BudgetedSession,
+    RateBudget,
+    RateBudgetExhausted,
+    _fair_schedule,
+    sync_athletes,
+)
+
+
+class StravaAdapter(HTTPAdapter):
+    """Answers every request with the given rate-limit headers."""
+
+    def __init__(self, headers: dict[str, str]):
+        super().__init__()
+        self.headers = headers
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers.update(self.headers)
+        response.request, response.url = request, request.url
+        response._content = b"{}"
+        return response
+
+
+def test_budget_charges_each_athlete():
+    budget = RateBudget(limit=3)
+    budget.acquire("a")
+    budget.acquire("b")
+    budget.acquire("a")
+
+    assert budget.used_by == {"a": 2, "b": 1}
+    assert budget.remaining == 0
+    with pytest.raises(RateBudgetExhausted):
+        budget.acquire("b")
+    assert budget.used_by["b"] == 1
+
+
+def test_budget_waits_for_the_next_window():
+    budget = RateBudget(limit=1, window=0.05, wait=True)
+    budget.acquire("a")
+    budget.acquire("a")
+    assert budget.used_by["a"] == 2
+
+
+def test_budget_follows_strava_usage():
+    budget = RateBudget(limit=100)
+    budget.acquire("a")
+
+    # the read limit is preferred, and other apps' requests count too
+    budget.update_from_headers(
+        {
+            "X-ReadRateLimit-Usage": "40,500",
+            "X-ReadRateLimit-Limit": "60,1000",
+            "X-RateLimit-Usage": "1,1",
+            "X-RateLimit-Limit": "200,2000",
+        }
+    )
+    assert budget.limit == 60
+    assert budget.remaining == 20
+
+    # usage Strava hasn't caught up with doesn't give requests back
+    budget.update_from_headers({"X-RateLimit-Usage": "5,5", "X-RateLimit-Limit": "80"})
+    assert (budget.limit, budget.remaining) == (60, 20)
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {},
+        {"X-RateLimit-Usage": "10,10"},
+        {"X-RateLimit-Usage": "lots", "X-RateLimit-Limit": "100,1000"},
+    ],
+)
+def test_budget_ignores_missing_headers(headers):
+    budget = RateBudget(limit=100)
+    budget.update_from_headers(headers)
+    assert (budget.limit, budget.remaining) == (100, 100)
+
+
+def test_budgeted_session_charges_and_reconciles():
+    budget = RateBudget(limit=100)
+    session = BudgetedSession(budget, "a")
+    session.mount(
+        "https://",
+        StravaAdapter({"X-RateLimit-Usage": "30,30", "X-RateLimit-Limit": "90,1000"}),
+    )
+
+    session.get("https://www.strava.com/api/v3/athlete")
+    assert budget.used_by == {"a": 1}
+    assert (budget.limit, budget.remaining) == (90, 60)
+
+
+def test_fair_schedule():
+    assert _fair_schedule(["a", "b"], ["stats", "runs"]) == [
+        ("a", "stats"),
+        ("b", "stats"),
+        ("a", "runs"),
+        ("b", "runs"),
+    ]
+
+
+def test_sync_spreads_failures_across_athletes(monkeypatch):
+    budget = RateBudget(limit=4)
+
+    def stage(athlete: str, refresh: bool = False) -> None:
+        assert refresh
+        budget.acquire(athlete)
+
+    stages = {name: stage for name in ("stats", "runs", "efforts")}
+    monkeypatch.setattr(team_sync, "SYNC_STAGES", stages)
+    report = sync_athletes(["a", "b"], budget, max_workers=1)
+
+    # every athlete gets its first two stages before the budget runs out
+    assert report["a"]["completed"] == report["b"]["completed"] == ["stats", "runs"]
+    assert list(report["a"]["failed"]) == list(report["b"]["failed"]) == ["efforts"]
+    assert report["a"]["api_calls"] == report["b"]["api_calls"] == 2
+    # the budgeted sessions are only there for the sync
+    assert auth._athlete_sessions == {}
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from stravatui import terminal_background
+from stravatui.terminal_background import cached_terminal_background
+
+
+@pytest.fixture
+def answers(tmp_path, monkeypatch):
+    """Replies the terminal gives to each probe, in order."""
+    replies = []
+    monkeypatch.setattr(terminal_background, "CACHE_FILE", tmp_path / "bg.json")
+    monkeypatch.setattr(terminal_background, "_session_key", lambda: "xterm||1|1")
+    monkeypatch.setattr(
+        terminal_background, "query_terminal_background", lambda t: replies.pop(0)
+    )
+    return replies
+
+
+def test_answer_is_cached_for_the_session(answers):
+    answers.append((40, 42, 54))
+    assert cached_terminal_background() == (40, 42, 54)
+    # no more replies queued, so a second probe would fail
+    assert cached_terminal_background() == (40, 42, 54)
+
+
+def test_no_answer_is_asked_again(answers):
+    answers.extend([None, (250, 250, 250)])
+    assert cached_terminal_background() is None
+    assert cached_terminal_background() == (250, 250, 250)
+    assert answers == []
+
+
+def test_old_cached_miss_is_asked_again(answers):
+    terminal_background.CACHE_FILE.write_text(json.dumps({"xterm||1|1": None}))
+    answers.append((0, 0, 0))
+    assert cached_terminal_background() == (0, 0, 0)
@@ -0,0 +1,168 @@
+import gzip
+import io
+import math
+from array import array
+from datetime import datetime
+
+import pytest
+
+from benchmarks.synthetic import (
+    activity_streams,
+    fit_track,
+    generate_activities,
+    gpx_track,
+    tcx_track,
+)
+from stravatui.tracks import (
+    EARTH_RADIUS,
+    cumulative_distance,
+    parse_fit,
+    read_track,
+    summarise_track,
+    track_format,
+)
+
+GPX_POINT = (
+    '<trkpt lat="{lat}" lon="0.0"><ele>{ele}</ele>{time}'
+    "<extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>{hr}</gpxtpx:hr>"
+    "</gpxtpx:TrackPointExtension></extensions></trkpt>"
+)
+GPX = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<gpx xmlns="http://www.topografix.com/GPX/1/1" '
+    'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">'
+    "<trk><trkseg>{points}</trkseg></trk></gpx>"
+)
+
+
+@pytest.fixture
+def activity() -> tuple[dict, dict[str, list]]:
+    """A synthetic run with heart rate and the streams it was recorded with."""
+    summary = next(
+        activity
+        for activity in generate_activities(20, seed=1)
+        if activity["average_heartrate"]
+    )
+    return summary, activity_streams(summary, interval=10.0)
+
+
+def start_of(summary: dict) -> float:
+    start = datetime.fromisoformat(summary["start_date"].replace("Z", "+00:00"))
+    return start.timestamp()
+
+
+def assert_streams(track, streams: dict[str, list], distance: bool = True) -> None:
+    assert list(track["time"]) == streams["time"]
+    # FIT positions are whole semicircles, about 1e-7 degrees
+    lat = [point[0] for point in streams["latlng"]]
+    lon = [point[1] for point in streams["latlng"]]
+    assert list(track["lat"]) == pytest.approx(lat, abs=1e-6)
+    assert list(track["lon"]) == pytest.approx(lon, abs=1e-6)
+    assert list(track["altitude"]) == pytest.approx(streams["altitude"], abs=0.2)
+    assert list(track["heartrate"]) == streams["heartrate"]
+    assert list(track["cadence"]) == streams["cadence"]
+    if distance:
+        assert list(track["distance"]) == pytest.approx(streams["distance"], abs=0.01)
+
+
+def test_track_format():
+    assert track_format("activities/1.gpx") == "gpx"
+    assert track_format("activities/1.TCX.gz") == "tcx"
+    assert track_format("activities/1.fit.gz") == "fit"
+    assert track_format("activities/1.kml") is None
+    assert track_format("activities/1.gz") is None
+
+
+def test_gpx(activity):
+    summary, streams = activity
+    track = read_track(io.BytesIO(gpx_track(summary, streams).encode()), "1.gpx")
+
+    assert track["start"] == start_of(summary)
+    # GPX has no distance, so it's worked out from the positions
+    assert_streams(track, streams, distance=False)
+    assert track["distance"][0] == 0.0
+    assert list(track["distance"]) == sorted(track["distance"])
+
+
+def test_tcx(activity):
+    summary, streams = activity
+    track = read_track(io.BytesIO(tcx_track(summary, streams).encode()), "1.tcx")
+
+    assert track["start"] == start_of(summary)
+    assert_streams(track, streams)
+
+
+def test_fit(activity):
+    summary, streams = activity
+    data = fit_track(summary, streams)
+    track = parse_fit(data)
+
+    assert track["start"] == start_of(summary)
+    # every other record has a compressed timestamp header
+    assert_streams(track, streams)
+
+    # the same from a gzipped file
+    gzipped = read_track(io.BytesIO(gzip.compress(data)), "1.fit.gz")
+    assert list(gzipped["time"]) == list(track["time"])
+
+
+def test_gzipped_xml(activity):
+    summary, streams = activity
+    raw = gzip.compress(tcx_track(summary, streams).encode())
+    assert_streams(read_track(io.BytesIO(raw), "1.tcx.gz"), streams)
+
+
+def test_missing_streams_are_left_out():
+    points = "".join(
+        GPX_POINT.format(lat=lat, ele=10.0, time="", hr=0).replace(
+            "<extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>0</gpxtpx:hr>"
+            "</gpxtpx:TrackPointExtension></extensions>",
+            "",
+        )
+        for lat in (0.0, 0.001)
+    )
+    track = read_track(io.BytesIO(GPX.format(points=points).encode()), "1.gpx")
+
+    assert "heartrate" not in track and "cadence" not in track
+    assert track["start"] == 0.0
+    assert all(math.isnan(t) for t in track["time"])
+
+
+def test_gpx_point_values():
+    points = "".join(
+        GPX_POINT.format(
+            lat=lat,
+            ele=ele,
+            time=f"<time>2024-03-01T12:00:{second:02d}Z</time>",
+            hr=hr,
+        )
+        for lat, ele, second, hr in ((0.0, 10.0, 0, 140), (0.001, 12.5, 7, 150))
+    )
+    track = read_track(io.BytesIO(GPX.format(points=points).encode()), "1.gpx")
+
+    assert list(track["time"]) == [0.0, 7.0]
+    assert list(track["heartrate"]) == [140, 150]
+    assert track["distance"][1] == pytest.approx(
+        math.radians(0.001) * EARTH_RADIUS, rel=1e-5
+    )
+    assert summarise_track(track) == {
+        "points": 2,
+        "elapsed_time": 7,
+        "elevation_gain": 2.5,
+        "average_heartrate": 145.0,
+    }
+
+
+def test_cumulative_distance_skips_missing_fixes():
+    lat = array("d", [0.0, math.nan, 0.001])
+    lon = array("d", [0.0, math.nan, 0.0])
+    distance = cumulative_distance(lat, lon)
+    assert distance[1] == 0.0
+    assert distance[2] == pytest.approx(math.radians(0.001) * EARTH_RADIUS, rel=1e-5)
+
+
+def test_unreadable_files():
+    with pytest.raises(ValueError):
+        parse_fit(b"not a fit file at all")
+    with pytest.raises(ValueError):
+        read_track(io.BytesIO(b""), "1.kml")
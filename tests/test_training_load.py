@@ -0,0 +1,184 @@
+from datetime import date
+
+import pytest
+
+from stravatui.analytics import _save_results
+from stravatui.store import ActivityStore
+from stravatui.training_load import (
+    ATL_DAYS,
+    CTL_DAYS,
+    _prepend_days,
+    activity_load,
+    load_state,
+    training_load_series,
+    update_training_load,
+)
+
+from .conftest import ATHLETE
+
+SERIES = ("load", "distance", "ctl", "atl", "distance_7", "distance_28")
+
+
+@pytest.fixture
+def history(make_record):
+    """Runs through March and April, and a ride without heart rate."""
+    return [
+        make_record(1, start_dates="2024-03-01T12:00:00+00:00"),
+        make_record(2, start_dates="2024-03-03T12:00:00+00:00", distances=12000.0),
+        make_record(3, start_dates="2024-03-03T13:00:00+00:00", average_heartrate=None),
+        make_record(
+            4,
+            start_dates="2024-03-20T12:00:00+00:00",
+            activity_type="root='Ride'",
+            distances=40000.0,
+            times=5400,
+            average_heartrate=None,
+        ),
+        make_record(5, start_dates="2024-04-10T12:00:00+00:00", times=3000),
+    ]
+
+
+def from_scratch(records, athlete: str = "scratch") -> dict:
+    store = ActivityStore(athlete)
+    store.add_activities(records)
+    update_training_load(store, athlete)
+    return load_state(athlete)
+
+
+def assert_same_load(state: dict, expected: dict) -> None:
+    assert state["first_day"] == expected["first_day"]
+    assert state["activities"] == expected["activities"]
+    for series in SERIES:
+        assert state[series] == pytest.approx(expected[series], abs=1e-9), series
+
+
+def test_first_update(history):
+    state = from_scratch(history, ATHLETE)
+
+    assert state["first_day"] == "2024-03-01"
+    assert state["count"] == len(history)
+    # 1 March to 10 April
+    assert len(state["ctl"]) == len(state["load"]) == 41
+    # rides count towards load but not run distance
+    assert state["distance"][19] == 0.0
+    assert state["load"][19] > 0
+    assert state["distance"][2] == pytest.approx(17.0)
+
+
+def test_later_activities_match_a_recompute(history):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history[:3])
+    assert update_training_load(store, ATHLETE)
+    store.add_activities(history[3:])
+    assert update_training_load(store, ATHLETE)
+
+    assert_same_load(load_state(ATHLETE), from_scratch(history))
+
+
+def test_earlier_activity_matches_a_recompute(history, make_record):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    update_training_load(store, ATHLETE)
+
+    # synced later but dated before everything else, and one on a day
+    # already in the series
+    earlier = [
+        make_record(6, start_dates="2024-02-10T12:00:00+00:00", distances=21097.5),
+        make_record(7, start_dates="2024-03-20T11:00:00+00:00"),
+    ]
+    store.add_activities(earlier)
+    assert update_training_load(store, ATHLETE)
+
+    state = load_state(ATHLETE)
+    assert state["first_day"] == "2024-02-10"
+    assert_same_load(state, from_scratch(history + earlier))
+
+
+def test_nothing_new_changes_nothing(history):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    assert update_training_load(store, ATHLETE)
+    assert not update_training_load(store, ATHLETE)
+
+
+def test_load_switches_to_streams_once_computed(history):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    update_training_load(store, ATHLETE)
+    before = load_state(ATHLETE)["activities"]["2"]
+
+    # an hour at threshold (the top zone boundary)
+    histogram = {"start": 0.0, "low": 170, "seconds": [3600.0]}
+    _save_results("heartrate_histogram", ATHLETE, {"2": ("0-0", histogram)})
+    assert update_training_load(store, ATHLETE)
+
+    after = load_state(ATHLETE)["activities"]["2"]
+    assert after == [before[0], pytest.approx(100.0), True]
+    _save_results("heartrate_histogram", "scratch", {"2": ("0-0", histogram)})
+    assert_same_load(load_state(ATHLETE), from_scratch(history))
+
+
+def test_prepend_days():
+    state = {
+        "load": [10.0, 0.0, 5.0],
+        "distance": [5.0, 0.0, 3.0],
+        "activities": {"1": [0, 10.0, False], "2": [2, 5.0, False]},
+    }
+    _prepend_days(state, 2)
+
+    assert state["load"] == [0.0, 0.0, 10.0, 0.0, 5.0]
+    assert state["distance"] == [0.0, 0.0, 5.0, 0.0, 3.0]
+    assert state["activities"] == {"1": [2, 10.0, False], "2": [4, 5.0, False]}
+
+
+def test_activity_load():
+    assert activity_load(3600, 170.0, None, 170) == pytest.approx(100.0)
+    assert activity_load(3600, None, None, 170) == pytest.approx(49.0)
+    histogram = {"low": 85, "seconds": [3600.0]}
+    assert activity_load(0, None, histogram, 170) == pytest.approx(25.0)
+
+
+def test_series_carries_on_through_rest_days(history):
+    state = from_scratch(history, ATHLETE)
+    last_ctl, last_atl = state["ctl"][-1], state["atl"][-1]
+
+    series = training_load_series(state, 30, today=date(2024, 4, 20))
+    assert len(series["days"]) == 30
+    assert series["days"][-1] == "2024-04-20"
+    assert series["ctl"][-1] == round(last_ctl * (1 - 1 / CTL_DAYS) ** 10, 2)
+    assert series["atl"][-1] == round(last_atl * (1 - 1 / ATL_DAYS) ** 10, 2)
+    # form is what the day started with
+    assert series["tsb"][-1] == pytest.approx(series["ctl"][-2] - series["atl"][-2])
+    assert series["distance_7"][-1] == 0.0
+
+
+def test_series_keeps_decaying(history):
+    state = from_scratch(history, ATHLETE)
+    last_ctl = state["ctl"][-1]
+
+    # a rounded average would stall once a day's decay rounds to nothing
+    series = training_load_series(state, 1, today=date(2025, 4, 10))
+    assert series["ctl"][-1] == round(last_ctl * (1 - 1 / CTL_DAYS) ** 365, 2)
+    assert series["ctl"][-1] < 0.01
+
+
+def test_replaced_store_is_worked_out_again(history, make_record):
+    store = ActivityStore(ATHLETE)
+    store.add_activities(history)
+    update_training_load(store, ATHLETE)
+
+    # as many activities as before, so only the ids give it away
+    other = [
+        make_record(10 + i, start_dates=f"2024-05-{i + 1:02d}T12:00:00+00:00")
+        for i in range(len(history))
+    ]
+    replaced = ActivityStore(ATHLETE)
+    replaced.add_activities(other)
+    assert update_training_load(replaced, ATHLETE)
+
+    assert_same_load(load_state(ATHLETE), from_scratch(other))
+
+
+def test_series_without_state():
+    series = training_load_series(None, 30)
+    assert series["days"] == [] and series["ctl"] == []